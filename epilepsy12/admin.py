@@ -194,6 +194,9 @@ admin.site.register(NHSEnglandRegionKPIAggregation)
 admin.site.register(OpenUKKPIAggregation)
 admin.site.register(CountryKPIAggregation)
 admin.site.register(NationalKPIAggregation)
+admin.site.register(KPIAggregationJob)
+admin.site.register(PendingAuditProgressUpdate)
+admin.site.register(BoundaryTile)
 
 admin.site.register(VisitActivity)
 admin.site.register(ComorbidityList)
@@ -213,6 +216,15 @@ admin.site.register(Trust, TrustAdmin)
 admin.site.register(LocalHealthBoard)
 admin.site.register(OPENUKNetwork)
 
+
+class PostcodeAdmin(admin.ModelAdmin):
+    search_fields = ["postcode"]
+    # the gazetteer holds every UK postcode - skip counting them on each page
+    show_full_result_count = False
+
+
+admin.site.register(Postcode, PostcodeAdmin)
+
 admin.site.register(OrganisationalAuditSubmission, OrganisationalAuditSubmissionAdmin)
 admin.site.register(
     OrganisationalAuditSubmissionPeriod, OrganisationalAuditSubmissionPeriodAdmin
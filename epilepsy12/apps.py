@@ -24,7 +24,11 @@ class Epilepsy12Config(AppConfig):
 
     def ready(self) -> None:
         import epilepsy12.signals
+        from .common_view_functions.field_completion import (
+            build_field_completion_registry,
+        )
 
+        build_field_completion_registry()
         periodically_update_azure_pg_password_file()
 
         return super().ready()
@@ -1,19 +1,38 @@
-from .calculate_kpis import calculate_kpis, annotate_kpis
+from .kpi_aggregation_dirty import (
+    mark_kpi_aggregations_dirty,
+    mark_kpi_aggregations_dirty_for_newly_completed_registrations,
+    get_dirty_kpi_aggregation_buckets,
+    clear_dirty_kpi_aggregation_buckets,
+)
+from .calculate_kpis import (
+    calculate_kpis,
+    score_kpis,
+    recalculate_kpis_for_registrations,
+    annotate_kpis,
+)
+from .field_completion import (
+    FieldCompletionRules,
+    get_field_completion_rules,
+    completed_fields_bulk,
+)
 from .recalculate_form_generate_response import (
     recalculate_form_generate_response,
     completed_fields,
     update_audit_progress,
+    queue_audit_progress_update,
     trigger_client_event,
     count_episode_fields,
     expected_score_for_single_episode,
 )
 from .validate_form_update_model import validate_and_update_model
 from .aggregate_by import (
+    cases_demographic_profile,
     cases_aggregated_by_deprivation_score,
     cases_aggregated_by_ethnicity,
     cases_aggregated_by_sex,
     cases_aggregated_by_age,
     calculate_kpi_value_counts_queryset,
+    calculate_kpi_value_counts_for_all_abstraction_levels,
     update_kpi_aggregation_model,
     get_filtered_cases_queryset_for,
     calculate_kpi_value_counts_queryset,
@@ -22,9 +41,23 @@ from .aggregate_by import (
     get_all_kpi_aggregation_data_for_view,
     # aggregate_kpis_update_models_all_abstractions_for_organisation,
     update_all_kpi_agg_models,
+    update_dirty_kpi_agg_models,
     _seed_all_aggregation_models,
     _calculate_all_kpis,
 )
+from .kpi_aggregation_queue import (
+    enqueue_kpi_aggregation,
+    fail_stale_kpi_aggregation_jobs,
+    claim_next_kpi_aggregation_job,
+    run_kpi_aggregation_job,
+    process_next_kpi_aggregation_job,
+)
+from .audit_progress_queue import (
+    claim_due_audit_progress_updates,
+    release_audit_progress_updates,
+    run_audit_progress_updates,
+    process_due_audit_progress_updates,
+)
 from .medicine_choices import get_medicine_choices
 from .report_queries import (
     all_registered_cases_for_cohort_and_abstraction_level,
@@ -36,11 +69,35 @@ from .sanction_user_access import (
     sanction_user,
     logged_in_user_may_access_this_organisation,
 )
+from .access_scope import (
+    AccessScope,
+    access_scope,
+    attach_access_scope,
+    compute_access_scope,
+)
 from .group_for_group import group_for_role
-from .tiles_for_region import return_tile_for_region
+from .tiles_for_region import (
+    return_tile_for_region,
+    tile_name_for_region,
+    get_boundary_tile,
+    build_boundary_tile,
+)
 from .map_from_shape_file import *
 
 from .comorbidity_choices import get_comorbidity_choices
 from .filter_cases_for_geography import *
 from .scatterplot_from_cases import *
 from .piechart_from_aggregated_data import *
+from .organisation_figures import (
+    ORGANISATION_FIGURES,
+    organisation_figure,
+    organisation_demographic_profile,
+    invalidate_organisation_figures,
+)
+from .case_search import search_cases
+from .case_listing import (
+    case_list_queryset,
+    case_list_sort_flag,
+    case_list_sort_field,
+    keyset_page,
+)
@@ -0,0 +1,155 @@
+# python imports
+from dataclasses import dataclass, field
+
+# django imports
+from django.apps import apps
+
+"""
+The access scope of a user: the organisations they may access, and their groups.
+It is computed when the user logs in and kept in their session, so decorators and views can check access without
+walking the user's employer, its country, trust and local health board on every request.
+The scope is recomputed whenever the user is saved (their employer or role may have changed) or their groups change,
+which is detected from the user's updated_at (see touch_users_on_group_change in signals.py).
+"""
+
+ACCESS_SCOPE_SESSION_KEY = "access_scope"
+
+
+@dataclass
+class AccessScope:
+    """
+    The organisations a user may access. National users (RCPCH audit team, RCPCH staff and superusers) may access all.
+    Other users may access the organisations in the trust (or in Wales, the local health board) which employs them.
+    """
+
+    fingerprint: list
+    is_active: bool = False
+    is_national: bool = False
+    organisation_id: int = None
+    trust_id: int = None
+    local_health_board_id: int = None
+    organisation_ids: frozenset = field(default_factory=frozenset)
+    group_names: frozenset = field(default_factory=frozenset)
+
+    def may_access_organisation(self, organisation_id) -> bool:
+        return self.is_active and (
+            self.is_national or int(organisation_id) in self.organisation_ids
+        )
+
+    def is_in_groups(self, group_names) -> bool:
+        return bool(self.group_names.intersection(group_names))
+
+    def to_session(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "is_active": self.is_active,
+            "is_national": self.is_national,
+            "organisation_id": self.organisation_id,
+            "trust_id": self.trust_id,
+            "local_health_board_id": self.local_health_board_id,
+            "organisation_ids": sorted(self.organisation_ids),
+            "group_names": sorted(self.group_names),
+        }
+
+    @classmethod
+    def from_session(cls, data: dict):
+        return cls(
+            fingerprint=data["fingerprint"],
+            is_active=data["is_active"],
+            is_national=data["is_national"],
+            organisation_id=data["organisation_id"],
+            trust_id=data["trust_id"],
+            local_health_board_id=data["local_health_board_id"],
+            organisation_ids=frozenset(data["organisation_ids"]),
+            group_names=frozenset(data["group_names"]),
+        )
+
+
+def access_scope_fingerprint(user) -> list:
+    """
+    Returns the fields of the user which the scope depends on, all loaded with the user on every request
+    """
+    return [
+        user.pk,
+        user.organisation_employer_id,
+        user.is_active,
+        user.email_confirmed,
+        user.is_superuser,
+        user.is_rcpch_audit_team_member,
+        user.is_rcpch_staff,
+        user.updated_at.isoformat() if user.updated_at else None,
+    ]
+
+
+def compute_access_scope(user) -> AccessScope:
+    """
+    Computes the access scope of a user from the database
+    """
+    Organisation = apps.get_model("epilepsy12", "Organisation")
+
+    scope = AccessScope(
+        fingerprint=access_scope_fingerprint(user),
+        is_active=(user.is_active and user.email_confirmed) or user.is_superuser,
+        is_national=(
+            user.is_rcpch_audit_team_member or user.is_rcpch_staff or user.is_superuser
+        ),
+        group_names=frozenset(user.groups.values_list("name", flat=True)),
+    )
+
+    employer = (
+        Organisation.objects.filter(pk=user.organisation_employer_id)
+        .values("pk", "trust_id", "local_health_board_id")
+        .first()
+    )
+    if employer is not None:
+        scope.organisation_id = employer["pk"]
+        scope.trust_id = employer["trust_id"]
+        scope.local_health_board_id = employer["local_health_board_id"]
+        if scope.trust_id is not None:
+            # England - all organisations in the same trust
+            parent_filter = {"trust_id": scope.trust_id}
+        elif scope.local_health_board_id is not None:
+            # Wales - all organisations in the same local health board
+            parent_filter = {"local_health_board_id": scope.local_health_board_id}
+        else:
+            parent_filter = {"pk": scope.organisation_id}
+        scope.organisation_ids = frozenset(
+            Organisation.objects.filter(**parent_filter).values_list("pk", flat=True)
+        )
+
+    return scope
+
+
+def attach_access_scope(request, user) -> AccessScope:
+    """
+    Computes the access scope of the user and stores it in the session. Called on login.
+    """
+    scope = compute_access_scope(user)
+    request.session[ACCESS_SCOPE_SESSION_KEY] = scope.to_session()
+    request._epilepsy12_access_scope = scope
+    return scope
+
+
+def access_scope(request) -> AccessScope:
+    """
+    Returns the access scope of the user making the request, from the session.
+    It is recomputed if it is missing, or if the user has been updated since it was computed.
+    Users who are not logged in have an empty scope.
+    """
+    if not request.user.is_authenticated:
+        return AccessScope(fingerprint=[])
+
+    scope = getattr(request, "_epilepsy12_access_scope", None)
+    if scope is not None and scope.fingerprint == access_scope_fingerprint(
+        request.user
+    ):
+        return scope
+
+    stored_scope = request.session.get(ACCESS_SCOPE_SESSION_KEY)
+    if stored_scope is not None and stored_scope[
+        "fingerprint"
+    ] == access_scope_fingerprint(request.user):
+        request._epilepsy12_access_scope = AccessScope.from_session(stored_scope)
+        return request._epilepsy12_access_scope
+
+    return attach_access_scope(request, request.user)
@@ -9,14 +9,13 @@ from django.contrib.gis.db.models import (
     F,
     Count,
     When,
-    Value,
-    CharField,
-    PositiveSmallIntegerField,
     Case as DJANGO_CASE,
     ExpressionWrapper,
     IntegerField,
 )
+from django.db import transaction
 from django.db.models.functions import ExtractYear, ExtractMonth, ExtractDay
+from django.utils import timezone
 
 # E12 imports
 from epilepsy12.constants import (
@@ -26,6 +25,12 @@ from epilepsy12.constants import (
 )
 from epilepsy12.general_functions import cohorts_and_dates
 from epilepsy12.common_view_functions import calculate_kpis
+from .calculate_kpis import recalculate_kpis_for_registrations
+from .kpi_aggregation_dirty import (
+    get_dirty_kpi_aggregation_buckets,
+    clear_dirty_kpi_aggregation_buckets,
+    mark_kpi_aggregations_dirty_for_newly_completed_registrations,
+)
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -43,51 +48,40 @@ Aggregations for pie charts
 """
 
 
-def cases_aggregated_by_sex(selected_organisation):
-    # aggregate queries on trust level cases
-
-    Case = apps.get_model("epilepsy12", "Case")
-
-    sex_long_list = [When(sex=k, then=Value(v)) for k, v in SEX_TYPE]
-
-    cases_aggregated_by_sex = (
-        Case.objects.filter(
-            site__organisation=selected_organisation,
-            site__site_is_primary_centre_of_epilepsy_care=True,
-            site__site_is_actively_involved_in_epilepsy_care=True,
-        )
-        .values("sex")
-        .annotate(sex_display=DJANGO_CASE(*sex_long_list, output_field=CharField()))
-        .values("sex_display")
-        .annotate(sexes=Count("sex"))
-        .order_by("sexes")
-    )
+# age ranges in days, with their display names
+AGE_RANGES = {
+    "under_a_year": ("Under a year", None, 365),
+    "one_to_five_years": ("1 to 5 years", 365, 5 * 365),
+    "five_to_eleven_years": ("5 to 11 years", 5 * 365, 11 * 365),
+    "eleven_to_eighteen_years": ("11 to 18 years", 11 * 365, 18 * 365),
+    "over_eighteen_years": ("Over 18 years", 18 * 365, None),
+}
 
-    return cases_aggregated_by_sex
+DEPRIVATION_QUINTILE_DISPLAY = {
+    1: "1st quintile",
+    2: "2nd quintile",
+    3: "3rd quintile",
+    4: "4th quintile",
+    5: "5th quintile",
+    6: "Not known",
+}
 
 
-def cases_aggregated_by_age(selected_organisation):
+def cases_demographic_profile(selected_organisation):
     """
-    Aggregates cases by age in days in the selected organisation by age ranges
-    - under a year
-    - 1 to 5 years
-    - 5 to 11 years
-    - 11 to 18 years
+    Aggregates cases in the selected organisation by sex, ethnicity, index of multiple deprivation quintile and age
+    range, in a single query using conditional aggregation.
+    Returns a dict of the aggregations for each, in the form returned by the cases_aggregated_by_* functions:
+    {"sex": [...], "ethnicity": [...], "deprivation": [...], "age_range": [...]}
     """
 
     Case = apps.get_model("epilepsy12", "Case")
 
-    # Define age ranges in days
-    under_a_year = 365
-    one_to_five_years = 5 * 365
-    five_to_eleven_years = 11 * 365
-    eleven_to_eighteen_years = 18 * 365
-
     # Current date
     today = date.today()
 
     # Annotate each case with its age in days
-    cases_with_age = Case.objects.filter(
+    cases_in_selected_organisation = Case.objects.filter(
         site__organisation=selected_organisation,
         site__site_is_primary_centre_of_epilepsy_care=True,
         site__site_is_actively_involved_in_epilepsy_care=True,
@@ -100,145 +94,110 @@ def cases_aggregated_by_age(selected_organisation):
         )
     )
 
-    # Aggregate cases by age range
-    cases_aggregated_by_age_ranges = (
-        cases_with_age.annotate(
-            age_range=DJANGO_CASE(
-                When(
-                    age_in_days__isnull=False,
-                    age_in_days__lt=under_a_year,
-                    then=Value("under_a_year"),
-                ),
-                When(
-                    age_in_days__isnull=False,
-                    age_in_days__gte=under_a_year,
-                    age_in_days__lt=one_to_five_years,
-                    then=Value("one_to_five_years"),
-                ),
-                When(
-                    age_in_days__isnull=False,
-                    age_in_days__gte=one_to_five_years,
-                    age_in_days__lt=five_to_eleven_years,
-                    then=Value("five_to_eleven_years"),
-                ),
-                When(
-                    age_in_days__isnull=False,
-                    age_in_days__gte=five_to_eleven_years,
-                    age_in_days__lt=eleven_to_eighteen_years,
-                    then=Value("eleven_to_eighteen_years"),
-                ),
-                When(
-                    age_in_days__isnull=False,
-                    age_in_days__gte=eleven_to_eighteen_years,
-                    then=Value("over_eighteen_years"),
-                ),
-                default=Value("unknown"),
-                output_field=CharField(),
-            )
+    counts = {}
+    for sex, _ in SEX_TYPE:
+        counts[f"sex_{sex}"] = Count("id", filter=Q(sex=sex))
+    for ethnicity, _ in ETHNICITIES:
+        counts[f"ethnicity_{ethnicity}"] = Count("id", filter=Q(ethnicity=ethnicity))
+    for quintile in DEPRIVATION_QUINTILE_DISPLAY:
+        counts[f"deprivation_{quintile}"] = Count(
+            "id",
+            filter=(
+                Q(index_of_multiple_deprivation_quintile=None)
+                if quintile == 6
+                else Q(index_of_multiple_deprivation_quintile=quintile)
+            ),
         )
-        .values("age_range")
-        .annotate(count=Count("id"))
-        .order_by("age_range")
+    for age_range, (_, lower, upper) in AGE_RANGES.items():
+        age_filter = Q(age_in_days__isnull=False)
+        if lower is not None:
+            age_filter &= Q(age_in_days__gte=lower)
+        if upper is not None:
+            age_filter &= Q(age_in_days__lt=upper)
+        counts[f"age_range_{age_range}"] = Count("id", filter=age_filter)
+    counts["age_range_unknown"] = Count("id", filter=Q(age_in_days__isnull=True))
+
+    counts = cases_in_selected_organisation.aggregate(**counts)
+
+    # only categories with cases are returned, ordered as the cases_aggregated_by_* functions order them
+    sex = sorted(
+        [
+            {"sex_display": sex_display, "sexes": counts[f"sex_{sex}"]}
+            for sex, sex_display in SEX_TYPE
+            if counts[f"sex_{sex}"]
+        ],
+        key=lambda aggregate: aggregate["sexes"],
     )
 
-    # add the display name for each age range
-    age_categories = {
-        "under_a_year": "Under a year",
-        "one_to_five_years": "1 to 5 years",
-        "five_to_eleven_years": "5 to 11 years",
-        "eleven_to_eighteen_years": "11 to 18 years",
-        "over_eighteen_years": "Over 18 years",
-    }
-
-    for aggregate in cases_aggregated_by_age_ranges:
-        age_range = aggregate["age_range"]
+    ethnicity = sorted(
+        [
+            {
+                "ethnicity_display": ethnicity_display,
+                "ethnicities": counts[f"ethnicity_{ethnicity}"],
+            }
+            for ethnicity, ethnicity_display in ETHNICITIES
+            if counts[f"ethnicity_{ethnicity}"]
+        ],
+        key=lambda aggregate: aggregate["ethnicities"],
+    )
 
-        str_map = age_categories.get(age_range, "Unknown")
+    deprivation = [
+        {
+            "index_of_multiple_deprivation_quintile_display": quintile,
+            "cases_aggregated_by_deprivation": counts[f"deprivation_{quintile}"],
+            "index_of_multiple_deprivation_quintile_display_str": quintile_display,
+        }
+        for quintile, quintile_display in DEPRIVATION_QUINTILE_DISPLAY.items()
+        if counts[f"deprivation_{quintile}"]
+    ]
 
-        aggregate.update({"age_category_label": str_map})
+    age_categories = {
+        age_range: age_category_label
+        for age_range, (age_category_label, _, _) in AGE_RANGES.items()
+    }
+    age_categories["unknown"] = "Unknown"
+    age_range = [
+        {
+            "age_range": age_range,
+            "count": counts[f"age_range_{age_range}"],
+            "age_category_label": age_category_label,
+        }
+        for age_range, age_category_label in sorted(age_categories.items())
+        if counts[f"age_range_{age_range}"]
+    ]
 
-    return cases_aggregated_by_age_ranges
+    return {
+        "sex": sex,
+        "ethnicity": ethnicity,
+        "deprivation": deprivation,
+        "age_range": age_range,
+    }
 
 
-def cases_aggregated_by_deprivation_score(selected_organisation):
+def cases_aggregated_by_sex(selected_organisation):
     # aggregate queries on trust level cases
-    Case = apps.get_model("epilepsy12", "Case")
+    return cases_demographic_profile(selected_organisation)["sex"]
 
-    cases_in_selected_organisation = Case.objects.filter(
-        site__organisation=selected_organisation,
-        site__site_is_primary_centre_of_epilepsy_care=True,
-        site__site_is_actively_involved_in_epilepsy_care=True,
-    )
 
-    cases_aggregated_by_deprivation = (
-        # Filter just Cases in selected org
-        cases_in_selected_organisation
-        # Get list of IMD quintiles
-        .values("index_of_multiple_deprivation_quintile")
-        # Converting 'None' to 6 in a new index_of_multiple_deprivation_quintile_display "column"
-        .annotate(
-            index_of_multiple_deprivation_quintile_display=DJANGO_CASE(
-                When(index_of_multiple_deprivation_quintile=None, then=Value(6)),
-                default="index_of_multiple_deprivation_quintile",
-                output_field=PositiveSmallIntegerField(),
-            )
-        )
-        # Keeps only the new column
-        .values("index_of_multiple_deprivation_quintile_display")
-        # Value count the new column
-        .annotate(
-            cases_aggregated_by_deprivation=Count(
-                "index_of_multiple_deprivation_quintile_display"
-            ),
-        ).order_by("index_of_multiple_deprivation_quintile_display")
-    )
-
-    deprivation_quintile_str_map = {
-        1: "1st quintile",
-        2: "2nd quintile",
-        3: "3rd quintile",
-        4: "4th quintile",
-        5: "5th quintile",
-        6: "Not known",
-    }
-
-    for aggregate in cases_aggregated_by_deprivation:
-        quintile = aggregate["index_of_multiple_deprivation_quintile_display"]
-
-        str_map = deprivation_quintile_str_map.get(quintile)
+def cases_aggregated_by_age(selected_organisation):
+    """
+    Aggregates cases by age in days in the selected organisation by age ranges
+    - under a year
+    - 1 to 5 years
+    - 5 to 11 years
+    - 11 to 18 years
+    """
+    return cases_demographic_profile(selected_organisation)["age_range"]
 
-        aggregate.update(
-            {"index_of_multiple_deprivation_quintile_display_str": str_map}
-        )
 
-    return cases_aggregated_by_deprivation
+def cases_aggregated_by_deprivation_score(selected_organisation):
+    # aggregate queries on trust level cases
+    return cases_demographic_profile(selected_organisation)["deprivation"]
 
 
 def cases_aggregated_by_ethnicity(selected_organisation):
     # aggregate queries on trust level cases
-
-    Case = apps.get_model("epilepsy12", "Case")
-
-    ethnicity_long_list = [When(ethnicity=k, then=Value(v)) for k, v in ETHNICITIES]
-
-    cases_aggregated_by_ethnicity = (
-        Case.objects.filter(
-            site__organisation=selected_organisation,
-            site__site_is_primary_centre_of_epilepsy_care=True,
-            site__site_is_actively_involved_in_epilepsy_care=True,
-        )
-        .values("ethnicity")
-        .annotate(
-            ethnicity_display=DJANGO_CASE(
-                *ethnicity_long_list, output_field=CharField()
-            )
-        )
-        .values("ethnicity_display")
-        .annotate(ethnicities=Count("ethnicity"))
-        .order_by("ethnicities")
-    )
-
-    return cases_aggregated_by_ethnicity
+    return cases_demographic_profile(selected_organisation)["ethnicity"]
 
 
 """
@@ -274,41 +233,98 @@ def update_all_kpi_agg_models(
 
     abstraction_levels = EnumAbstractionLevel if abstractions == "all" else abstractions
 
+    """
+    filter all Cases for all sites where
+    # site is actively involved in care
+    # site is lead centre
+    # matched for cohort
+    # have completed a full year of epilepsy care
+
+    then calculate the totals for each KPI at every level of abstraction in a single pass
+    """
+
+    all_cases = filter_completed_cases_at_one_year_by_abstraction_level(
+        abstraction_level=EnumAbstractionLevel.NATIONAL, cohort=cohort
+    )
+
+    all_kpi_value_counts = calculate_kpi_value_counts_for_all_abstraction_levels(
+        filtered_cases=all_cases,
+        kpis="all",
+    )
+
     for ABSTRACTION_LEVEL in abstraction_levels:
-        """
-        Loop through each level of abstraction
+        # Update all KPIAggregation models for abstraction
+        update_kpi_aggregation_model(
+            abstraction_level=ABSTRACTION_LEVEL,
+            kpi_value_counts=all_kpi_value_counts[ABSTRACTION_LEVEL],
+            cohort=cohort,
+            open_access=open_access,
+        )
 
-        For each level of of abstraction:
 
-        filter all Cases for all sites where
-        # site is actively involved in care
-        # site is lead centre
-        # matched for cohort
-        # have completed a full year of epilepsy care
-        """
+def update_dirty_kpi_agg_models(cohort: int, since: date = None) -> None:
+    """
+    Rebuilds only the (private) KPIAggregation rows marked dirty by calculate_kpis since the last aggregation, then clears the marks.
 
-        all_cases = filter_completed_cases_at_one_year_by_abstraction_level(
-            abstraction_level=ABSTRACTION_LEVEL, cohort=cohort
+    Args:
+        `cohort` - cohort filter for Cases
+        `since` (optional) - the date of the last aggregation for this cohort. Children completing their first year of care
+        since then are also marked dirty, as that happens without any field being updated. If None, the aggregations have
+        never been run for this cohort, so all KPIAggregation models are rebuilt.
+    """
+    rebuild_started = timezone.now()
+
+    if since is None:
+        update_all_kpi_agg_models(cohort=cohort, open_access=False)
+        clear_dirty_kpi_aggregation_buckets(
+            cohort=cohort, marked_before=rebuild_started
         )
+        return
+
+    mark_kpi_aggregations_dirty_for_newly_completed_registrations(
+        cohort=cohort, since=since
+    )
 
-        """
-        calculate the totals for each KPI
-        """
+    dirty_buckets = get_dirty_kpi_aggregation_buckets(cohort=cohort)
 
-        kpi_value_counts = calculate_kpi_value_counts_queryset(
+    if dirty_buckets:
+        # the national bucket is dirty whenever anything is, so every child in the cohort is read - but only once
+        all_cases = filter_completed_cases_at_one_year_by_abstraction_level(
+            abstraction_level=EnumAbstractionLevel.NATIONAL, cohort=cohort
+        )
+        all_kpi_value_counts = calculate_kpi_value_counts_for_all_abstraction_levels(
             filtered_cases=all_cases,
-            abstraction_level=ABSTRACTION_LEVEL,
             kpis="all",
         )
 
-        # Update all KPIAggregation models for abstraction
+    for ABSTRACTION_LEVEL in EnumAbstractionLevel:
+        if ABSTRACTION_LEVEL not in dirty_buckets:
+            continue
+
+        if ABSTRACTION_LEVEL is EnumAbstractionLevel.NATIONAL:
+            kpi_value_counts = all_kpi_value_counts[ABSTRACTION_LEVEL]
+        else:
+            # only write the rows for dirty abstraction codes
+            kpi_value_counts = [
+                value_count
+                for value_count in all_kpi_value_counts[ABSTRACTION_LEVEL]
+                if value_count[f"organisation__{ABSTRACTION_LEVEL.value}"]
+                in dirty_buckets[ABSTRACTION_LEVEL]
+            ]
+
         update_kpi_aggregation_model(
             abstraction_level=ABSTRACTION_LEVEL,
             kpi_value_counts=kpi_value_counts,
             cohort=cohort,
-            open_access=open_access,
+            open_access=False,
         )
 
+        logger.debug(
+            f"Rebuilt {len(dirty_buckets[ABSTRACTION_LEVEL])} dirty {ABSTRACTION_LEVEL.name} KPIAggregations for cohort {cohort}"
+        )
+
+    clear_dirty_kpi_aggregation_buckets(cohort=cohort, marked_before=rebuild_started)
+
 
 def calculate_kpi_value_counts_queryset(
     filtered_cases,
@@ -389,6 +405,79 @@ def calculate_kpi_value_counts_queryset(
     return kpi_value_counts
 
 
+def calculate_kpi_value_counts_for_all_abstraction_levels(
+    filtered_cases,
+    kpis: "list[str] | Literal['all']" = "all",
+) -> dict:
+    """For the given filtered_cases queryset, calculates the value counts for all KPIs at every level of abstraction in a single pass.
+
+    Equivalent to calling `calculate_kpi_value_counts_queryset` once per EnumAbstractionLevel, but the KPI scores and the
+    abstraction codes of each child's organisation are fetched in one query, and the counts for each level are then
+    calculated with pandas groupbys rather than a separate grouped query (and case filter subquery) per level.
+
+    Args
+        `filtered_cases` (QuerySet[Case]) - filtered Cases, for which KPI model has already been updated. Should not be filtered by abstraction level.
+
+        `kpis` (list[str] or Literal['all']) - Default 'all'. List of KPI model fields to perform aggregation on.
+
+    Returns dict keyed by EnumAbstractionLevel. Each value has the same shape as the return of `calculate_kpi_value_counts_queryset` for that level:
+    a list of dicts including the key 'organisation__{abstraction_level.value}', ordered by that key, or, for EnumAbstractionLevel.NATIONAL, a single dict.
+    Organisations without a code at a level of abstraction (eg Welsh organisations have no ICB) are not counted at that level.
+    """
+
+    # Get models
+    KPI = apps.get_model("epilepsy12", "KPI")
+
+    # Dict of kpi names
+    kpi_names = list(KPI().get_kpis() if kpis == "all" else kpis)
+
+    abstraction_keys = {
+        abstraction_level: f"organisation__{abstraction_level.value}"
+        for abstraction_level in EnumAbstractionLevel
+        if abstraction_level is not EnumAbstractionLevel.NATIONAL
+    }
+
+    # Single fetch of every scored child's KPIs with their organisation's code at each level of abstraction
+    kpi_scores = pd.DataFrame.from_records(
+        KPI.objects.filter(
+            registration__id__in=filtered_cases.values_list("registration")
+        ).values(*abstraction_keys.values(), *kpi_names),
+        columns=[*abstraction_keys.values(), *kpi_names],
+    )
+
+    # one indicator column per count, matching the Count(Case(When())) expressions in calculate_kpi_value_counts_queryset
+    indicators = {}
+    for kpi_name in kpi_names:
+        kpi_score = kpi_scores[kpi_name]
+        indicators[f"{kpi_name}_passed"] = kpi_score == 1
+        indicators[f"{kpi_name}_total_eligible"] = kpi_score.isin([0, 1])
+        indicators[f"{kpi_name}_ineligible"] = kpi_score == 2
+        indicators[f"{kpi_name}_incomplete"] = kpi_score.isna()
+    indicators = pd.DataFrame(indicators, index=kpi_scores.index).astype(int)
+
+    all_kpi_value_counts = {
+        EnumAbstractionLevel.NATIONAL: {
+            count_name: int(total) for count_name, total in indicators.sum().items()
+        }
+    }
+
+    for abstraction_level, abstraction_key in abstraction_keys.items():
+        # groupby drops children whose organisation has no code at this level
+        grouped_counts = indicators.groupby(
+            kpi_scores[abstraction_key].rename(abstraction_key), sort=True
+        ).sum()
+
+        all_kpi_value_counts[abstraction_level] = [
+            {
+                abstraction_key: abstraction_code,
+                **{count_name: int(total) for count_name, total in counts.items()},
+            }
+            for abstraction_code, counts in grouped_counts.iterrows()
+        ]
+
+    return all_kpi_value_counts
+
+
 def update_kpi_aggregation_model(
     abstraction_level: EnumAbstractionLevel,
     kpi_value_counts,
@@ -405,6 +494,9 @@ def update_kpi_aggregation_model(
 
         If open_access is true, a new KPI aggregation record is created, to store historical publications.
         If open_access is false, the existing KPI aggregation is updated
+
+        All abstraction entities are looked up in a single query, and the KPI aggregation records written with bulk_update/bulk_create
+        in one transaction, so the number of statements does not grow with the number of abstraction codes.
     """
 
     abstraction_level_models = get_abstraction_model_from_level(abstraction_level)
@@ -414,8 +506,6 @@ def update_kpi_aggregation_model(
         "epilepsy12", abstraction_level_models["kpi_aggregation_model"]
     )
 
-    list_of_updated_abstraction_level_instance = []
-
     # Separate logic for national as no groupby key in aggregation value counts
     if abstraction_level is EnumAbstractionLevel.NATIONAL:
         NationalKPIAggregation = apps.get_model("epilepsy12", "NationalKPIAggregation")
@@ -451,87 +541,123 @@ def update_kpi_aggregation_model(
 
         return
 
-    # update models where numbers have changed.
+    abstraction_key = f"organisation__{abstraction_level.value}"
+
+    value_counts_by_code = {}
     for value_count in kpi_value_counts:
-        ABSTRACTION_CODE = value_count.pop(f"organisation__{abstraction_level.value}")
+        value_count = dict(value_count)
+        ABSTRACTION_CODE = value_count.pop(abstraction_key)
         if ABSTRACTION_CODE is None:
             # we don't have any values for this abstraction level (eg local health board only applies in Wales not England)
-            return
+            continue
+        value_counts_by_code[ABSTRACTION_CODE] = value_count
 
-        # Get the model field name for the given abstraction model. As the enum values are all with respect to Organisation, this split and grab last gets just that related model's related field.
-        related_key_field = abstraction_level.value.split("__")[-1]
+    if not value_counts_by_code:
+        return
 
-        # Get related entity model
-        abstraction_entity_model = apps.get_model(
-            "epilepsy12", abstraction_level_models["abstraction_entity_model"]
-        )
+    # Get the model field name for the given abstraction model. As the enum values are all with respect to Organisation, this split and grab last gets just that related model's related field.
+    related_key_field = abstraction_level.value.split("__")[-1]
 
-        # Get instance of the related entity model to link with Aggregation model
-        abstraction_relation_instance = abstraction_entity_model.objects.filter(
-            **{f"{related_key_field}": ABSTRACTION_CODE}
-        ).first()
+    # Get related entity model
+    abstraction_entity_model = apps.get_model(
+        "epilepsy12", abstraction_level_models["abstraction_entity_model"]
+    )
 
-        # store this instance in a temporary list - this is used to identify remaining unscored abstraction level records
-        list_of_updated_abstraction_level_instance.append(abstraction_relation_instance)
+    # Get all instances of the related entity model to link with Aggregation model in one query.
+    # Where a code matches more than one instance, the first is used, as .first() would.
+    abstraction_relation_instances = abstraction_entity_model.objects.filter(
+        **{f"{related_key_field}__in": value_counts_by_code.keys()}
+    )
+    if not abstraction_relation_instances.ordered:
+        abstraction_relation_instances = abstraction_relation_instances.order_by("pk")
+
+    abstraction_relations_by_code = {}
+    for abstraction_relation_instance in abstraction_relation_instances:
+        abstraction_relations_by_code.setdefault(
+            getattr(abstraction_relation_instance, related_key_field),
+            abstraction_relation_instance,
+        )
 
-        if open_access:
-            # for public view: create a new record
+    missing_codes = value_counts_by_code.keys() - abstraction_relations_by_code.keys()
+    if missing_codes:
+        logger.error(
+            f"Can't save KPIAggregations for {abstraction_level}: no {abstraction_entity_model.__name__} found for {sorted(missing_codes)}"
+        )
 
-            value_count["abstraction_relation"] = abstraction_relation_instance
-            value_count["cohort"] = cohort
-            value_count["open_access"] = open_access
+    # bulk_update does not apply auto_now, and neither bulk path calls save(), so set these here
+    last_updated = timezone.now()
+    kpi_fields = list(next(iter(value_counts_by_code.values())).keys())
 
-            try:
-                new_obj = AbstractionKPIAggregationModel.objects.create(**value_count)
-                logger.debug(f"created {new_obj}")
-            except Exception as error:
-                logger.exception(
-                    f"Can't save new KPIAggregations for {abstraction_level} for {abstraction_relation_instance}: {error}"
-                )
-                return
+    def build_kpi_aggregation(abstraction_relation_instance, instance=None):
+        if instance is None:
+            instance = AbstractionKPIAggregationModel(
+                abstraction_relation=abstraction_relation_instance,
+                cohort=cohort,
+                open_access=open_access,
+            )
+        for kpi_field, value in value_counts_by_code[
+            getattr(abstraction_relation_instance, related_key_field)
+        ].items():
+            setattr(instance, kpi_field, value)
+        instance.abstraction_name = abstraction_relation_instance.name
+        instance.last_updated = last_updated
+        return instance
+
+    with transaction.atomic():
+        if open_access:
+            # for public view: create a new record for every abstraction relation
+            new_objs = AbstractionKPIAggregationModel.objects.bulk_create(
+                [
+                    build_kpi_aggregation(abstraction_relation_instance)
+                    for abstraction_relation_instance in abstraction_relations_by_code.values()
+                ]
+            )
+            logger.debug(
+                f"created {len(new_objs)} open access {abstraction_level.name} KPIAggregations for cohort {cohort}"
+            )
+            return
 
-        else:
-            # not for public view - create or update existing
-            try:
-                (
-                    new_obj,
-                    created,
-                ) = AbstractionKPIAggregationModel.objects.update_or_create(
-                    defaults={
-                        "abstraction_relation": abstraction_relation_instance,
-                        "cohort": cohort,
-                        "open_access": False,
-                        **value_count,
-                    },
-                    abstraction_relation=abstraction_relation_instance,
-                    cohort=cohort,
-                    open_access=open_access,
+        # not for public view - update existing records and create any that are missing
+        existing_objs = (
+            AbstractionKPIAggregationModel.objects.select_for_update().filter(
+                abstraction_relation__in=abstraction_relations_by_code.values(),
+                cohort=cohort,
+                open_access=False,
+            )
+        )
+        existing_objs_by_relation_id = {}
+        for existing_obj in existing_objs:
+            existing_objs_by_relation_id.setdefault(
+                existing_obj.abstraction_relation_id, []
+            ).append(existing_obj)
+
+        objs_to_update = []
+        objs_to_create = []
+        for abstraction_relation_instance in abstraction_relations_by_code.values():
+            matching_objs = existing_objs_by_relation_id.get(
+                abstraction_relation_instance.pk
+            )
+            if matching_objs:
+                objs_to_update.extend(
+                    build_kpi_aggregation(abstraction_relation_instance, instance=obj)
+                    for obj in matching_objs
                 )
-                logger.debug(f"updating/saving: {abstraction_relation_instance}")
-            except Exception as error:
-                logger.exception(
-                    f"CLOSED VIEW: Can't update/save KPIAggregations for {abstraction_level} for {abstraction_relation_instance}: {error}"
+            else:
+                objs_to_create.append(
+                    build_kpi_aggregation(abstraction_relation_instance)
                 )
-                return
 
-            if created:
-                logger.debug(f"created {new_obj}")
-            else:
-                logger.debug(f"updated {new_obj}")
+        AbstractionKPIAggregationModel.objects.bulk_update(
+            objs_to_update,
+            fields=[*kpi_fields, "abstraction_name", "last_updated"],
+            batch_size=500,
+        )
+        AbstractionKPIAggregationModel.objects.bulk_create(objs_to_create)
 
     logger.debug(
-        f"{len(list_of_updated_abstraction_level_instance)} scored {abstraction_level.name} instances updated with aggregated scores of a total {AbstractionKPIAggregationModel.objects.filter(cohort=cohort).count()} {abstraction_level.name}s"
+        f"{abstraction_level.name} KPIAggregations for cohort {cohort}: updated {len(objs_to_update)}, created {len(objs_to_create)}"
     )
 
-    not_updated = AbstractionKPIAggregationModel.objects.exclude(
-        abstraction_relation__in=list_of_updated_abstraction_level_instance
-    ).filter(cohort=cohort)
-
-    if not_updated.count() > 0:
-        logger.debug(
-            f"Not updated: {list(not_updated.values_list('abstraction_name'))})"
-        )
-
 
 def filter_completed_cases_at_one_year_by_abstraction_level(
     abstraction_level: EnumAbstractionLevel, cohort: int
@@ -792,21 +918,22 @@ def get_abstraction_model_from_level(
 def _calculate_all_kpis():
     """
     Loops through all registered cases for all cohorts and reruns the KPI calculation for each one
+    Registrations are scored in batches - see manage.py recalculate_kpis to run this across several processes
     """
-    Case = apps.get_model("epilepsy12", "Case")
-    all_cases = Case.objects.filter(registration__isnull=False)
+    Registration = apps.get_model("epilepsy12", "Registration")
+    registration_ids = list(
+        Registration.objects.filter(case__isnull=False)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
     index = 0
-    for case in all_cases:
-        try:
-            calculate_kpis(case.registration)
-            logger.debug(f"KPIs recalculated for {case}")
-            index += 1
-        except Exception as error:
-            logger.error(
-                f"It was not possible to calculate and update KPI record for {case}: {error}"
-            )
-            continue
-    logger.info(f"{index} cases updated from a total of {all_cases.count()}")
+    batch_size = 500
+    for start in range(0, len(registration_ids), batch_size):
+        scored, failed = recalculate_kpis_for_registrations(
+            registration_ids[start : start + batch_size]
+        )
+        index += scored
+    logger.info(f"{index} cases updated from a total of {len(registration_ids)}")
 
 
 """
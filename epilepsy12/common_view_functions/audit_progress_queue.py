@@ -0,0 +1,141 @@
+# python imports
+import logging
+from datetime import timedelta
+
+# django imports
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# E12 imports
+from .calculate_kpis import calculate_kpis
+from .recalculate_form_generate_response import update_audit_progress
+from epilepsy12.models_folder.pending_audit_progress_update import (
+    AUDIT_PROGRESS_FORMS,
+)
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+"""
+Debounced AuditProgress recalculation.
+HTMX field updates mark their form with a PendingAuditProgressUpdate (see queue_audit_progress_update) and the worker
+(manage.py run_audit_progress_worker) recalculates the form scores and KPIs once editing has paused.
+"""
+
+
+# a claim older than this belongs to a worker which died mid recalculation, so the mark can be claimed again
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+# a failed recalculation is retried after this delay
+FAILED_RETRY_DELAY = timedelta(minutes=1)
+
+
+def claim_due_audit_progress_updates(delay_seconds: float = 1) -> tuple:
+    """
+    Claims every pending update that has not been refreshed for delay_seconds, skipping any rows locked by another worker,
+    and any claimed by another worker unless the claim has timed out.
+    Claimed marks are kept until the recalculation succeeds (see release_audit_progress_updates).
+    Returns the time of the claim, and a dict of registration id to the list of forms to recalculate.
+    """
+    PendingAuditProgressUpdate = apps.get_model(
+        "epilepsy12", "PendingAuditProgressUpdate"
+    )
+
+    claimed_at = timezone.now()
+
+    with transaction.atomic():
+        due_updates = list(
+            PendingAuditProgressUpdate.objects.select_for_update(skip_locked=True)
+            .filter(requested_at__lte=claimed_at - timedelta(seconds=delay_seconds))
+            .filter(
+                Q(claimed_at__isnull=True)
+                | Q(claimed_at__lte=claimed_at - CLAIM_TIMEOUT)
+            )
+            .values_list("pk", "registration_id", "form")
+        )
+        if not due_updates:
+            return claimed_at, {}
+
+        PendingAuditProgressUpdate.objects.filter(
+            pk__in=[pk for pk, _, _ in due_updates]
+        ).update(claimed_at=claimed_at)
+
+    forms_by_registration = {}
+    for _, registration_id, form in due_updates:
+        forms_by_registration.setdefault(registration_id, []).append(form)
+    return claimed_at, forms_by_registration
+
+
+def release_audit_progress_updates(
+    registration_id: int, forms: list[str], claimed_at, succeeded: bool
+):
+    """
+    Deletes the marks of a successful recalculation, or releases them to be retried after FAILED_RETRY_DELAY.
+    Marks refreshed by an edit made while the recalculation ran are no longer claimed, so are left to be picked up again.
+    """
+    PendingAuditProgressUpdate = apps.get_model(
+        "epilepsy12", "PendingAuditProgressUpdate"
+    )
+
+    claimed_updates = PendingAuditProgressUpdate.objects.filter(
+        registration_id=registration_id, form__in=forms, claimed_at=claimed_at
+    )
+
+    if succeeded:
+        claimed_updates.delete()
+    else:
+        claimed_updates.update(
+            claimed_at=None, requested_at=timezone.now() + FAILED_RETRY_DELAY
+        )
+
+
+def run_audit_progress_updates(registration_id: int, forms: list[str]) -> bool:
+    """
+    Recalculates AuditProgress for each of the forms of a registration, then the KPIs once for the registration.
+    Returns True if the recalculation succeeded.
+    """
+    Registration = apps.get_model("epilepsy12", "Registration")
+    model_names = dict(AUDIT_PROGRESS_FORMS)
+
+    try:
+        registration = Registration.objects.get(pk=registration_id)
+        for form in forms:
+            if form == "registration":
+                model_instance = registration
+            else:
+                model_instance = apps.get_model(
+                    "epilepsy12", model_names[form]
+                ).objects.get(registration=registration)
+            update_audit_progress(model_instance, update_kpis=False)
+
+        calculate_kpis(registration_instance=registration)
+    except Exception as error:
+        logger.exception(
+            f"Audit progress update failed for registration {registration_id} ({', '.join(forms)}): {error}"
+        )
+        return False
+
+    return True
+
+
+def process_due_audit_progress_updates(delay_seconds: float = 1) -> int:
+    """
+    Claims and runs all due updates, deleting the marks of those which succeed.
+    Returns the number of registrations recalculated.
+    """
+    claimed_at, forms_by_registration = claim_due_audit_progress_updates(
+        delay_seconds=delay_seconds
+    )
+    for registration_id, forms in forms_by_registration.items():
+        succeeded = run_audit_progress_updates(
+            registration_id=registration_id, forms=forms
+        )
+        release_audit_progress_updates(
+            registration_id=registration_id,
+            forms=forms,
+            claimed_at=claimed_at,
+            succeeded=succeeded,
+        )
+    return len(forms_by_registration)
@@ -24,3 +24,4 @@ from .calculate_age_at_first_paediatric_assessment_in_years import (
     calculate_age_at_first_paediatric_assessment_in_years,
 )
 from .check_is_registered import check_is_registered
+from .scoring_context import ScoringContext, scoring_queryset
@@ -7,7 +7,7 @@ from dateutil.relativedelta import relativedelta
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_1(registration_instance) -> int:
+def score_kpi_1(scoring_context) -> int:
     """
     1. `paediatrician_with_expertise_in_epilepsies`
 
@@ -22,7 +22,7 @@ def score_kpi_1(registration_instance) -> int:
     Denominator = Number of and young people [diagnosed with epilepsy] at first year
     """
 
-    assessment = registration_instance.assessment
+    assessment = scoring_context.assessment
 
     # set variables which check if date fields complete for either consultant or neurologist
     # It is important to use the dates only because the achieved fields were introduced later so it is possible that the achieved fields are not filled in but two dates are still present.
@@ -6,7 +6,7 @@
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_10(registration_instance, age_at_first_paediatric_assessment) -> int:
+def score_kpi_10(scoring_context) -> int:
     """
     10. school_individual_healthcare_plan
 
@@ -21,10 +21,10 @@ def score_kpi_10(registration_instance, age_at_first_paediatric_assessment) -> i
     Denominator =Number of children and young people aged 5 years and above diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # ineligible
-    if age_at_first_paediatric_assessment < 5:
+    if scoring_context.age_at_first_paediatric_assessment < 5:
         return KPI_SCORE["INELIGIBLE"]
 
     # unscored measure if plan not in place is still a fail
@@ -7,7 +7,7 @@ from dateutil.relativedelta import relativedelta
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_2(registration_instance) -> int:
+def score_kpi_2(scoring_context) -> int:
     """2. epilepsy_specialist_nurse
 
     Title: Access to Epilepsy Specialist Nurse
@@ -21,7 +21,7 @@ def score_kpi_2(registration_instance) -> int:
     Denominator = Number of children and young people [diagnosed with epilepsy] at first year
     """
 
-    assessment = registration_instance.assessment
+    assessment = scoring_context.assessment
 
     # no nurse referral, fail
     if assessment.epilepsy_specialist_nurse_referral_made is False:
@@ -50,7 +50,7 @@ def score_kpi_2(registration_instance) -> int:
     if assessment.epilepsy_specialist_nurse_input_date is not None:
         has_seen_nurse_within_1_yr_registration = (
             assessment.epilepsy_specialist_nurse_input_date
-            <= registration_instance.first_paediatric_assessment_date
+            <= scoring_context.registration.first_paediatric_assessment_date
             + relativedelta(years=1)
         )
 
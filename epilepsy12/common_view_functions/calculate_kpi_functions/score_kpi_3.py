@@ -2,8 +2,6 @@
 from datetime import date
 
 # django imports
-from django.contrib.gis.db.models import Q
-from django.apps import apps
 
 # 3rd party imports
 from dateutil.relativedelta import relativedelta
@@ -12,7 +10,7 @@ from dateutil.relativedelta import relativedelta
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_3(registration_instance, age_at_first_paediatric_assessment) -> int:
+def score_kpi_3(scoring_context) -> int:
     """3. tertiary_input
 
     Title: Tertiary Input
@@ -31,29 +29,39 @@ def score_kpi_3(registration_instance, age_at_first_paediatric_assessment) -> in
     Denominator = Number of children [less than 3 years old at first assessment] AND [diagnosed with epilepsy] OR (number of children and young people diagnosed with epilepsy who had [3 or more maintenance AEDS] at first year )OR (number of children and young people diagnosed with epilepsy  who met [CESS criteria] OR (Number of children less than 4 years old at first assessment with epilepsy AND  (has generalised myoclonic seizures OR has focal myoclonic seizures))
     """
 
-    if registration_instance.first_paediatric_assessment_date is None:
+    if scoring_context.registration.first_paediatric_assessment_date is None:
         # in theory, this should never happen, but just in case
         return KPI_SCORE["NOT_SCORED"]
 
-    assessment = registration_instance.assessment
-
-    AntiEpilepsyMedicine = apps.get_model("epilepsy12", "AntiEpilepsyMedicine")
-    Episode = apps.get_model("epilepsy12", "Episode")
+    assessment = scoring_context.assessment
+    age_at_first_paediatric_assessment = (
+        scoring_context.age_at_first_paediatric_assessment
+    )
+    completed_first_year_of_care_date = (
+        scoring_context.registration.completed_first_year_of_care_date
+    )
 
     # EVALUATE ELIGIBILITY CRITERIA
 
     # first gather relevant data
-    aems_count = AntiEpilepsyMedicine.objects.filter(
-        management=registration_instance.management,
-        is_rescue_medicine=False,
-        antiepilepsy_medicine_start_date__lt=registration_instance.completed_first_year_of_care_date,
-    ).count()
-
-    has_myoclonic_epilepsy_episode = Episode.objects.filter(
-        Q(multiaxial_diagnosis=registration_instance.multiaxialdiagnosis)
-        & Q(epilepsy_or_nonepilepsy_status="E")
-        & (Q(epileptic_generalised_onset="MyC") | Q(focal_onset_myoclonic=True))
-    ).exists()
+    aems_count = len(
+        [
+            aem
+            for aem in scoring_context.antiepilepsy_medicines
+            if aem.is_rescue_medicine is False
+            and aem.antiepilepsy_medicine_start_date is not None
+            and aem.antiepilepsy_medicine_start_date < completed_first_year_of_care_date
+        ]
+    )
+
+    has_myoclonic_epilepsy_episode = any(
+        episode.epilepsy_or_nonepilepsy_status == "E"
+        and (
+            episode.epileptic_generalised_onset == "MyC"
+            or episode.focal_onset_myoclonic is True
+        )
+        for episode in scoring_context.episodes
+    )
 
     met_cess_criteria = (
         assessment.childrens_epilepsy_surgical_service_referral_criteria_met
@@ -61,14 +69,14 @@ def score_kpi_3(registration_instance, age_at_first_paediatric_assessment) -> in
 
     evidence_of_tertiary_input = (  # referral made to CESS within 1 year
         assessment.childrens_epilepsy_surgical_service_referral_date is not None
-        and registration_instance.first_paediatric_assessment_date is not None
-        and registration_instance.first_paediatric_assessment_date
+        and scoring_context.registration.first_paediatric_assessment_date is not None
+        and scoring_context.registration.first_paediatric_assessment_date
         + relativedelta(years=1)
         >= assessment.childrens_epilepsy_surgical_service_referral_date
     ) or (  # paediatric neurologist input within 1 year
         assessment.paediatric_neurologist_input_date is not None
         and assessment.paediatric_neurologist_input_date
-        and registration_instance.first_paediatric_assessment_date
+        and scoring_context.registration.first_paediatric_assessment_date
         + relativedelta(years=1)
         >= assessment.paediatric_neurologist_input_date
     )
@@ -97,7 +105,7 @@ def score_kpi_3(registration_instance, age_at_first_paediatric_assessment) -> in
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_3b(registration_instance) -> int:
+def score_kpi_3b(scoring_context) -> int:
     """
     3b. epilepsy_surgery_referral
 
@@ -112,7 +120,7 @@ def score_kpi_3b(registration_instance) -> int:
     Denominator =Number of children and young people diagnosed with epilepsy AND met CESS criteria at first year
     """
 
-    assessment = registration_instance.assessment
+    assessment = scoring_context.assessment
 
     # not scored
     if assessment.childrens_epilepsy_surgical_service_referral_criteria_met is None:
@@ -133,12 +141,12 @@ def score_kpi_3b(registration_instance) -> int:
     if (
         assessment.paediatric_neurologist_input_date is not None
         and assessment.paediatric_neurologist_input_date
-        <= registration_instance.first_paediatric_assessment_date
+        <= scoring_context.registration.first_paediatric_assessment_date
         + relativedelta(years=1)
     ) or (
         assessment.childrens_epilepsy_surgical_service_referral_date is not None
         and assessment.childrens_epilepsy_surgical_service_referral_date
-        <= registration_instance.first_paediatric_assessment_date
+        <= scoring_context.registration.first_paediatric_assessment_date
         + relativedelta(years=1)
     ):
         return KPI_SCORE["PASS"]
@@ -6,7 +6,7 @@
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_4(registration_instance) -> int:
+def score_kpi_4(scoring_context) -> int:
     """
     4. ECG
 
@@ -20,8 +20,8 @@ def score_kpi_4(registration_instance) -> int:
 
     Denominator = Number of children and young people diagnosed with epilepsy at first year AND with convulsive episodes at first year
     """
-    epilepsy_context = registration_instance.epilepsycontext
-    investigations = registration_instance.investigations
+    epilepsy_context = scoring_context.epilepsy_context
+    investigations = scoring_context.investigations
 
     # ineligible
     if epilepsy_context.were_any_of_the_epileptic_seizures_convulsive is False:
@@ -1,11 +1,8 @@
 # python imports
 
 # django imports
-from django.contrib.gis.db.models import Q
-from django.apps import apps
 
 # E12 imports
-# from epilepsy12.models import Syndrome
 from epilepsy12.constants import (
     KPI_SCORE,
     EPILEPSY_SEIZURE_TYPE,
@@ -13,7 +10,7 @@ from epilepsy12.constants import (
 )
 
 
-def score_kpi_5(registration_instance, age_at_first_paediatric_assessment) -> int:
+def score_kpi_5(scoring_context) -> int:
     """
     5. MRI
 
@@ -25,26 +22,21 @@ def score_kpi_5(registration_instance, age_at_first_paediatric_assessment) -> in
 
     Denominator = Number of children and young people diagnosed with epilepsy at first year AND who are NOT (JME OR JAE OR CAE OR Generalised tonic clonic seizures only OR self-limited epilepsy with centrotemporal spikes ~(SELECT))
     """
-    multiaxial_diagnosis = registration_instance.multiaxialdiagnosis
-    investigations = registration_instance.investigations
-
-    Syndrome = apps.get_model("epilepsy12", "Syndrome")
+    investigations = scoring_context.investigations
 
     # define eligibility criteria 1
-    ineligible_syndrome_present = Syndrome.objects.filter(
-        Q(multiaxial_diagnosis=multiaxial_diagnosis)
-        &
+    ineligible_syndrome_present = any(
+        syndrome.syndrome is not None and syndrome.syndrome.syndrome_name
         # ELECTROCLINICAL SYNDROMES: BECTS/JME/JAE/CAE currently not included
-        Q(
-            syndrome__syndrome_name__in=[
-                "Self-limited epilepsy with centrotemporal spikes",  # 3
-                "Juvenile myoclonic epilepsy",  # 18
-                "Juvenile absence epilepsy",  # 17
-                "Childhood absence epilepsy",  # 16
-                "Epilepsy with generalized tonic–clonic seizures alone",  # 19
-            ]
-        )
-    ).exists()
+        in [
+            "Self-limited epilepsy with centrotemporal spikes",  # 3
+            "Juvenile myoclonic epilepsy",  # 18
+            "Juvenile absence epilepsy",  # 17
+            "Childhood absence epilepsy",  # 16
+            "Epilepsy with generalized tonic–clonic seizures alone",  # 19
+        ]
+        for syndrome in scoring_context.syndromes
+    )
 
     # check eligibility criteria 1 & 2
     # 1 = none of the specified syndromes present
@@ -6,7 +6,7 @@
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_6(registration_instance, age_at_first_paediatric_assessment) -> int:
+def score_kpi_6(scoring_context) -> int:
     """
     6. assessment_of_mental_health_issues
 
@@ -19,10 +19,10 @@ def score_kpi_6(registration_instance, age_at_first_paediatric_assessment) -> in
     Denominator = = Number of children and young people over 5 years diagnosed with epilepsy
     """
 
-    multiaxial_diagnosis = registration_instance.multiaxialdiagnosis
+    multiaxial_diagnosis = scoring_context.multiaxial_diagnosis
 
     # ineligible
-    if age_at_first_paediatric_assessment < 5:
+    if scoring_context.age_at_first_paediatric_assessment < 5:
         return KPI_SCORE["INELIGIBLE"]
 
     # not scored
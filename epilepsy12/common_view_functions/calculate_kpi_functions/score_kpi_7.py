@@ -6,7 +6,7 @@
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_7(registration_instance) -> int:
+def score_kpi_7(scoring_context) -> int:
     """
     7. mental_health_support
 
@@ -21,8 +21,8 @@ def score_kpi_7(registration_instance) -> int:
     Denominator= Number of children and young people diagnosed with epilepsy AND had a mental health issue identified
     """
 
-    multiaxial_diagnosis = registration_instance.multiaxialdiagnosis
-    management = registration_instance.management
+    multiaxial_diagnosis = scoring_context.multiaxial_diagnosis
+    management = scoring_context.management
 
     # not scored
     if multiaxial_diagnosis.mental_health_issue_identified is None:
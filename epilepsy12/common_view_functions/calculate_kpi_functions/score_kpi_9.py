@@ -6,7 +6,7 @@
 from epilepsy12.constants import KPI_SCORE
 
 
-def score_kpi_9A(registration_instance) -> int:
+def score_kpi_9A(scoring_context) -> int:
     """
     9A. comprehensive_care_planning_agreement
 
@@ -24,7 +24,7 @@ def score_kpi_9A(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     fields_not_filled = [
         (management.has_individualised_care_plan_been_updated_in_the_last_year is None),
@@ -56,7 +56,7 @@ def score_kpi_9A(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Ai(registration_instance) -> int:
+def score_kpi_9Ai(scoring_context) -> int:
     """
     9Ai. patient_held_individualised_epilepsy_document
 
@@ -71,7 +71,7 @@ def score_kpi_9Ai(registration_instance) -> int:
 
     # not scored
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored
     if management.individualised_care_plan_in_place is None:
@@ -84,7 +84,7 @@ def score_kpi_9Ai(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Aii(registration_instance) -> int:
+def score_kpi_9Aii(scoring_context) -> int:
     """ii patient_carer_parent_agreement_to_the_care_planning
     % of children and young people with epilepsy after 12 months where there was evidence of agreement between the person, their family and/or carers as appropriate
 
@@ -95,7 +95,7 @@ def score_kpi_9Aii(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
@@ -112,7 +112,7 @@ def score_kpi_9Aii(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Aiii(registration_instance) -> int:
+def score_kpi_9Aiii(scoring_context) -> int:
     """iii. care_planning_has_been_updated_when_necessary
 
     Calculation Method
@@ -122,7 +122,7 @@ def score_kpi_9Aiii(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
@@ -139,7 +139,7 @@ def score_kpi_9Aiii(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9B(registration_instance) -> int:
+def score_kpi_9B(scoring_context) -> int:
     """
     9B. comprehensive_care_planning_content
 
@@ -154,7 +154,7 @@ def score_kpi_9B(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     fields_not_filled = [
         (management.has_rescue_medication_been_prescribed is None),
@@ -212,7 +212,7 @@ def score_kpi_9B(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Bi(registration_instance) -> int:
+def score_kpi_9Bi(scoring_context) -> int:
     """9Bi. parental_prolonged_seizures_care_plan
 
     Calculation Method
@@ -222,7 +222,7 @@ def score_kpi_9Bi(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year AND prescribed rescue medication
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     fields_not_filled = [
         (management.has_rescue_medication_been_prescribed is None),
@@ -248,7 +248,7 @@ def score_kpi_9Bi(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Bii(registration_instance) -> int:
+def score_kpi_9Bii(scoring_context) -> int:
     """ii. water_safety
 
     Percentage of children and young people with epilepsy with evidence of discussion regarding water safety.
@@ -260,7 +260,7 @@ def score_kpi_9Bii(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
@@ -277,7 +277,7 @@ def score_kpi_9Bii(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Biii(registration_instance) -> int:
+def score_kpi_9Biii(scoring_context) -> int:
     """iii. first_aid
 
     Percentage of children and young people with epilepsy with evidence of discussion regarding first aid.
@@ -289,7 +289,7 @@ def score_kpi_9Biii(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
@@ -306,7 +306,7 @@ def score_kpi_9Biii(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Biv(registration_instance) -> int:
+def score_kpi_9Biv(scoring_context) -> int:
     """iv. general_participation_and_risk
 
     Percentage of children and young people with epilepsy with evidence of discussion regarding general participation and risk.
@@ -318,7 +318,7 @@ def score_kpi_9Biv(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
@@ -335,7 +335,7 @@ def score_kpi_9Biv(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Bv(registration_instance) -> int:
+def score_kpi_9Bv(scoring_context) -> int:
     """v. service_contact_details
 
     Percentage of children and young people with epilepsy with evidence of discussion regarding SUDEP and evidence of a prolonged seizures care plan.
@@ -347,7 +347,7 @@ def score_kpi_9Bv(registration_instance) -> int:
     Denominator = Number of children and young people diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
@@ -364,7 +364,7 @@ def score_kpi_9Bv(registration_instance) -> int:
         return KPI_SCORE["FAIL"]
 
 
-def score_kpi_9Bvi(registration_instance) -> int:
+def score_kpi_9Bvi(scoring_context) -> int:
     """vi. sudep
 
     Percentage of children and young people with epilepsy with evidence of being given service contact details.
@@ -376,7 +376,7 @@ def score_kpi_9Bvi(registration_instance) -> int:
     Denominator = Number of children diagnosed with epilepsy at first year
     """
 
-    management = registration_instance.management
+    management = scoring_context.management
 
     # unscored measure if plan not in place is still a fail
     if management.individualised_care_plan_in_place is False:
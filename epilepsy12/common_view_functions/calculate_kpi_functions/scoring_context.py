@@ -0,0 +1,125 @@
+# python imports
+
+# django imports
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Prefetch
+
+# E12 imports
+from .calculate_age_at_first_paediatric_assessment_in_years import (
+    calculate_age_at_first_paediatric_assessment_in_years,
+)
+
+# the one-to-one related models read by the scoring functions
+SCORING_SELECT_RELATED = [
+    "case",
+    "kpi",
+    "assessment",
+    "epilepsycontext",
+    "multiaxialdiagnosis",
+    "investigations",
+    "management",
+]
+
+
+def scoring_queryset():
+    """
+    Registrations with every related row read by the KPI scoring functions loaded alongside:
+    the one-to-one audit models in the same query, and the medicines, episodes and syndromes in one query each.
+    """
+    Registration = apps.get_model("epilepsy12", "Registration")
+    AntiEpilepsyMedicine = apps.get_model("epilepsy12", "AntiEpilepsyMedicine")
+    Episode = apps.get_model("epilepsy12", "Episode")
+    Syndrome = apps.get_model("epilepsy12", "Syndrome")
+
+    return Registration.objects.select_related(
+        *SCORING_SELECT_RELATED
+    ).prefetch_related(
+        Prefetch(
+            "management__antiepilepsymedicine_set",
+            queryset=AntiEpilepsyMedicine.objects.select_related(
+                "medicine_entity"
+            ).order_by("pk"),
+        ),
+        Prefetch(
+            "multiaxialdiagnosis__episodes",
+            queryset=Episode.objects.order_by("pk"),
+        ),
+        Prefetch(
+            "multiaxialdiagnosis__syndromes",
+            queryset=Syndrome.objects.select_related("syndrome").order_by("pk"),
+        ),
+    )
+
+
+def _related_or_none(instance, related_name):
+    """
+    Returns the related instance, or None if it has not been created yet.
+    """
+    try:
+        return getattr(instance, related_name)
+    except ObjectDoesNotExist:
+        return None
+
+
+class ScoringContext:
+    """
+    Snapshot of a registration and all the related rows the KPI scoring functions read.
+
+    Everything is loaded up front (see scoring_queryset), so the score_kpi_* functions are pure functions of the
+    context and make no queries of their own. Related audit models that have not been created yet are None.
+    """
+
+    def __init__(self, registration_instance):
+        self.registration = registration_instance
+        self.case = registration_instance.case
+
+        self.assessment = _related_or_none(registration_instance, "assessment")
+        self.epilepsy_context = _related_or_none(
+            registration_instance, "epilepsycontext"
+        )
+        self.multiaxial_diagnosis = _related_or_none(
+            registration_instance, "multiaxialdiagnosis"
+        )
+        self.investigations = _related_or_none(registration_instance, "investigations")
+        self.management = _related_or_none(registration_instance, "management")
+
+        self.antiepilepsy_medicines = (
+            list(self.management.antiepilepsymedicine_set.all())
+            if self.management is not None
+            else []
+        )
+        self.episodes = (
+            list(self.multiaxial_diagnosis.episodes.all())
+            if self.multiaxial_diagnosis is not None
+            else []
+        )
+        self.syndromes = (
+            list(self.multiaxial_diagnosis.syndromes.all())
+            if self.multiaxial_diagnosis is not None
+            else []
+        )
+
+        # important metric for calculations that follow
+        self.age_at_first_paediatric_assessment = (
+            calculate_age_at_first_paediatric_assessment_in_years(registration_instance)
+        )
+
+    @classmethod
+    def for_registration(cls, registration_instance) -> "ScoringContext":
+        """
+        Loads a fresh snapshot for a single registration.
+        """
+        return cls(scoring_queryset().get(pk=registration_instance.pk))
+
+    @classmethod
+    def for_registrations(cls, registration_ids) -> list["ScoringContext"]:
+        """
+        Loads snapshots for a list of registration ids, in a fixed number of queries however many there are.
+        """
+        return [
+            cls(registration_instance)
+            for registration_instance in scoring_queryset().filter(
+                pk__in=registration_ids
+            )
+        ]
@@ -1,11 +1,13 @@
 # python imports
+import logging
 
 # django imports
 from django.contrib.gis.db.models import Sum
 from django.apps import apps
+from django.db import transaction
 
 # E12 imports
-from ..general_functions import has_all_attributes
+from .kpi_aggregation_dirty import mark_kpi_aggregations_dirty
 from .calculate_kpi_functions import (
     score_kpi_1,
     score_kpi_2,
@@ -28,13 +30,16 @@ from .calculate_kpi_functions import (
     score_kpi_9Bv,
     score_kpi_9Bvi,
     score_kpi_10,
-    calculate_age_at_first_paediatric_assessment_in_years,
     check_is_registered,
+    ScoringContext,
 )
 
 # from epilepsy12.models import KPI
 from epilepsy12.constants import KPI_SCORE
 
+# Logging setup
+logger = logging.getLogger(__name__)
+
 
 def calculate_kpis(registration_instance):
     """
@@ -50,6 +55,27 @@ def calculate_kpis(registration_instance):
 
     KPI = apps.get_model("epilepsy12", "KPI")
 
+    # load the registration and everything the scorers read in one go
+    kpis = score_kpis(ScoringContext.for_registration(registration_instance))
+    if kpis is None:
+        return None
+
+    KPI.objects.filter(pk=registration_instance.kpi.pk).update(**kpis)
+
+    # flag the KPIAggregations this child contributes to for the next aggregation run
+    mark_kpi_aggregations_dirty(
+        organisation_ids=[registration_instance.kpi.organisation_id],
+        cohort=registration_instance.cohort,
+    )
+
+
+def score_kpis(scoring_context):
+    """
+    Scores every KPI for a given registered child without saving them.
+    Accepts a ScoringContext - the scorers make no queries of their own, so this can be run over many children in bulk.
+    Returns a dict of KPI field names and scores, or None if the child is not registered.
+    """
+
     # first set default value 'NOT_SCORED' to all KPIs
     paediatrician_with_expertise_in_epilepsies = KPI_SCORE["NOT_SCORED"]
     epilepsy_specialist_nurse = KPI_SCORE["NOT_SCORED"]
@@ -73,97 +99,86 @@ def calculate_kpis(registration_instance):
     sudep = KPI_SCORE["NOT_SCORED"]
     school_individual_healthcare_plan = KPI_SCORE["NOT_SCORED"]
 
-    # important metric for calculations that follow
-    age_at_first_paediatric_assessment = (
-        calculate_age_at_first_paediatric_assessment_in_years(registration_instance)
-    )
+    assessment = scoring_context.assessment
+    epilepsy_context = scoring_context.epilepsy_context
+    multiaxial_diagnosis = scoring_context.multiaxial_diagnosis
+    investigations = scoring_context.investigations
+    management = scoring_context.management
 
     # child must be registered in the audit for the KPI to be counted
-    if not check_is_registered(registration_instance):
+    if not check_is_registered(scoring_context.registration):
         # cannot proceed any further if registration incomplete.
         # In theory it should not be possible to get this far.
         return None
 
-    if hasattr(registration_instance, "assessment"):
-        paediatrician_with_expertise_in_epilepsies = score_kpi_1(registration_instance)
+    if assessment is not None:
+        paediatrician_with_expertise_in_epilepsies = score_kpi_1(scoring_context)
 
-    if hasattr(registration_instance, "assessment"):
-        epilepsy_specialist_nurse = score_kpi_2(registration_instance)
+    if assessment is not None:
+        epilepsy_specialist_nurse = score_kpi_2(scoring_context)
 
-    if has_all_attributes(
-        registration_instance, ["management", "assessment", "multiaxialdiagnosis"]
+    if (
+        management is not None
+        and assessment is not None
+        and multiaxial_diagnosis is not None
     ):
-        tertiary_input = score_kpi_3(
-            registration_instance, age_at_first_paediatric_assessment
-        )
+        tertiary_input = score_kpi_3(scoring_context)
 
-    if hasattr(registration_instance, "assessment"):
-        epilepsy_surgery_referral = score_kpi_3b(registration_instance)
+    if assessment is not None:
+        epilepsy_surgery_referral = score_kpi_3b(scoring_context)
 
-    if has_all_attributes(registration_instance, ["epilepsycontext", "investigations"]):
-        ecg = score_kpi_4(registration_instance)
+    if epilepsy_context is not None and investigations is not None:
+        ecg = score_kpi_4(scoring_context)
 
-    if has_all_attributes(
-        registration_instance, ["multiaxialdiagnosis", "investigations"]
-    ):
-        mri = score_kpi_5(registration_instance, age_at_first_paediatric_assessment)
+    if multiaxial_diagnosis is not None and investigations is not None:
+        mri = score_kpi_5(scoring_context)
 
-    if hasattr(registration_instance, "multiaxialdiagnosis"):
-        assessment_of_mental_health_issues = score_kpi_6(
-            registration_instance, age_at_first_paediatric_assessment
-        )
+    if multiaxial_diagnosis is not None:
+        assessment_of_mental_health_issues = score_kpi_6(scoring_context)
 
-    if has_all_attributes(registration_instance, ["multiaxialdiagnosis", "management"]):
-        mental_health_support = score_kpi_7(registration_instance)
+    if multiaxial_diagnosis is not None and management is not None:
+        mental_health_support = score_kpi_7(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        sodium_valproate = score_kpi_8(
-            registration_instance, age_at_first_paediatric_assessment
-        )
+    if management is not None:
+        sodium_valproate = score_kpi_8(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        comprehensive_care_planning_agreement = score_kpi_9A(registration_instance)
+    if management is not None:
+        comprehensive_care_planning_agreement = score_kpi_9A(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        patient_held_individualised_epilepsy_document = score_kpi_9Ai(
-            registration_instance
-        )
+    if management is not None:
+        patient_held_individualised_epilepsy_document = score_kpi_9Ai(scoring_context)
 
-    if hasattr(registration_instance, "management"):
+    if management is not None:
         patient_carer_parent_agreement_to_the_care_planning = score_kpi_9Aii(
-            registration_instance
+            scoring_context
         )
 
-    if hasattr(registration_instance, "management"):
-        care_planning_has_been_updated_when_necessary = score_kpi_9Aiii(
-            registration_instance
-        )
+    if management is not None:
+        care_planning_has_been_updated_when_necessary = score_kpi_9Aiii(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        comprehensive_care_planning_content = score_kpi_9B(registration_instance)
+    if management is not None:
+        comprehensive_care_planning_content = score_kpi_9B(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        parental_prolonged_seizures_care_plan = score_kpi_9Bi(registration_instance)
+    if management is not None:
+        parental_prolonged_seizures_care_plan = score_kpi_9Bi(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        water_safety = score_kpi_9Bii(registration_instance)
+    if management is not None:
+        water_safety = score_kpi_9Bii(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        first_aid = score_kpi_9Biii(registration_instance)
+    if management is not None:
+        first_aid = score_kpi_9Biii(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        general_participation_and_risk = score_kpi_9Biv(registration_instance)
+    if management is not None:
+        general_participation_and_risk = score_kpi_9Biv(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        service_contact_details = score_kpi_9Bv(registration_instance)
+    if management is not None:
+        service_contact_details = score_kpi_9Bv(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        sudep = score_kpi_9Bvi(registration_instance)
+    if management is not None:
+        sudep = score_kpi_9Bvi(scoring_context)
 
-    if hasattr(registration_instance, "management"):
-        school_individual_healthcare_plan = score_kpi_10(
-            registration_instance, age_at_first_paediatric_assessment
-        )
+    if management is not None:
+        school_individual_healthcare_plan = score_kpi_10(scoring_context)
 
     # Store the KPIs in AuditProgress
     kpis = {
@@ -190,7 +205,65 @@ def calculate_kpis(registration_instance):
         "school_individual_healthcare_plan": school_individual_healthcare_plan,
     }
 
-    KPI.objects.filter(pk=registration_instance.kpi.pk).update(**kpis)
+    return kpis
+
+
+def recalculate_kpis_for_registrations(registration_ids) -> tuple[int, int]:
+    """
+    Rescores the KPIs for a batch of registrations.
+    The registrations and the related models the scorers read are loaded in a fixed number of queries, scored in memory, and the KPI
+    records written back with a single bulk_update. Used by manage.py recalculate_kpis to rescore a whole cohort.
+
+    Returns a tuple of (number of registrations scored, number that could not be scored).
+    """
+
+    KPI = apps.get_model("epilepsy12", "KPI")
+
+    scored_kpis = []
+    organisation_ids_by_cohort = {}
+    failed = 0
+    for scoring_context in ScoringContext.for_registrations(registration_ids):
+        registration_instance = scoring_context.registration
+        if registration_instance.kpi is None:
+            continue
+
+        try:
+            kpis = score_kpis(scoring_context)
+        except Exception as error:
+            logger.error(
+                f"It was not possible to calculate and update KPI record for {registration_instance.case}: {error}"
+            )
+            failed += 1
+            continue
+
+        if kpis is None:
+            continue
+
+        kpi = registration_instance.kpi
+        for kpi_name, score in kpis.items():
+            setattr(kpi, kpi_name, score)
+        scored_kpis.append(kpi)
+
+        organisation_ids_by_cohort.setdefault(registration_instance.cohort, set()).add(
+            kpi.organisation_id
+        )
+
+    if not scored_kpis:
+        return 0, failed
+
+    with transaction.atomic():
+        KPI.objects.bulk_update(
+            scored_kpis, fields=list(KPI().get_kpis()), batch_size=500
+        )
+
+        # flag the KPIAggregations these children contribute to for the next aggregation run
+        for cohort, organisation_ids in organisation_ids_by_cohort.items():
+            mark_kpi_aggregations_dirty(
+                organisation_ids=organisation_ids,
+                cohort=cohort,
+            )
+
+    return len(scored_kpis), failed
 
 
 def annotate_kpis(filtered_organisations, kpi_name="all"):
@@ -0,0 +1,253 @@
+# python imports
+from dataclasses import dataclass, field
+
+# django imports
+from django.apps import apps
+from django.db.models import Exists, F, OuterRef, Prefetch, Q
+
+# E12 imports
+from .case_search import search_cases
+
+"""
+Query layer for the case list.
+The list is built as one queryset, with the registration, audit progress, lead site and transfer status joined or
+annotated, and is paged by keyset on the sort key (rows after the last one shown), so no page needs an OFFSET or a
+COUNT of the whole list.
+"""
+
+CASE_LIST_PAGE_SIZE = 50
+
+# sort flags sent by the case table sort buttons, and the field each orders by
+CASE_LIST_SORT_FIELDS = {
+    "sort_by_nhs_number_up": "nhs_number",
+    "sort_by_nhs_number_down": "-nhs_number",
+    "sort_by_ethnicity_up": "ethnicity",
+    "sort_by_ethnicity_down": "-ethnicity",
+    "sort_by_sex_up": "sex",
+    "sort_by_sex_down": "-sex",
+    "sort_by_name_up": "surname",
+    "sort_by_name_down": "-surname",
+    "sort_by_id_up": "id",
+    "sort_by_id_down": "-id",
+    "sort_by_deadline_up": "registration__audit_submission_date",
+    "sort_by_deadline_down": "-registration__audit_submission_date",
+    "sort_by_cohort_up": "registration__cohort",
+    "sort_by_cohort_down": "-registration__cohort",
+    # days remaining before submission is calculated from the submission date
+    "sort_by_days_remaining_before_submission_up": "registration__audit_submission_date",
+    "sort_by_days_remaining_before_submission_down": "-registration__audit_submission_date",
+}
+
+# Jersey cases have a unique reference number in place of an NHS number
+JERSEY_SORT_FIELDS = {
+    "nhs_number": "unique_reference_number",
+    "-nhs_number": "-unique_reference_number",
+}
+
+DEFAULT_CASE_LIST_SORT_FIELD = "surname"
+
+
+def case_list_sort_flag(request):
+    """
+    Returns the sort flag requested, either by the sort button clicked or passed on from the previous page, or None
+    """
+    for sort_flag in [request.htmx.trigger_name, request.GET.get("sort_flag")]:
+        if sort_flag in CASE_LIST_SORT_FIELDS:
+            return sort_flag
+    return None
+
+
+def case_list_sort_field(sort_flag, organisation):
+    """
+    Returns the field the case list is ordered by for a sort flag
+    """
+    sort_field = CASE_LIST_SORT_FIELDS.get(sort_flag, DEFAULT_CASE_LIST_SORT_FIELD)
+    if organisation.country.boundary_identifier == "JEY":
+        sort_field = JERSEY_SORT_FIELDS.get(sort_field, sort_field)
+    return sort_field
+
+
+def lead_site_filter(prefix=""):
+    """
+    Returns a Q filtering for the site that is the active primary centre of epilepsy care (the lead site)
+    """
+    return Q(
+        **{
+            f"{prefix}site_is_primary_centre_of_epilepsy_care": True,
+            f"{prefix}site_is_actively_involved_in_epilepsy_care": True,
+        }
+    )
+
+
+def case_list_queryset(organisation, view_preference: int, search_term=None):
+    """
+    Returns the cases listed for an organisation, at the level of the user's view preference:
+    0 organisation, 1 trust (local health board in Wales) and 2 national.
+    Cases are listed with the organisation or trust of their lead site; nationally, all cases are listed unless searching.
+    Registration and audit progress are joined, lead sites prefetched (as lead_sites, with their organisation and
+    trust) and registered cases in transfer annotated (in_transfer), so listing them needs no further queries.
+    """
+    Case = apps.get_model("epilepsy12", "Case")
+    Site = apps.get_model("epilepsy12", "Site")
+
+    if view_preference == 0:
+        # single filter, so the organisation and lead site conditions apply to the same site
+        cases = Case.objects.filter(
+            Q(site__organisation=organisation) & lead_site_filter(prefix="site__")
+        )
+    elif view_preference == 1:
+        if organisation.country.boundary_identifier == "W92000004":
+            # in Wales filter by health board
+            trust_filter = Q(
+                site__organisation__local_health_board=organisation.local_health_board
+            )
+        else:
+            # England filter by Trust
+            trust_filter = Q(site__organisation__trust=organisation.trust)
+        cases = Case.objects.filter(trust_filter & lead_site_filter(prefix="site__"))
+    elif search_term:
+        cases = Case.objects.filter(lead_site_filter(prefix="site__"))
+    else:
+        cases = Case.objects.all()
+
+    if search_term:
+        cases = search_cases(cases, search_term)
+
+    site_in_transfer_of_registered_case = Site.objects.filter(
+        case=OuterRef("pk"), active_transfer=True, case__registration__isnull=False
+    )
+
+    return (
+        cases.select_related("registration__audit_progress")
+        .prefetch_related(
+            Prefetch(
+                "site",
+                queryset=Site.objects.filter(lead_site_filter()).select_related(
+                    "organisation__trust"
+                ),
+                to_attr="lead_sites",
+            )
+        )
+        .annotate(in_transfer=Exists(site_in_transfer_of_registered_case))
+    )
+
+
+@dataclass
+class KeysetPage:
+    """
+    A page of a keyset paginated list. The cursors are the primary keys of the first and last rows on the page.
+    """
+
+    object_list: list = field(default_factory=list)
+    has_next: bool = False
+    has_previous: bool = False
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        return self.object_list[-1].pk if self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return self.object_list[0].pk if self.object_list else None
+
+
+def _keyset_ordering(sort_field: str, backwards: bool):
+    """
+    Orders by the sort field, with nulls last, then by primary key so the order is unique. Reversed to page backwards.
+    """
+    field_name = sort_field.lstrip("-")
+    descending = sort_field.startswith("-")
+
+    if backwards:
+        sort_key = F(field_name)
+        sort_key = (
+            sort_key.asc(nulls_first=True)
+            if descending
+            else sort_key.desc(nulls_first=True)
+        )
+        return [sort_key, "-pk"]
+
+    sort_key = F(field_name)
+    sort_key = (
+        sort_key.desc(nulls_last=True) if descending else sort_key.asc(nulls_last=True)
+    )
+    return [sort_key, "pk"]
+
+
+def _keyset_filter(sort_field: str, cursor_value, cursor_pk, backwards: bool):
+    """
+    Returns a Q filtering for the rows after (or before, if backwards) the cursor row in _keyset_ordering
+    """
+    field_name = sort_field.lstrip("-")
+    descending = sort_field.startswith("-")
+
+    if cursor_value is None:
+        # the cursor row is among the nulls, which come last
+        if backwards:
+            return Q(**{f"{field_name}__isnull": False}) | Q(
+                **{f"{field_name}__isnull": True, "pk__lt": cursor_pk}
+            )
+        return Q(**{f"{field_name}__isnull": True, "pk__gt": cursor_pk})
+
+    if backwards:
+        beyond = "gt" if descending else "lt"
+        return Q(**{f"{field_name}__{beyond}": cursor_value}) | Q(
+            **{field_name: cursor_value, "pk__lt": cursor_pk}
+        )
+
+    beyond = "lt" if descending else "gt"
+    return (
+        Q(**{f"{field_name}__{beyond}": cursor_value})
+        | Q(**{field_name: cursor_value, "pk__gt": cursor_pk})
+        | Q(**{f"{field_name}__isnull": True})
+    )
+
+
+def keyset_page(
+    queryset, sort_field: str, after=None, before=None, page_size=CASE_LIST_PAGE_SIZE
+) -> KeysetPage:
+    """
+    Returns the page of the queryset, ordered by sort_field (prefixed - for descending), following the row with primary
+    key after, or preceding the row with primary key before. Returns the first page if neither is given.
+    Each page is fetched with a single LIMIT query (plus one to look up the sort key of the cursor row), however far
+    into the list it is.
+    """
+    backwards = before is not None
+    cursor_pk = before if backwards else after
+
+    if cursor_pk is not None:
+        cursor_value = (
+            queryset.model.objects.filter(pk=cursor_pk)
+            .values_list(sort_field.lstrip("-"), flat=True)
+            .first()
+        )
+        queryset = queryset.filter(
+            _keyset_filter(
+                sort_field,
+                cursor_value=cursor_value,
+                cursor_pk=cursor_pk,
+                backwards=backwards,
+            )
+        )
+
+    rows = list(
+        queryset.order_by(*_keyset_ordering(sort_field, backwards=backwards))[
+            : page_size + 1
+        ]
+    )
+    more_rows = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(object_list=rows, has_next=True, has_previous=more_rows)
+
+    return KeysetPage(
+        object_list=rows, has_next=more_rows, has_previous=cursor_pk is not None
+    )
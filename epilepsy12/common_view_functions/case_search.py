@@ -0,0 +1,37 @@
+# django imports
+from django.db.models import Q
+
+"""
+Search of the case list.
+Names and Jersey unique reference numbers are matched with icontains (UPPER(field) LIKE UPPER('%term%')), which uses
+the pg_trgm trigram indexes on Case, and NHS numbers by prefix, which uses their pattern index, so searching stays fast
+at national level as cases are added each cohort.
+"""
+
+# NHS numbers are 10 digits - shorter numbers may also be an Epilepsy12 ID
+NHS_NUMBER_LENGTH = 10
+
+
+def search_cases(cases, search_term: str):
+    """
+    Filters a queryset of cases by the term entered in the case list search box.
+    A term of digits only (spaces are ignored) is the start of an NHS number, an Epilepsy12 ID or part of a unique
+    reference number. Any other term is matched against first name, surname and unique reference number.
+    """
+    search_term = search_term.strip()
+    digits = search_term.replace(" ", "")
+
+    if digits.isdigit():
+        # prefix fast path, using the nhs_number pattern index
+        search_filter = Q(nhs_number__startswith=digits) | Q(
+            unique_reference_number__icontains=digits
+        )
+        if len(digits) < NHS_NUMBER_LENGTH:
+            search_filter |= Q(id=int(digits))
+        return cases.filter(search_filter)
+
+    return cases.filter(
+        Q(first_name__icontains=search_term)
+        | Q(surname__icontains=search_term)
+        | Q(unique_reference_number__icontains=search_term)
+    )
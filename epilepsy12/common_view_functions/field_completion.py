@@ -0,0 +1,191 @@
+# python imports
+from dataclasses import dataclass
+
+# django imports
+from django.apps import apps
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import Case, IntegerField, Value, When
+
+# E12 imports
+from epilepsy12.constants import (
+    FIELDS_TO_AVOID_IN_FORM_CALCULATION,
+    ARRAY_FIELDS_IN_FORM_CALCULATION,
+    FOCAL_ONSET_FIELDS,
+    FOCAL_ONSET_LATERALITY_FIELDS,
+    Registration_minimum_scorable_fields,
+    EpilepsyContext_minimum_scorable_fields,
+    FirstPaediatricAssessment_minimum_scorable_fields,
+    MultiaxialDiagnosis_minimum_scorable_fields,
+    Episode_minimum_scorable_fields,
+    Syndrome_minimum_scorable_fields,
+    Comorbidity_minimum_scorable_fields,
+    Assessment_minimum_scorable_fields,
+    Investigations_minimum_scorable_fields,
+    Management_minimum_scorable_fields,
+    AntiEpilepsyMedicine_minimum_scorable_fields,
+)
+
+"""
+Field completion registry.
+The fields counted by `completed_fields` for each audit model are worked out once, when the app loads
+(see Epilepsy12Config.ready), rather than by walking _meta on every HTMX field update.
+"""
+
+MINIMUM_SCORABLE_FIELDS = [
+    Registration_minimum_scorable_fields,
+    EpilepsyContext_minimum_scorable_fields,
+    FirstPaediatricAssessment_minimum_scorable_fields,
+    MultiaxialDiagnosis_minimum_scorable_fields,
+    Episode_minimum_scorable_fields,
+    Syndrome_minimum_scorable_fields,
+    Comorbidity_minimum_scorable_fields,
+    Assessment_minimum_scorable_fields,
+    Investigations_minimum_scorable_fields,
+    Management_minimum_scorable_fields,
+    AntiEpilepsyMedicine_minimum_scorable_fields,
+]
+
+FIELD_COMPLETION_REGISTRY = {}
+
+
+@dataclass(frozen=True)
+class FieldCompletionRules:
+    """
+    The fields of a model counted towards form completion:
+    - value_fields are completed if they are not None (foreign keys are tested on their id column)
+    - array_fields are completed if at least one item has been selected
+    - true_only_fields are completed if they are True (the focal onset laterality radio buttons)
+    All other fields - those to avoid and the unscored focal onset checkboxes - are never counted.
+    """
+
+    model_name: str
+    avoid_fields: frozenset
+    value_fields: tuple
+    array_fields: tuple
+    true_only_fields: tuple
+    minimum_scorable_fields: int | None
+
+    def completed_fields(self, model_instance) -> int:
+        """
+        Returns the number of completed fields of a model instance.
+        """
+        counter = sum(
+            getattr(model_instance, attname) is not None
+            for _, attname in self.value_fields
+        )
+        counter += sum(
+            len(getattr(model_instance, name) or []) > 0 for name in self.array_fields
+        )
+        counter += sum(
+            getattr(model_instance, name) == True for name in self.true_only_fields
+        )
+        return counter
+
+    def completed_fields_expression(self):
+        """
+        Returns a database expression evaluating to the number of completed fields of each row.
+        """
+        expressions = [
+            Case(
+                When(**{f"{name}__isnull": False}, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for name, _ in self.value_fields
+        ]
+        expressions += [
+            Case(
+                When(**{f"{name}__len__gt": 0}, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for name in self.array_fields
+        ]
+        expressions += [
+            Case(
+                When(**{name: True}, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for name in self.true_only_fields
+        ]
+        return sum(expressions, Value(0, output_field=IntegerField()))
+
+
+def build_field_completion_rules(model_class) -> FieldCompletionRules:
+    """
+    Works out which fields of a model are counted towards form completion.
+    Only concrete fields are counted: reverse relations (eg related_name managers) are never scoreable.
+    """
+    model_name = model_class.__name__
+    avoid_fields = FIELDS_TO_AVOID_IN_FORM_CALCULATION[model_name]
+
+    value_fields = []
+    array_fields = []
+    true_only_fields = []
+
+    for field in model_class._meta.concrete_fields:
+        if field.name in avoid_fields:
+            continue
+        if field.name in FOCAL_ONSET_FIELDS:
+            if field.name in FOCAL_ONSET_LATERALITY_FIELDS:
+                true_only_fields.append(field.name)
+        elif field.name in ARRAY_FIELDS_IN_FORM_CALCULATION and isinstance(
+            field, ArrayField
+        ):
+            array_fields.append(field.name)
+        else:
+            value_fields.append((field.name, field.attname))
+
+    minimum_scorable_fields = None
+    for scorable_fields in MINIMUM_SCORABLE_FIELDS:
+        if scorable_fields.model_name == model_name:
+            minimum_scorable_fields = len(scorable_fields.all_fields)
+
+    return FieldCompletionRules(
+        model_name=model_name,
+        avoid_fields=avoid_fields,
+        value_fields=tuple(value_fields),
+        array_fields=tuple(array_fields),
+        true_only_fields=tuple(true_only_fields),
+        minimum_scorable_fields=minimum_scorable_fields,
+    )
+
+
+def build_field_completion_registry():
+    """
+    Builds the rules for every model scored in form calculations. Called once when the app is ready.
+    """
+    for model_name in FIELDS_TO_AVOID_IN_FORM_CALCULATION:
+        FIELD_COMPLETION_REGISTRY[model_name] = build_field_completion_rules(
+            apps.get_model("epilepsy12", model_name)
+        )
+
+
+def get_field_completion_rules(model_class_name: str) -> FieldCompletionRules:
+    """
+    Returns the field completion rules for a model class name.
+    """
+    if not FIELD_COMPLETION_REGISTRY:
+        build_field_completion_registry()
+
+    try:
+        return FIELD_COMPLETION_REGISTRY[model_class_name]
+    except KeyError:
+        raise ValueError(
+            f"Form scoring error: {model_class_name} not found to return fields to avoid in form calculation."
+        )
+
+
+def completed_fields_bulk(queryset) -> dict:
+    """
+    Counts the completed fields of every row in a queryset in a single query.
+    Returns a dict of primary key to number of completed fields - the same numbers completed_fields returns for each instance.
+    """
+    rules = get_field_completion_rules(queryset.model.__name__)
+
+    return dict(
+        queryset.annotate(
+            number_of_completed_fields=rules.completed_fields_expression()
+        ).values_list("pk", "number_of_completed_fields")
+    )
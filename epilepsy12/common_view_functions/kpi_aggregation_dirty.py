@@ -0,0 +1,126 @@
+# python imports
+from datetime import date
+import logging
+
+# django imports
+from django.apps import apps
+
+# E12 imports
+from epilepsy12.constants import EnumAbstractionLevel
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+"""
+Dirty tracking for KPIAggregation models.
+Each time a child's KPI scores change, every KPIAggregation bucket their organisation contributes to is marked dirty,
+so that update_dirty_kpi_agg_models only rebuilds those rows rather than all abstraction levels for the whole country.
+"""
+
+
+def mark_kpi_aggregations_dirty(organisation_ids, cohort: int) -> None:
+    """
+    Marks the organisation, trust, local health board, ICB, NHS England region, OPEN UK network, country and national
+    KPIAggregation buckets for the given organisations and cohort as needing recalculation.
+    Uses a single query to look up the abstraction codes and a single insert for the marks.
+    """
+    if cohort is None:
+        # registration not yet complete - the child cannot be in any aggregation
+        return
+
+    organisation_ids = [pk for pk in organisation_ids if pk is not None]
+    if not organisation_ids:
+        return
+
+    Organisation = apps.get_model("epilepsy12", "Organisation")
+    DirtyKPIAggregation = apps.get_model("epilepsy12", "DirtyKPIAggregation")
+
+    abstraction_levels = [
+        abstraction_level
+        for abstraction_level in EnumAbstractionLevel
+        if abstraction_level is not EnumAbstractionLevel.NATIONAL
+    ]
+
+    dirty_buckets = [
+        DirtyKPIAggregation(
+            cohort=cohort,
+            abstraction_level=EnumAbstractionLevel.NATIONAL.name,
+            abstraction_code="",
+        )
+    ]
+
+    for abstraction_codes in Organisation.objects.filter(
+        pk__in=organisation_ids
+    ).values(*[abstraction_level.value for abstraction_level in abstraction_levels]):
+        for abstraction_level in abstraction_levels:
+            abstraction_code = abstraction_codes[abstraction_level.value]
+            if abstraction_code is None:
+                # eg Welsh organisations have no ICB, English organisations have no local health board
+                continue
+            dirty_buckets.append(
+                DirtyKPIAggregation(
+                    cohort=cohort,
+                    abstraction_level=abstraction_level.name,
+                    abstraction_code=abstraction_code,
+                )
+            )
+
+    # buckets that are already dirty have their marked_at refreshed, so a rebuild already in progress does not clear them
+    DirtyKPIAggregation.objects.bulk_create(
+        dirty_buckets,
+        update_conflicts=True,
+        unique_fields=["cohort", "abstraction_level", "abstraction_code"],
+        update_fields=["marked_at"],
+    )
+
+
+def mark_kpi_aggregations_dirty_for_newly_completed_registrations(
+    cohort: int, since: date
+) -> None:
+    """
+    Children only join the aggregations once they have completed a full year of care, which happens with the passage
+    of time rather than on a field update. This marks the buckets of any child in the cohort who has completed their first year
+    of care since the given date.
+    """
+    KPI = apps.get_model("epilepsy12", "KPI")
+
+    organisation_ids = (
+        KPI.objects.filter(
+            registration__cohort=cohort,
+            registration__completed_first_year_of_care_date__gte=since,
+            registration__completed_first_year_of_care_date__lte=date.today(),
+        )
+        .values_list("organisation", flat=True)
+        .distinct()
+    )
+
+    mark_kpi_aggregations_dirty(organisation_ids=list(organisation_ids), cohort=cohort)
+
+
+def get_dirty_kpi_aggregation_buckets(cohort: int) -> dict:
+    """
+    Returns the currently dirty buckets for the cohort, grouped by level of abstraction
+    {EnumAbstractionLevel: [abstraction codes]}
+    """
+    DirtyKPIAggregation = apps.get_model("epilepsy12", "DirtyKPIAggregation")
+
+    dirty_buckets = {}
+    for abstraction_level_name, abstraction_code in DirtyKPIAggregation.objects.filter(
+        cohort=cohort
+    ).values_list("abstraction_level", "abstraction_code"):
+        dirty_buckets.setdefault(
+            EnumAbstractionLevel[abstraction_level_name], []
+        ).append(abstraction_code)
+
+    return dirty_buckets
+
+
+def clear_dirty_kpi_aggregation_buckets(cohort: int, marked_before) -> None:
+    """
+    Removes the marks for buckets that have been rebuilt.
+    Only marks made before the rebuild started are removed - anything marked while it was running is kept for the next run.
+    """
+    DirtyKPIAggregation = apps.get_model("epilepsy12", "DirtyKPIAggregation")
+    DirtyKPIAggregation.objects.filter(
+        cohort=cohort, marked_at__lte=marked_before
+    ).delete()
@@ -0,0 +1,167 @@
+# python imports
+import logging
+from datetime import timedelta
+
+# django imports
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+# E12 imports
+from .aggregate_by import update_all_kpi_agg_models, update_dirty_kpi_agg_models
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+"""
+Database-backed queue for KPI aggregations.
+The web tier enqueues KPIAggregationJob records and the worker (manage.py run_kpi_aggregation_worker)
+claims them and runs the aggregations outside of the request/response cycle.
+"""
+
+
+def enqueue_kpi_aggregation(cohort: int, open_access=False, requested_by=None):
+    """
+    Requests a rerun of the KPI aggregations for the given cohort.
+    If a request for the same cohort and access level is already waiting in the queue, that job is returned
+    rather than creating a new one, so repeated page loads do not pile up identical work for the worker.
+    Only one job per cohort and access level can be queued (unique_queued_kpi_aggregation_job), so concurrent
+    requests cannot each queue one.
+
+    Returns the KPIAggregationJob the caller can poll for status.
+    """
+    KPIAggregationJob = apps.get_model("epilepsy12", "KPIAggregationJob")
+
+    def get_or_create_queued_job():
+        return KPIAggregationJob.objects.get_or_create(
+            cohort=cohort,
+            open_access=open_access,
+            status=KPIAggregationJob.QUEUED,
+            defaults={"requested_by": requested_by},
+        )
+
+    try:
+        job, created = get_or_create_queued_job()
+    except IntegrityError:
+        # another request queued the job, and the worker claimed it before it could be read - queue a new one
+        job, created = get_or_create_queued_job()
+
+    if created:
+        logger.debug(f"Queued {job}")
+    else:
+        logger.debug(f"Coalesced aggregation request into {job}")
+    return job
+
+
+# a job still running after this long belongs to a worker which died mid aggregation
+STALE_JOB_TIMEOUT = timedelta(hours=1)
+
+
+def fail_stale_kpi_aggregation_jobs() -> int:
+    """
+    Marks jobs which have been running for longer than STALE_JOB_TIMEOUT as failed, so their status stops being
+    polled and later requests queue a fresh aggregation.
+    Returns the number of jobs marked failed.
+    """
+    KPIAggregationJob = apps.get_model("epilepsy12", "KPIAggregationJob")
+
+    stale_jobs = KPIAggregationJob.objects.filter(
+        status=KPIAggregationJob.RUNNING,
+        started_at__lt=timezone.now() - STALE_JOB_TIMEOUT,
+    ).update(
+        status=KPIAggregationJob.FAILED,
+        completed_at=timezone.now(),
+        error=f"Still running after {STALE_JOB_TIMEOUT} - the worker is assumed to have stopped.",
+    )
+    if stale_jobs:
+        logger.warning(f"Marked {stale_jobs} stale KPI aggregation job(s) as failed")
+    return stale_jobs
+
+
+def claim_next_kpi_aggregation_job():
+    """
+    Claims the oldest queued job, skipping any rows locked by another worker. Stale running jobs are failed first.
+    Requests for the same cohort and access level were coalesced into this job when they were queued.
+    Returns a list of the claimed job ids, or an empty list if the queue is empty.
+    """
+    KPIAggregationJob = apps.get_model("epilepsy12", "KPIAggregationJob")
+
+    fail_stale_kpi_aggregation_jobs()
+
+    with transaction.atomic():
+        job = (
+            KPIAggregationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=KPIAggregationJob.QUEUED)
+            .order_by("requested_at")
+            .first()
+        )
+        if job is None:
+            return []
+
+        KPIAggregationJob.objects.filter(pk=job.pk).update(
+            status=KPIAggregationJob.RUNNING, started_at=timezone.now()
+        )
+
+    return [job.pk]
+
+
+def run_kpi_aggregation_job(claimed_job_ids: list[int]) -> bool:
+    """
+    Runs the aggregations for a list of claimed job ids (as returned by claim_next_kpi_aggregation_job)
+    and records the outcome against all of them.
+    Publications rebuild every KPIAggregation model. Private aggregations only rebuild the KPIAggregation rows
+    marked dirty since the last successful private aggregation for the cohort.
+    Returns True if the aggregations completed successfully.
+    """
+    KPIAggregationJob = apps.get_model("epilepsy12", "KPIAggregationJob")
+
+    job = KPIAggregationJob.objects.get(pk=claimed_job_ids[0])
+    claimed_jobs = KPIAggregationJob.objects.filter(pk__in=claimed_job_ids)
+
+    try:
+        if job.open_access:
+            update_all_kpi_agg_models(cohort=job.cohort, open_access=True)
+        else:
+            last_completed_job = (
+                KPIAggregationJob.objects.filter(
+                    cohort=job.cohort,
+                    open_access=False,
+                    status=KPIAggregationJob.COMPLETE,
+                )
+                .order_by("-started_at")
+                .first()
+            )
+            update_dirty_kpi_agg_models(
+                cohort=job.cohort,
+                since=(
+                    timezone.localdate(last_completed_job.started_at)
+                    if last_completed_job
+                    else None
+                ),
+            )
+    except Exception as error:
+        logger.exception(f"KPI aggregation failed for {job}: {error}")
+        claimed_jobs.update(
+            status=KPIAggregationJob.FAILED,
+            completed_at=timezone.now(),
+            error=str(error),
+        )
+        return False
+
+    claimed_jobs.update(status=KPIAggregationJob.COMPLETE, completed_at=timezone.now())
+    logger.info(
+        f"KPI aggregation complete for cohort {job.cohort} (open_access={job.open_access})"
+    )
+    return True
+
+
+def process_next_kpi_aggregation_job():
+    """
+    Claims and runs the next job in the queue.
+    Returns False if there was nothing to do.
+    """
+    claimed_job_ids = claim_next_kpi_aggregation_job()
+    if not claimed_job_ids:
+        return False
+    run_kpi_aggregation_job(claimed_job_ids)
+    return True
@@ -1,11 +1,14 @@
 # python imports
 from datetime import date
-import json
 import logging
+import time
 
 # django imports
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.urls import reverse
 
 # third party imports
 import pandas as pd
@@ -23,10 +26,16 @@ from ..constants import (
     RCPCH_LIGHT_BLUE_DARK_TINT,
     EnumAbstractionLevel,
 )
-from .tiles_for_region import return_tile_for_region
+from .tiles_for_region import tile_name_for_region, get_boundary_tile
 
 logger = logging.getLogger(__name__)
 
+# the case counts of each cohort are versioned separately, so a change to one registration only evicts its own cohort
+CASE_COUNT_MAP_CACHE_VERSION_KEY = "case_count_map_version:{cohort}"
+
+# changes that are not saved through the ORM (eg queryset updates of sites) are picked up after this many seconds
+CASE_COUNT_MAP_CACHE_TIMEOUT = 60 * 10
+
 
 def generate_case_count_choropleth_map(
     properties, organisation, abstraction_level, cohort
@@ -41,10 +50,8 @@ def generate_case_count_choropleth_map(
         abstraction_level=abstraction_level, organisation=organisation
     )
 
-    geojson_data = json.loads(region_tile)
-    features = geojson_data["features"]
-    abstraction_level_ids = [feature["properties"][properties] for feature in features]
-    abstraction_level_names = [feature["properties"]["name"] for feature in features]
+    # the browser fetches the boundaries from the tile url (revalidating with the tile etag)
+    geojson_data = reverse("boundary_tile", kwargs={"tile_name": region_tile.name})
     custom_colorscale = [
         [0, RCPCH_LIGHT_BLUE_TINT3],  # Very light blue
         [0.25, RCPCH_LIGHT_BLUE_TINT2],  # Light blue
@@ -61,13 +68,13 @@ def generate_case_count_choropleth_map(
     fig = go.Figure(
         go.Choroplethmapbox(
             geojson=geojson_data,
-            locations=abstraction_level_ids,
+            locations=dataframe["identifier"],
             featureidkey=f"properties.{properties}",
             z=dataframe["cases"],
             colorscale=custom_colorscale,
             marker_line_width=1,  # Set the width of the boundaries
             marker_line_color=RCPCH_LIGHT_BLUE,  # Set the color of the boundaries
-            customdata=abstraction_level_names,
+            customdata=dataframe["name"],
             hovertemplate="<b>%{customdata}</b><br>cases: %{z}<extra></extra>",  # Custom hovertemplate
         )
     )
@@ -158,28 +165,30 @@ def generate_case_counts_for_each_region_in_each_abstraction_level(
 ):
     """
     Returns a dataframe of all case counts, for a given cohort, in all members of a given abstraction_level.
-    The member of the level of abstraction where the organisation is a child is flagged in the result
+    The cases are counted in a single query grouped by member. The counts are cached for the day, per cohort and
+    level of abstraction, until a registration in the cohort changes eligibility, completion or lead site (see
+    invalidate_case_count_maps).
     """
 
-    Case = apps.get_model("epilepsy12", "Case")
-    Organisation = apps.get_model("epilepsy12", "Organisation")
+    cache_key = case_count_map_cache_key(
+        abstraction_level=abstraction_level, cohort=cohort
+    )
+    df = cache.get(cache_key)
+    if df is not None:
+        return df.copy()
 
-    # Create a new DataFrame to store the results
-    df = pd.DataFrame(columns=["identifier", "name", "cases"])
+    Case = apps.get_model("epilepsy12", "Case")
 
     level_abstraction_members, identifier = all_level_of_abstraction_members(
         abstraction_level=abstraction_level
     )
+    # the abstraction level values are paths from Organisation, eg trust__ods_code
+    organisation_relation = abstraction_level.value.split("__")[0]
+    case_identifier = f"site__organisation__{organisation_relation}__{identifier}"
 
-    for member in level_abstraction_members:
-        list_of_organisations_within_member = (
-            all_organisations_within_a_level_of_abstraction(
-                abstraction_level=abstraction_level, abstraction_level_member=member
-            )
-        )
-        # Get all cases for the organisation
-        all_registered_completed_cases = Case.objects.filter(
-            site__organisation__in=list_of_organisations_within_member,
+    # Count all registered, completed cases in each member
+    case_counts = dict(
+        Case.objects.filter(
             site__site_is_actively_involved_in_epilepsy_care=True,
             site__site_is_primary_centre_of_epilepsy_care=True,
             registration__cohort=cohort,
@@ -191,26 +200,57 @@ def generate_case_counts_for_each_region_in_each_abstraction_level(
             registration__audit_progress__multiaxial_diagnosis_complete=True,
             registration__audit_progress__investigations_complete=True,
             registration__audit_progress__management_complete=True,
-        ).count()
-
-        # Append a new row to the DataFrame
-        df = pd.concat(
-            [
-                df,
-                pd.DataFrame(
-                    [
-                        {
-                            "identifier": getattr(member, identifier),
-                            "name": getattr(member, "name"),
-                            "cases": all_registered_completed_cases,
-                        }
-                    ]
-                ),
-            ],
-            ignore_index=True,
         )
+        .values_list(case_identifier)
+        .annotate(cases=Count("pk", distinct=True))
+        .order_by()
+    )
+
+    # Members with no cases are included with a count of 0
+    df = pd.DataFrame.from_records(
+        list(level_abstraction_members.values_list(identifier, "name")),
+        columns=["identifier", "name"],
+    )
+    df["cases"] = df["identifier"].map(case_counts).fillna(0).astype(int)
+
+    cache.set(cache_key, df, timeout=CASE_COUNT_MAP_CACHE_TIMEOUT)
+
+    return df.copy()
 
-    return df
+
+def case_count_map_version(cohort: int) -> int:
+    """
+    Returns the version of the case counts of a cohort, which is changed by invalidate_case_count_maps
+    """
+    # a version started from the current time, so a version which has been evicted is never reused
+    return cache.get_or_set(
+        CASE_COUNT_MAP_CACHE_VERSION_KEY.format(cohort=cohort),
+        time.time_ns,
+        timeout=None,
+    )
+
+
+def case_count_map_cache_key(abstraction_level: EnumAbstractionLevel, cohort: int):
+    """
+    Returns the cache key for the case counts of a cohort in a level of abstraction.
+    The key includes today's date, as cases are only counted once their first year of care is complete.
+    """
+    version = case_count_map_version(cohort)
+    return f"case_count_map:{version}:{date.today().isoformat()}:{cohort}:{abstraction_level.name}"
+
+
+def invalidate_case_count_maps(cohort: int):
+    """
+    Invalidates the cached case counts of a cohort, in all levels of abstraction.
+    Called when a registration in the cohort changes eligibility or completion, or its lead site changes.
+    """
+    if cohort is None:
+        return
+    try:
+        cache.incr(CASE_COUNT_MAP_CACHE_VERSION_KEY.format(cohort=cohort))
+    except ValueError:
+        # the version has not been set (or has been evicted) - the next version read is a new one
+        pass
 
 
 # Helper functions
@@ -286,20 +326,20 @@ def region_tile_for_abstraction_level(
     abstraction_level: EnumAbstractionLevel, organisation
 ):
     """
-    Returns the geojson tile for a given level of abstraction
+    Returns the boundary tile for a given level of abstraction, without loading its geojson
     """
 
     if abstraction_level == EnumAbstractionLevel.TRUST:
-        region_tile = return_tile_for_region("trust")
+        tile_name = tile_name_for_region("trust")
     elif abstraction_level == EnumAbstractionLevel.ICB:
-        region_tile = return_tile_for_region("icb")
+        tile_name = tile_name_for_region("icb")
     elif abstraction_level == EnumAbstractionLevel.LOCAL_HEALTH_BOARD:
-        region_tile = lhb_tiles = return_tile_for_region("lhb")
+        tile_name = tile_name_for_region("lhb")
     elif abstraction_level == EnumAbstractionLevel.NHS_ENGLAND_REGION:
-        region_tile = return_tile_for_region("nhs_england_region")
+        tile_name = tile_name_for_region("nhs_england_region")
     elif abstraction_level == EnumAbstractionLevel.COUNTRY:
-        region_tile = return_tile_for_region("country", organisation)
+        tile_name = tile_name_for_region("country", organisation)
     else:  # pragma: no cover
         raise ValueError("Invalid abstraction level")
 
-    return region_tile
+    return get_boundary_tile(tile_name, with_geojson=False)
@@ -0,0 +1,224 @@
+# python imports
+from datetime import date
+import logging
+import time
+
+# django imports
+from django.core.cache import cache
+
+# E12 imports
+from ..constants import EnumAbstractionLevel
+from .filter_cases_for_geography import (
+    filter_all_registered_cases_by_active_lead_site_and_cohort_and_level_of_abstraction,
+)
+from .scatterplot_from_cases import (
+    generate_dataframe_and_aggregated_distance_data_from_cases,
+    generate_distance_from_organisation_scatterplot_figure,
+)
+from .map_from_shape_file import (
+    generate_case_count_choropleth_map,
+    case_count_map_version,
+)
+from .aggregate_by import cases_demographic_profile
+from .piechart_from_aggregated_data import (
+    piechart_plot_cases_by_ethnicity,
+    piechart_plot_cases_by_index_of_multiple_deprivation,
+    piechart_plot_cases_by_sex,
+    piechart_plot_cases_by_age_range,
+)
+
+logger = logging.getLogger(__name__)
+
+"""
+Plotly figures for the organisation dashboard.
+Each figure is loaded by the dashboard as its own HTMX fragment and its JSON is cached per figure, organisation and
+cohort, with the version of the data it shows: the organisation's cases in the cohort, its cases in all cohorts for the
+demographics, or the cohort's case counts for the heatmaps.
+"""
+
+# the cases shown by the figures of each organisation are versioned per cohort, and for all cohorts (cohort None)
+FIGURE_CACHE_VERSION_KEY = "organisation_figure_version:{organisation_id}:{cohort}"
+
+# changes that are not saved through the ORM (eg queryset updates of sites) are picked up after this many seconds
+FIGURE_CACHE_TIMEOUT = 60 * 10
+
+
+def organisation_cases_map(organisation, cohort):
+    """
+    Returns the scatter map of cases at the organisation, with the aggregated distances they have travelled
+    """
+    cases_to_plot = filter_all_registered_cases_by_active_lead_site_and_cohort_and_level_of_abstraction(
+        organisation=organisation, cohort=cohort
+    )
+
+    aggregated_distances, case_distances_dataframe = (
+        generate_dataframe_and_aggregated_distance_data_from_cases(
+            filtered_cases=cases_to_plot
+        )
+    )
+
+    return {
+        "figure": generate_distance_from_organisation_scatterplot_figure(
+            geo_df=case_distances_dataframe, organisation=organisation
+        ),
+        "aggregated_distances": aggregated_distances,
+    }
+
+
+def case_count_choropleth_map(properties, abstraction_level):
+    """
+    Returns a function building the choropleth map of case counts for a level of abstraction
+    """
+
+    def build_figure(organisation, cohort):
+        return {
+            "figure": generate_case_count_choropleth_map(
+                properties=properties,
+                abstraction_level=abstraction_level,
+                organisation=organisation,
+                cohort=cohort,
+            )
+        }
+
+    return build_figure
+
+
+def demographic_piechart(plot_piechart):
+    """
+    Returns a function building a demographic pie chart. These are of cases in all cohorts.
+    """
+
+    def build_figure(organisation, cohort):
+        return {
+            "figure": plot_piechart(
+                organisation=organisation,
+                demographic_profile=organisation_demographic_profile(organisation),
+            )
+        }
+
+    return build_figure
+
+
+ORGANISATION_FIGURES = {
+    "organisation_cases_map": organisation_cases_map,
+    "country_heatmap": case_count_choropleth_map(
+        properties="boundary_identifier",
+        abstraction_level=EnumAbstractionLevel.COUNTRY,
+    ),
+    "icb_heatmap": case_count_choropleth_map(
+        properties="ods_code", abstraction_level=EnumAbstractionLevel.ICB
+    ),
+    "nhsregion_heatmap": case_count_choropleth_map(
+        properties="region_code",
+        abstraction_level=EnumAbstractionLevel.NHS_ENGLAND_REGION,
+    ),
+    "lhb_heatmap": case_count_choropleth_map(
+        properties="ods_code",
+        abstraction_level=EnumAbstractionLevel.LOCAL_HEALTH_BOARD,
+    ),
+    "ethnicity_piechart": demographic_piechart(piechart_plot_cases_by_ethnicity),
+    "index_of_multiple_deprivation_score_piechart": demographic_piechart(
+        piechart_plot_cases_by_index_of_multiple_deprivation
+    ),
+    "sex_piechart": demographic_piechart(piechart_plot_cases_by_sex),
+    "age_range_piechart": demographic_piechart(piechart_plot_cases_by_age_range),
+}
+
+# figures of the case counts of the cohort in every member of a level of abstraction, not only the organisation's cases
+CASE_COUNT_MAP_FIGURES = {
+    "country_heatmap",
+    "icb_heatmap",
+    "nhsregion_heatmap",
+    "lhb_heatmap",
+}
+
+# figures of the organisation's cases in all cohorts
+DEMOGRAPHIC_FIGURES = {
+    "demographic_profile",
+    "ethnicity_piechart",
+    "index_of_multiple_deprivation_score_piechart",
+    "sex_piechart",
+    "age_range_piechart",
+}
+
+
+def organisation_figure_data_version(
+    figure_type: str, organisation, cohort: int
+) -> int:
+    """
+    Returns the version of the data a figure shows, which is changed by invalidate_organisation_figures, or for the
+    heatmaps by invalidate_case_count_maps
+    """
+    if figure_type in CASE_COUNT_MAP_FIGURES:
+        return case_count_map_version(cohort)
+    if figure_type in DEMOGRAPHIC_FIGURES:
+        cohort = None
+    # a version started from the current time, so a version which has been evicted is never reused
+    return cache.get_or_set(
+        FIGURE_CACHE_VERSION_KEY.format(organisation_id=organisation.pk, cohort=cohort),
+        time.time_ns,
+        timeout=None,
+    )
+
+
+def organisation_figure_cache_key(figure_type: str, organisation, cohort: int):
+    """
+    Returns the cache key for a figure.
+    The key includes today's date, as ages and completed first years of care change from day to day.
+    """
+    version = organisation_figure_data_version(figure_type, organisation, cohort)
+    return f"organisation_figure:{version}:{date.today().isoformat()}:{figure_type}:{organisation.pk}:{cohort}"
+
+
+def organisation_figure(figure_type: str, organisation, cohort: int) -> dict:
+    """
+    Returns the context for a figure on the organisation dashboard: the Plotly figure JSON, and anything shown with it.
+    Raises a KeyError if the figure type does not exist.
+    """
+    build_figure = ORGANISATION_FIGURES[figure_type]
+
+    cache_key = organisation_figure_cache_key(
+        figure_type=figure_type, organisation=organisation, cohort=cohort
+    )
+    figure = cache.get(cache_key)
+    if figure is None:
+        figure = build_figure(organisation=organisation, cohort=cohort)
+        cache.set(cache_key, figure, timeout=FIGURE_CACHE_TIMEOUT)
+
+    return figure
+
+
+def organisation_demographic_profile(organisation) -> dict:
+    """
+    Returns the demographic profile of cases in the organisation (cases_demographic_profile), shared by the dashboard
+    tables and pie charts. Cached with the figures.
+    """
+    cache_key = organisation_figure_cache_key(
+        figure_type="demographic_profile", organisation=organisation, cohort=None
+    )
+    demographic_profile = cache.get(cache_key)
+    if demographic_profile is None:
+        demographic_profile = cases_demographic_profile(
+            selected_organisation=organisation
+        )
+        cache.set(cache_key, demographic_profile, timeout=FIGURE_CACHE_TIMEOUT)
+
+    return demographic_profile
+
+
+def invalidate_organisation_figures(organisation_id: int, cohort: int = None):
+    """
+    Invalidates the cached figures of the cases of an organisation in a cohort, and in all cohorts.
+    Called when a case with the organisation as lead site changes anything the figures show, when its registration
+    changes, or when the lead site itself changes.
+    """
+    for version_cohort in {None, cohort}:
+        try:
+            cache.incr(
+                FIGURE_CACHE_VERSION_KEY.format(
+                    organisation_id=organisation_id, cohort=version_cohort
+                )
+            )
+        except ValueError:
+            # the version has not been set (or has been evicted) - the next version read is a new one
+            pass
@@ -3,12 +3,7 @@ import plotly.graph_objects as go
 import plotly.io as pio
 
 # import RCPCH data functions
-from epilepsy12.common_view_functions import (
-    cases_aggregated_by_sex,
-    cases_aggregated_by_ethnicity,
-    cases_aggregated_by_deprivation_score,
-    cases_aggregated_by_age,
-)
+from epilepsy12.common_view_functions import cases_demographic_profile
 
 from ..constants import (
     RCPCH_MID_GREY,
@@ -32,11 +27,16 @@ from ..constants import (
 )
 
 
-def piechart_plot_cases_by_sex(organisation):
+def piechart_plot_cases_by_sex(organisation, demographic_profile=None):
     """
     Function to plot a pie chart of cases in a given organisation aggregated by sex
+    Accepts the organisation's demographic profile (cases_demographic_profile) if it has already been aggregated
     """
-    aggregated_data = cases_aggregated_by_sex(selected_organisation=organisation)
+    if demographic_profile is None:
+        demographic_profile = cases_demographic_profile(
+            selected_organisation=organisation
+        )
+    aggregated_data = demographic_profile["sex"]
 
     # Extract the labels and values
     labels = [item["sex_display"] for item in aggregated_data]
@@ -75,11 +75,16 @@ def piechart_plot_cases_by_sex(organisation):
     return pio.to_json(fig)
 
 
-def piechart_plot_cases_by_age_range(organisation):
+def piechart_plot_cases_by_age_range(organisation, demographic_profile=None):
     """
     Function to plot a pie chart of cases in a given organisation aggregated by age range
+    Accepts the organisation's demographic profile (cases_demographic_profile) if it has already been aggregated
     """
-    aggregated_data = cases_aggregated_by_age(selected_organisation=organisation)
+    if demographic_profile is None:
+        demographic_profile = cases_demographic_profile(
+            selected_organisation=organisation
+        )
+    aggregated_data = demographic_profile["age_range"]
 
     # Extract the labels and values
     labels = [item["age_category_label"] for item in aggregated_data]
@@ -120,11 +125,16 @@ def piechart_plot_cases_by_age_range(organisation):
     return pio.to_json(fig)
 
 
-def piechart_plot_cases_by_ethnicity(organisation):
+def piechart_plot_cases_by_ethnicity(organisation, demographic_profile=None):
     """
     Function to plot a pie chart of cases in a given organisation aggregated by ethnicity
+    Accepts the organisation's demographic profile (cases_demographic_profile) if it has already been aggregated
     """
-    aggregated_data = cases_aggregated_by_ethnicity(selected_organisation=organisation)
+    if demographic_profile is None:
+        demographic_profile = cases_demographic_profile(
+            selected_organisation=organisation
+        )
+    aggregated_data = demographic_profile["ethnicity"]
 
     # Extract the labels and values
     labels = [item["ethnicity_display"] for item in aggregated_data]
@@ -177,13 +187,18 @@ def piechart_plot_cases_by_ethnicity(organisation):
     return pio.to_json(fig)
 
 
-def piechart_plot_cases_by_index_of_multiple_deprivation(organisation):
+def piechart_plot_cases_by_index_of_multiple_deprivation(
+    organisation, demographic_profile=None
+):
     """
     Function to plot a pie chart of cases in a given organisation aggregated by index of multiple deprivation
+    Accepts the organisation's demographic profile (cases_demographic_profile) if it has already been aggregated
     """
-    aggregated_data = cases_aggregated_by_deprivation_score(
-        selected_organisation=organisation
-    )
+    if demographic_profile is None:
+        demographic_profile = cases_demographic_profile(
+            selected_organisation=organisation
+        )
+    aggregated_data = demographic_profile["deprivation"]
 
     # Extract the labels and values
     labels = [
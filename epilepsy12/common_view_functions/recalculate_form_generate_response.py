@@ -3,7 +3,9 @@ from datetime import date
 
 # 3rd Party Imports
 from django_htmx.http import trigger_client_event
+from django.db import transaction
 from django.shortcuts import render
+from django.utils import timezone
 from psycopg2 import DatabaseError
 from epilepsy12.models_folder.audit_progress import AuditProgress
 from epilepsy12.models_folder.episode import Episode
@@ -11,42 +13,37 @@ from epilepsy12.models_folder.syndrome import Syndrome
 from epilepsy12.models_folder.comorbidity import Comorbidity
 from epilepsy12.models_folder.antiepilepsy_medicine import AntiEpilepsyMedicine
 from epilepsy12.models_folder.epilepsy12_site import Site
+from epilepsy12.models_folder.pending_audit_progress_update import (
+    PendingAuditProgressUpdate,
+)
 
 # E12 imports
 from .calculate_kpis import calculate_kpis
-from epilepsy12.constants import (
-    Registration_minimum_scorable_fields,
-    EpilepsyContext_minimum_scorable_fields,
-    FirstPaediatricAssessment_minimum_scorable_fields,
-    MultiaxialDiagnosis_minimum_scorable_fields,
-    Episode_minimum_scorable_fields,
-    Syndrome_minimum_scorable_fields,
-    Comorbidity_minimum_scorable_fields,
-    Assessment_minimum_scorable_fields,
-    Investigations_minimum_scorable_fields,
-    Management_minimum_scorable_fields,
-    AntiEpilepsyMedicine_minimum_scorable_fields,
-)
+from .field_completion import get_field_completion_rules, completed_fields_bulk
+from .map_from_shape_file import invalidate_case_count_maps
 
 
 def recalculate_form_generate_response(
     model_instance, request, context, template, error_message=None
 ):
     """
-    calculates form scores, creates response object and attaches htmx trigger to refresh steps widget
+    queues recalculation of form scores, creates response object and attaches htmx trigger to refresh steps widget
     Params:
     request
     model instance
     context
     template name
     error message - if not supplied an empty string is attached
+
+    Form scores and KPIs are recalculated by manage.py run_audit_progress_worker after the response is sent - the steps
+    widget polls until the update has been applied.
     """
 
     # add errors to context
     context.update({"error_message": error_message})
 
-    # calculate totals on form
-    update_audit_progress(model_instance)
+    # calculate totals on form once the user stops editing it
+    queue_audit_progress_update(model_instance)
 
     response = render(request=request, template_name=template, context=context)
 
@@ -57,11 +54,46 @@ def recalculate_form_generate_response(
     return response
 
 
-def update_audit_progress(model_instance):
+def queue_audit_progress_update(model_instance):
+    """
+    Marks the form the model instance belongs to as needing update_audit_progress, once the current transaction commits.
+    Repeated calls for the same form before the worker runs are coalesced into a single recalculation.
+    """
+
+    form = model_instance._meta.verbose_name.lower().replace(" ", "_")
+
+    # all models are related to registration, except registration itself
+    if form == "registration":
+        registration_id = model_instance.pk
+    else:
+        registration_id = model_instance.registration_id
+
+    def write_pending_update():
+        # an existing mark has requested_at refreshed, which pushes back its recalculation until editing stops
+        # and, if a worker is recalculating it, releases it so the edit is recalculated again afterwards
+        PendingAuditProgressUpdate.objects.bulk_create(
+            [
+                PendingAuditProgressUpdate(
+                    registration_id=registration_id,
+                    form=form,
+                    requested_at=timezone.now(),
+                    claimed_at=None,
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["registration", "form"],
+            update_fields=["requested_at", "claimed_at"],
+        )
+
+    transaction.on_commit(write_pending_update)
+
+
+def update_audit_progress(model_instance, update_kpis=True):
     """
     Calculates all completed fields and compares expected fields
     Stores these values in AuditProgress
     Accepts model instance as parameter - uses this select correct fields to update
+    If update_kpis is False, the caller is responsible for calling calculate_kpis for the registration
     """
 
     # use the model instance to identify its verbose name to match the relevant field in the AuditProgress model
@@ -88,71 +120,36 @@ def update_audit_progress(model_instance):
         registration = model_instance.registration
 
     # update KPIs
-    calculate_kpis(registration_instance=registration)
+    if update_kpis:
+        calculate_kpis(registration_instance=registration)
 
+    complete_field = f"{verbose_name_underscored}_complete"
+    audit_progress = AuditProgress.objects.filter(registration=registration)
     try:
-        AuditProgress.objects.filter(registration=registration).update(**update_fields)
+        # updated first only if the form's completion changes, which is all the case counts on the maps depend on
+        completion_changed = audit_progress.exclude(
+            **{complete_field: update_fields[complete_field]}
+        ).update(**update_fields)
+        if not completion_changed:
+            audit_progress.update(**update_fields)
     except DatabaseError as error:
         raise Exception(error)
 
+    if completion_changed:
+        # the heatmaps are keyed on the case counts, so are invalidated with them
+        invalidate_case_count_maps(registration.cohort)
+
 
 # --8<-- [start:completed_fields]
 def completed_fields(model_instance):
     """
     Test for all completed fields
     Returns an integer number of completed fields for a given model instance.
+    The fields counted for each model are looked up in the field completion registry, built once at app startup.
     """
-    fields = model_instance._meta.get_fields()
-    counter = 0
-    fields_to_avoid = avoid_fields(model_instance)
-
-    for field in fields:
-        if field.name not in fields_to_avoid:
-            if getattr(model_instance, field.name, ()) is not None:
-                if (
-                    field.name == "epilepsy_cause_categories"
-                    # or field.name == "description"
-                    or field.name == "mental_health_issues"
-                ):
-                    if len(getattr(model_instance, field.name)) > 0:
-                        counter += 1
-                else:
-                    if field.name in [
-                        "focal_onset_atonic",
-                        "focal_onset_clonic",
-                        "focal_onset_epileptic_spasms",
-                        "focal_onset_hyperkinetic",
-                        "focal_onset_myoclonic",
-                        "focal_onset_tonic",
-                        "focal_onset_focal_to_bilateral_tonic_clonic",
-                        "focal_onset_automatisms",
-                        "focal_onset_impaired_awareness",
-                        "focal_onset_gelastic",
-                        "focal_onset_autonomic",
-                        "focal_onset_behavioural_arrest",
-                        "focal_onset_cognitive",
-                        "focal_onset_emotional",
-                        "focal_onset_sensory",
-                        "focal_onset_centrotemporal",
-                        "focal_onset_temporal",
-                        "focal_onset_frontal",
-                        "focal_onset_parietal",
-                        "focal_onset_occipital",
-                        "focal_onset_right",
-                        "focal_onset_left",
-                        "focal_onset_laterality_unknown",
-                    ]:
-                        if getattr(model_instance, field.name, ()) == True:
-                            # only count the true values in the radio buttons in focal epilepsy to do with focality
-                            if field.name in [
-                                "focal_onset_right",
-                                "focal_onset_left",
-                                "focal_onset_laterality_unknown",
-                            ]:
-                                counter += 1
-                    else:
-                        counter += 1
-    return counter
+    return get_field_completion_rules(
+        model_instance.__class__.__name__
+    ).completed_fields(model_instance)
 
 
 # --8<-- [end:completed_fields]
@@ -333,160 +330,32 @@ def total_fields_expected(model_instance):
     return cumulative_score
 
 
-# TODO: should replace with dataclass constant
 def avoid_fields(model_instance):
     """
     When looping through fields and counting them as complete/incomplete, these fields depending on the model
     should be avoided
     """
-    # verbose_name_underscored = model_instance._meta.verbose_name.lower().replace(' ', '_')
-    model_class_name = model_instance.__class__.__name__
-
-    META_VARIABLES = [
-        "id",
-        "updated_at",
-        "updated_by",
-        "created_at",
-        "created_by",
-    ]
-
-    if model_class_name in [
-        "FirstPaediatricAssessment",
-        "EpilepsyContext",
-        "Investigations",
-    ]:
-        return META_VARIABLES + ["registration"]
-
-    elif model_class_name == "Assessment":
-        return META_VARIABLES + [
-            "registration",
-            "childrens_epilepsy_surgical_service_input_date",
-            # "consultant_paediatrician_input_date",
-            # "paediatric_neurologist_input_date",
-            # "epilepsy_specialist_nurse_input_date",
-        ]
-
-    elif model_class_name == "MultiaxialDiagnosis":
-        return META_VARIABLES + [
-            "registration",
-            "multiaxial_diagnosis",
-            "episodes",
-            "syndromes",
-            "comorbidities",
-            "epilepsy_cause",  # Nolonger scored - issue #1125
-        ]
-
-    elif model_class_name == "Management":
-        return META_VARIABLES + ["registration", "antiepilepsymedicine"]
-
-    elif model_class_name in ["Syndrome", "Comorbidity", "Comorbidity"]:
-        return META_VARIABLES + ["multiaxial_diagnosis"]
-
-    elif model_class_name == "Episode":
-        return META_VARIABLES + [
-            "multiaxial_diagnosis",
-            "description_keywords",
-            "description",  # Nolonger scored -  issue #1015
-            "expected_score",
-            "calculated_score",
-        ]
-
-    elif model_class_name == "AntiEpilepsyMedicine":
-        return META_VARIABLES + [
-            "management",
-            "is_rescue_medicine",
-            "antiepilepsy_medicine_stop_date",
-            "is_a_pregnancy_prevention_programme_needed",
-        ]
-
-    elif model_class_name == "Registration":
-        return META_VARIABLES + [
-            "management",
-            "assessment",
-            "investigations",
-            "multiaxialdiagnosis",
-            "registration",
-            "epilepsycontext",
-            "firstpaediatricassessment",
-            "completed_first_year_of_care_date",
-            "audit_submission_date",
-            "cohort",
-            "case",
-            "audit_progress",
-            "kpi",
-        ]
-
-    elif model_class_name == "Medicine":
-        return [
-            "id",
-            "conceptId",
-            "term",
-            "preferredTerm",
-            "description",
-            "snomed_ct_edition",
-            "snomed_ct_version",
-            "icd_code",
-            "cd_version",
-            "dsm_code",
-            "dsm_version",
-            "is_rescue",
-            "history",
-        ]
-
-    else:
-        raise ValueError(
-            f"Form scoring error: {model_class_name} not found to return fields to avoid in form calculation."
-        )
+    return get_field_completion_rules(model_instance.__class__.__name__).avoid_fields
 
 
 def scoreable_fields_for_model_class_name(model_class_name):
     """
     Returns the minimum number of scoreable fields based on the model instance at the time
     """
+    try:
+        minimum_scorable_fields = get_field_completion_rules(
+            model_class_name
+        ).minimum_scorable_fields
+    except ValueError:
+        minimum_scorable_fields = None
 
-    if model_class_name == EpilepsyContext_minimum_scorable_fields.model_name:
-        return len(EpilepsyContext_minimum_scorable_fields.all_fields)
-
-    elif (
-        model_class_name == FirstPaediatricAssessment_minimum_scorable_fields.model_name
-    ):
-        return len(FirstPaediatricAssessment_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == MultiaxialDiagnosis_minimum_scorable_fields.model_name:
-        # minimum fields in multiaxial_diagnosis include:
-        # at least one episode that is epileptic fully completed
-        return len(MultiaxialDiagnosis_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Episode_minimum_scorable_fields.model_name:
-        # returns minimum number of fields that could be scored for an epileptic episode
-        return len(Episode_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Syndrome_minimum_scorable_fields.model_name:
-        return len(Syndrome_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Comorbidity_minimum_scorable_fields.model_name:
-        return len(Comorbidity_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Assessment_minimum_scorable_fields.model_name:
-        return len(Assessment_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Investigations_minimum_scorable_fields.model_name:
-        return len(Investigations_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Management_minimum_scorable_fields.model_name:
-        return len(Management_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == AntiEpilepsyMedicine_minimum_scorable_fields.model_name:
-        return len(AntiEpilepsyMedicine_minimum_scorable_fields.all_fields)
-
-    elif model_class_name == Registration_minimum_scorable_fields.model_name:
-        return len(Registration_minimum_scorable_fields.all_fields)
-
-    else:
+    if minimum_scorable_fields is None:
         raise ValueError(
             f"Form scoring error: {model_class_name} does not exist to calculate minimum number of scoreable fields."
         )
 
+    return minimum_scorable_fields
+
 
 # TODO: need to come back and write more tests with multiple cases for this as fn does multiple things. So far, have 1 test case: a fully completed Focal Onset seizure `test_count_episode_fields`
 def count_episode_fields(all_episodes):
@@ -498,20 +367,27 @@ def count_episode_fields(all_episodes):
     at_least_one_episode_is_epileptic = False
     epilepsy_status_known = 0
 
-    if all_episodes.count() == 0:
+    all_episodes = list(all_episodes)
+
+    if len(all_episodes) == 0:
         # no episodes so far
         return scoreable_fields_for_model_class_name("Episode")
 
+    changed_episodes = []
     for episode in all_episodes:
         result = expected_score_for_single_episode(episode=episode)
         cumulative_score += result["cumulative_score"]
         # store the total expected in the instance
-        episode.expected_score = result["cumulative_score"]
-        episode.save()
+        if episode.expected_score != result["cumulative_score"]:
+            episode.expected_score = result["cumulative_score"]
+            changed_episodes.append(episode)
         epilepsy_status_known += result["epilepsy_status_known"]
         if result["is_epilepsy"]:
             at_least_one_episode_is_epileptic = True
 
+    # a derived score, not a clinician edit - written in one query and not recorded in the episode history
+    Episode.objects.bulk_update(changed_episodes, ["expected_score"])
+
     # scoreable_fields_for_model_class_name('Episode')
     if at_least_one_episode_is_epileptic:
         # at least one episode is epileptic or no episodes are as yet unscored
@@ -606,24 +482,30 @@ def number_of_completed_fields_in_related_models(model_instance):
     if model_instance.__class__.__name__ == "MultiaxialDiagnosis":
         # also need to count associated records in Episode, Syndrome and Comorbidity
         episodes = Episode.objects.filter(multiaxial_diagnosis=model_instance).all()
-        syndromes = Syndrome.objects.filter(multiaxial_diagnosis=model_instance).all()
-        comorbidities = Comorbidity.objects.filter(
-            multiaxial_diagnosis=model_instance
-        ).all()
 
-        if episodes.count() > 0:
-            for episode in episodes:
-                calculated_score = completed_fields(episode)
-                # save the episode calculated score in the model instance
+        changed_episodes = []
+        for episode in episodes:
+            calculated_score = completed_fields(episode)
+            # store the episode calculated score in the model instance
+            if episode.calculated_score != calculated_score:
                 episode.calculated_score = calculated_score
-                episode.save()
-                cumulative_score += calculated_score
-        if syndromes.count() > 0:
-            for syndrome in syndromes:
-                cumulative_score += completed_fields(syndrome)
-        if comorbidities.count() > 0:
-            for comorbidity in comorbidities:
-                cumulative_score += completed_fields(comorbidity)
+                changed_episodes.append(episode)
+            cumulative_score += calculated_score
+
+        # a derived score, not a clinician edit - written in one query and not recorded in the episode history
+        Episode.objects.bulk_update(changed_episodes, ["calculated_score"])
+
+        # syndromes and comorbidities are counted in the database, in one query each
+        cumulative_score += sum(
+            completed_fields_bulk(
+                Syndrome.objects.filter(multiaxial_diagnosis=model_instance)
+            ).values()
+        )
+        cumulative_score += sum(
+            completed_fields_bulk(
+                Comorbidity.objects.filter(multiaxial_diagnosis=model_instance)
+            ).values()
+        )
     elif model_instance.__class__.__name__ == "Assessment":
         # also need to count associated records in Site
 
@@ -647,26 +529,22 @@ def number_of_completed_fields_in_related_models(model_instance):
             medicines = AntiEpilepsyMedicine.objects.filter(
                 management=model_instance, is_rescue_medicine=False
             ).all()
-            if medicines.count() > 0:
-                for medicine in medicines:
-                    # essential fields are:
-                    # medicineentity_medicine_name', 'antiepilepsy_medicine_start_date',
-                    # 'antiepilepsy_medicine_risk_discussed', and if valproate prescribed
-                    # in a girl > 12y, 'is_a_pregnancy_prevention_programme_in_place'
-                    # 'has_a_valproate_annual_risk_acknowledgement_form_been_completed'
-                    cumulative_score += completed_fields(medicine)
+            # essential fields are:
+            # medicineentity_medicine_name', 'antiepilepsy_medicine_start_date',
+            # 'antiepilepsy_medicine_risk_discussed', and if valproate prescribed
+            # in a girl > 12y, 'is_a_pregnancy_prevention_programme_in_place'
+            # 'has_a_valproate_annual_risk_acknowledgement_form_been_completed'
+            cumulative_score += sum(completed_fields_bulk(medicines).values())
 
         if model_instance.has_rescue_medication_been_prescribed:
             # rescue drugs
             medicines = AntiEpilepsyMedicine.objects.filter(
                 management=model_instance, is_rescue_medicine=True
             ).all()
-            if medicines.count() > 0:
-                for medicine in medicines:
-                    # essential fields are:
-                    # medicine_name', 'antiepilepsy_medicine_start_date',
-                    # 'antiepilepsy_medicine_risk_discussed'
-                    cumulative_score += completed_fields(medicine)
+            # essential fields are:
+            # medicine_name', 'antiepilepsy_medicine_start_date',
+            # 'antiepilepsy_medicine_risk_discussed'
+            cumulative_score += sum(completed_fields_bulk(medicines).values())
 
     elif model_instance.__class__.__name__ == "Registration":
         # also need to count associate record in Site
@@ -1,13 +1,139 @@
 from typing import Literal
+import gzip
+import hashlib
 import json
 
 # django
-from django.core.serializers import serialize
 from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
 
 # third party
 #
 
+"""
+Boundary tiles for the choropleth maps.
+The full resolution boundaries (MultiPolygonField, srid 27700) are simplified, transformed to WGS 84 and stored gzipped
+in BoundaryTile once - by manage.py build_boundary_tiles, or the first time a tile is used - rather than serialised on
+every map request.
+"""
+
+# models holding the boundaries for each tile
+BOUNDARY_TILE_MODELS = {
+    "icb": "IntegratedCareBoard",
+    "nhs_england_region": "NHSEnglandRegion",
+    "lhb": "LocalHealthBoard",
+    "london_borough": "LondonBorough",
+    "country": "Country",
+}
+
+# boundaries are simplified to within this distance (BNG units are metres) - far below what is visible on the maps
+BOUNDARY_TILE_SIMPLIFY_TOLERANCE = 50
+
+# 5 decimal places of longitude and latitude is about 1 metre
+BOUNDARY_TILE_COORDINATE_PRECISION = 5
+
+
+def tile_name_for_region(
+    abstraction_level: Literal[
+        "icb", "nhs_england_region", "london_borough", "lhb", "country"
+    ],
+    organisation=None,
+) -> str:
+    """
+    Returns the name of the boundary tile for a given region.
+    The country tile for an organisation only has the organisation's country in it.
+    """
+    if abstraction_level == "country" and organisation:
+        return f"country-{organisation.country.boundary_identifier}"
+    if abstraction_level in BOUNDARY_TILE_MODELS:
+        return abstraction_level
+    return "icb"
+
+
+def _round_coordinates(coordinates):
+    if isinstance(coordinates[0], (int, float)):
+        return [
+            round(value, BOUNDARY_TILE_COORDINATE_PRECISION) for value in coordinates
+        ]
+    return [_round_coordinates(item) for item in coordinates]
+
+
+def build_boundary_tile(tile_name: str):
+    """
+    Simplifies, transforms and serialises the boundaries for a tile, then stores it. Returns the BoundaryTile.
+    """
+    BoundaryTile = apps.get_model("epilepsy12", "BoundaryTile")
+
+    abstraction_level, _, boundary_identifier = tile_name.partition("-")
+    if abstraction_level not in BOUNDARY_TILE_MODELS:
+        raise ValueError(f"{tile_name} is not a boundary tile.")
+
+    model = apps.get_model("epilepsy12", BOUNDARY_TILE_MODELS[abstraction_level])
+    boundaries = model.objects.all()
+    if boundary_identifier:
+        boundaries = boundaries.filter(boundary_identifier=boundary_identifier)
+        if not boundaries.exists():
+            raise ValueError(f"{tile_name} is not a boundary tile.")
+
+    property_fields = [
+        field
+        for field in model._meta.concrete_fields
+        if field.name != "geom" and not field.primary_key
+    ]
+
+    features = []
+    for boundary in boundaries:
+        geometry = boundary.geom.simplify(
+            BOUNDARY_TILE_SIMPLIFY_TOLERANCE, preserve_topology=True
+        )
+        geometry.transform(4326)
+        geometry = json.loads(geometry.json)
+        geometry["coordinates"] = _round_coordinates(geometry["coordinates"])
+
+        properties = {"pk": boundary.pk}
+        properties.update(
+            {field.name: field.value_from_object(boundary) for field in property_fields}
+        )
+
+        features.append(
+            {"type": "Feature", "properties": properties, "geometry": geometry}
+        )
+
+    geojson = json.dumps(
+        {"type": "FeatureCollection", "features": features},
+        cls=DjangoJSONEncoder,
+        separators=(",", ":"),
+    )
+
+    tile, _ = BoundaryTile.objects.update_or_create(
+        name=tile_name,
+        defaults={
+            "geojson": gzip.compress(geojson.encode()),
+            "feature_properties": [
+                feature["properties"] for feature in json.loads(geojson)["features"]
+            ],
+            "etag": hashlib.sha256(geojson.encode()).hexdigest(),
+        },
+    )
+    return tile
+
+
+def get_boundary_tile(tile_name: str, with_geojson: bool = True):
+    """
+    Returns the stored BoundaryTile, building it if it has not been built yet.
+    If with_geojson is False the geometry is not loaded unless it is read.
+    """
+    BoundaryTile = apps.get_model("epilepsy12", "BoundaryTile")
+
+    tiles = BoundaryTile.objects.all()
+    if not with_geojson:
+        tiles = tiles.defer("geojson")
+
+    try:
+        return tiles.get(name=tile_name)
+    except BoundaryTile.DoesNotExist:
+        return build_boundary_tile(tile_name)
+
 
 def return_tile_for_region(
     abstraction_level: Literal[
@@ -18,32 +144,6 @@ def return_tile_for_region(
     """
     Returns geojson data for a given region.
     """
-    IntegratedCareBoard = apps.get_model("epilepsy12", "IntegratedCareBoard")
-    NHSEnglandRegion = apps.get_model("epilepsy12", "NHSEnglandRegion")
-    CountryBoundaries = apps.get_model("epilepsy12", "Country")
-    LocalHealthBoard = apps.get_model("epilepsy12", "LocalHealthBoard")
-    LondonBorough = apps.get_model("epilepsy12", "LondonBorough")
-
-    model = IntegratedCareBoard.objects.all()
-
-    if abstraction_level == "nhs_england_region":
-        model = NHSEnglandRegion.objects.all()
-    elif abstraction_level == "country":
-        model = CountryBoundaries
-        if organisation:
-            model = CountryBoundaries.objects.filter(
-                boundary_identifier=organisation.country.boundary_identifier
-            ).all()
-        else:
-            model = CountryBoundaries.objects.all()
-    elif abstraction_level == "lhb":
-        model = LocalHealthBoard.objects.all()
-    elif abstraction_level == "london_borough":
-        model = LondonBorough.objects.all()
-
-    unedited_tile = serialize("geojson", model)
-
-    geojson_dict = json.loads(unedited_tile)
-    geojson_dict.pop("crs", None)
-
-    return json.dumps(geojson_dict)
+    tile = get_boundary_tile(tile_name_for_region(abstraction_level, organisation))
+
+    return gzip.decompress(bytes(tile.geojson)).decode()
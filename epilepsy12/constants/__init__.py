@@ -1,3 +1,5 @@
+import importlib
+
 from .causes import *
 from .common import *
 from .epilepsy_types import *
@@ -12,16 +14,39 @@ from .syndromes import *
 from .focal_seizures import *
 from .non_epilepsy_fields import *
 from .kpi import *
-from .integrated_care_boards import *
 from .postcodes import UNKNOWN_POSTCODES_NO_SPACES
-from .rcpch_organisations import *
 from .severity import *
-from .open_uk_networks import *
 from .country_codes import *
 from .nhs_england_regions import *
 from .colors import *
 from .abstraction_levels import *
-from .valid_nhs_nums import *
 from .form_calculation_constants import *
 from .local_health_boards import *
-from .trust import *
+
+# The reference datasets used to seed the organisations and their levels of abstraction (in migrations and management
+# commands) are hundreds of KB of literals - their modules are only imported the first time one of them is used.
+LAZY_CONSTANTS = {
+    "RCPCH_ORGANISATIONS": "rcpch_organisations",
+    "JERSEY_ORGANISATION": "rcpch_organisations",
+    "INTEGRATED_CARE_BOARDS": "integrated_care_boards",
+    "INTEGRATED_CARE_BOARDS_LOCAL_AUTHORITIES": "integrated_care_boards",
+    "TRUSTS": "trust",
+    "JERSEY_NHS_TRUST": "trust",
+    "OPEN_UK_NETWORKS": "open_uk_networks",
+    "OPEN_UK_NETWORKS_TRUSTS": "open_uk_networks",
+    "VALID_NHS_NUMS": "valid_nhs_nums",
+}
+
+
+def __getattr__(name):
+    if name in LAZY_CONSTANTS:
+        module = importlib.import_module(f".{LAZY_CONSTANTS[name]}", __name__)
+        value = getattr(module, name)
+        # cache on the package, so __getattr__ is only called on first use
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_CONSTANTS))
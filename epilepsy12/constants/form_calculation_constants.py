@@ -132,3 +132,127 @@ AntiEpilepsyMedicine_minimum_scorable_fields = MinimumScorableFieldsForModel(
         "antiepilepsy_medicine_risk_discussed",
     ],
 )
+
+
+# Fields never counted by `completed_fields`, by model class name
+FORM_CALCULATION_META_VARIABLES = frozenset(
+    [
+        "id",
+        "updated_at",
+        "updated_by",
+        "created_at",
+        "created_by",
+    ]
+)
+
+FIELDS_TO_AVOID_IN_FORM_CALCULATION = {
+    "FirstPaediatricAssessment": FORM_CALCULATION_META_VARIABLES | {"registration"},
+    "EpilepsyContext": FORM_CALCULATION_META_VARIABLES | {"registration"},
+    "Investigations": FORM_CALCULATION_META_VARIABLES | {"registration"},
+    "Assessment": FORM_CALCULATION_META_VARIABLES
+    | {
+        "registration",
+        "childrens_epilepsy_surgical_service_input_date",
+    },
+    "MultiaxialDiagnosis": FORM_CALCULATION_META_VARIABLES
+    | {
+        "registration",
+        "multiaxial_diagnosis",
+        "episodes",
+        "syndromes",
+        "comorbidities",
+        "epilepsy_cause",  # Nolonger scored - issue #1125
+    },
+    "Management": FORM_CALCULATION_META_VARIABLES
+    | {"registration", "antiepilepsymedicine"},
+    "Syndrome": FORM_CALCULATION_META_VARIABLES | {"multiaxial_diagnosis"},
+    "Comorbidity": FORM_CALCULATION_META_VARIABLES | {"multiaxial_diagnosis"},
+    "Episode": FORM_CALCULATION_META_VARIABLES
+    | {
+        "multiaxial_diagnosis",
+        "description_keywords",
+        "description",  # Nolonger scored -  issue #1015
+        "expected_score",
+        "calculated_score",
+    },
+    "AntiEpilepsyMedicine": FORM_CALCULATION_META_VARIABLES
+    | {
+        "management",
+        "is_rescue_medicine",
+        "antiepilepsy_medicine_stop_date",
+        "is_a_pregnancy_prevention_programme_needed",
+    },
+    "Registration": FORM_CALCULATION_META_VARIABLES
+    | {
+        "management",
+        "assessment",
+        "investigations",
+        "multiaxialdiagnosis",
+        "registration",
+        "epilepsycontext",
+        "firstpaediatricassessment",
+        "completed_first_year_of_care_date",
+        "audit_submission_date",
+        "cohort",
+        "case",
+        "audit_progress",
+        "kpi",
+    },
+    "Medicine": frozenset(
+        [
+            "id",
+            "conceptId",
+            "term",
+            "preferredTerm",
+            "description",
+            "snomed_ct_edition",
+            "snomed_ct_version",
+            "icd_code",
+            "cd_version",
+            "dsm_code",
+            "dsm_version",
+            "is_rescue",
+            "history",
+        ]
+    ),
+}
+
+# Array fields only count as completed if at least one item has been selected
+ARRAY_FIELDS_IN_FORM_CALCULATION = frozenset(
+    [
+        "epilepsy_cause_categories",
+        "mental_health_issues",
+    ]
+)
+
+# Of the focal onset checkboxes, only the laterality radio buttons are scored, and only when selected
+FOCAL_ONSET_LATERALITY_FIELDS = frozenset(
+    [
+        "focal_onset_right",
+        "focal_onset_left",
+        "focal_onset_laterality_unknown",
+    ]
+)
+
+FOCAL_ONSET_FIELDS = FOCAL_ONSET_LATERALITY_FIELDS | {
+    "focal_onset_atonic",
+    "focal_onset_clonic",
+    "focal_onset_epileptic_spasms",
+    "focal_onset_hyperkinetic",
+    "focal_onset_myoclonic",
+    "focal_onset_tonic",
+    "focal_onset_focal_to_bilateral_tonic_clonic",
+    "focal_onset_automatisms",
+    "focal_onset_impaired_awareness",
+    "focal_onset_gelastic",
+    "focal_onset_autonomic",
+    "focal_onset_behavioural_arrest",
+    "focal_onset_cognitive",
+    "focal_onset_emotional",
+    "focal_onset_sensory",
+    "focal_onset_centrotemporal",
+    "focal_onset_temporal",
+    "focal_onset_frontal",
+    "focal_onset_parietal",
+    "focal_onset_occipital",
+}
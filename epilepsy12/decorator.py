@@ -1,7 +1,9 @@
 # python imports
+from dataclasses import dataclass
 import logging
 
 from django.conf import settings
+from django.db.models import OuterRef, Subquery
 from django.core.exceptions import PermissionDenied
 from django.http import Http404
 from django.contrib.auth.decorators import login_required
@@ -24,6 +26,7 @@ from .models import (
 )
 
 from .constants import AUDIT_CENTRE_LEAD_CLINICIAN
+from .common_view_functions import access_scope
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -43,6 +46,127 @@ model_primary_keys = [
     {"id": "antiepilepsy_medicine_id", "model": "AntiEpilepsyMedicine"},
 ]
 
+# the view kwarg identifying the object requested, its model and the path from the model to the child (case)
+# in the order they are looked for
+child_object_kwargs = [
+    {"id": "registration_id", "model": Registration, "case": "case"},
+    {"id": "management_id", "model": Management, "case": "registration__case"},
+    {"id": "investigations_id", "model": Investigations, "case": "registration__case"},
+    {
+        "id": "first_paediatric_assessment_id",
+        "model": FirstPaediatricAssessment,
+        "case": "registration__case",
+    },
+    {
+        "id": "epilepsy_context_id",
+        "model": EpilepsyContext,
+        "case": "registration__case",
+    },
+    {
+        "id": "multiaxial_diagnosis_id",
+        "model": MultiaxialDiagnosis,
+        "case": "registration__case",
+    },
+    {
+        "id": "episode_id",
+        "model": Episode,
+        "case": "multiaxial_diagnosis__registration__case",
+    },
+    {
+        "id": "syndrome_id",
+        "model": Syndrome,
+        "case": "multiaxial_diagnosis__registration__case",
+    },
+    {
+        "id": "comorbidity_id",
+        "model": Comorbidity,
+        "case": "multiaxial_diagnosis__registration__case",
+    },
+    {
+        "id": "antiepilepsy_medicine_id",
+        "model": AntiEpilepsyMedicine,
+        "case": "management__registration__case",
+    },
+    {"id": "assessment_id", "model": Assessment, "case": "registration__case"},
+    {"id": "case_id", "model": Case, "case": None},
+]
+
+
+@dataclass
+class ChildAccess:
+    """
+    The object requested in a view, the child (case) it belongs to, and the organisation of the child's lead site
+    """
+
+    requested_object: object
+    case: Case
+    lead_organisation_id: int = None
+
+    def is_within_scope(self, scope) -> bool:
+        """
+        Returns True if the child's lead site is in an organisation within the user's access scope: the trust (or in
+        Wales, local health board) which employs them
+        """
+        return (
+            self.lead_organisation_id is not None
+            and self.lead_organisation_id in scope.organisation_ids
+        )
+
+
+def resolve_child_access(request, view_kwargs):
+    """
+    Returns the ChildAccess for the object identified in the view kwargs, or None if none is.
+    The object, its case and its lead site organisation are loaded in one query, and
+    memoised on the request, so stacked decorators and the view itself do not look them up again.
+    """
+    for child_object in child_object_kwargs:
+        pk = view_kwargs.get(child_object["id"])
+        if pk is not None:
+            break
+    else:
+        return None
+
+    if not hasattr(request, "_epilepsy12_child_access"):
+        request._epilepsy12_child_access = {}
+    memo = request._epilepsy12_child_access
+
+    key = (child_object["id"], str(pk))
+    if key not in memo:
+        case_path = child_object["case"]
+        case_pk = OuterRef(f"{case_path}__pk" if case_path else "pk")
+        lead_site = Site.objects.filter(
+            case=case_pk,
+            site_is_actively_involved_in_epilepsy_care=True,
+            site_is_primary_centre_of_epilepsy_care=True,
+        )
+        queryset = child_object["model"].objects.annotate(
+            lead_organisation_id=Subquery(lead_site.values("organisation")[:1]),
+        )
+        if case_path:
+            queryset = queryset.select_related(case_path)
+
+        requested_object = queryset.get(pk=pk)
+        case = requested_object
+        if case_path:
+            for field_name in case_path.split("__"):
+                case = getattr(case, field_name)
+
+        memo[key] = ChildAccess(
+            requested_object=requested_object,
+            case=case,
+            lead_organisation_id=requested_object.lead_organisation_id,
+        )
+
+    request.child_access = memo[key]
+    return request.child_access
+
+
+def requested_child_access(request):
+    """
+    Returns the ChildAccess resolved by user_may_view_this_child or group_required for the view
+    """
+    return getattr(request, "child_access", None)
+
 
 def group_required(*group_names):
     # decorator receives case_id or registration_id from view and group name(s) as arguments.
@@ -55,76 +179,15 @@ def group_required(*group_names):
         def wrapper(request, *args, **kwargs):
             user = request.user
             if user.is_active and (
-                user.is_superuser or bool(user.groups.filter(name__in=group_names))
+                user.is_superuser or access_scope(request).is_in_groups(group_names)
             ):
                 # user is in either a trust level or an RCPCH level group but in the correct group otherwise.
-                if kwargs.get("registration_id") is not None:
-                    registration = Registration.objects.get(
-                        pk=kwargs.get("registration_id")
-                    )
-                    child = registration.case
-                elif kwargs.get("management_id") is not None:
-                    management = Management.objects.get(pk=kwargs.get("management_id"))
-                    child = management.registration.case
-                elif kwargs.get("investigations_id") is not None:
-                    investigations = Investigations.objects.get(
-                        pk=kwargs.get("investigations_id")
-                    )
-                    child = investigations.registration.case
-                elif kwargs.get("first_paediatric_assessment_id") is not None:
-                    first_paediatric_assessment = FirstPaediatricAssessment.objects.get(
-                        pk=kwargs.get("first_paediatric_assessment_id")
-                    )
-                    child = first_paediatric_assessment.registration.case
-                elif kwargs.get("epilepsy_context_id") is not None:
-                    epilepsy_context = EpilepsyContext.objects.get(
-                        pk=kwargs.get("epilepsy_context_id")
-                    )
-                    child = epilepsy_context.registration.case
-                elif kwargs.get("multiaxial_diagnosis_id") is not None:
-                    multiaxial_diagnosis = MultiaxialDiagnosis.objects.get(
-                        pk=kwargs.get("multiaxial_diagnosis_id")
-                    )
-                    child = multiaxial_diagnosis.registration.case
-                elif kwargs.get("episode_id") is not None:
-                    episode = Episode.objects.get(pk=kwargs.get("episode_id"))
-                    child = episode.multiaxial_diagnosis.registration.case
-                elif kwargs.get("syndrome_id") is not None:
-                    syndrome = Syndrome.objects.get(pk=kwargs.get("syndrome_id"))
-                    child = syndrome.multiaxial_diagnosis.registration.case
-                elif kwargs.get("comorbidity_id") is not None:
-                    comorbidity = Comorbidity.objects.get(
-                        pk=kwargs.get("comorbidity_id")
-                    )
-                    child = comorbidity.multiaxial_diagnosis.registration.case
-                elif kwargs.get("antiepilepsy_medicine_id") is not None:
-                    antiepilepsy_medicine = AntiEpilepsyMedicine.objects.get(
-                        pk=kwargs.get("antiepilepsy_medicine_id")
-                    )
-                    child = antiepilepsy_medicine.management.registration.case
-                elif kwargs.get("case_id") is not None:
-                    case = Case.objects.get(pk=kwargs.get("case_id"))
-                    child = case
-
-                # else:
-                #     child = Case.objects.get(pk=kwargs.get('case_id'))
-
-                if user.is_rcpch_audit_team_member:
-                    organisation = Organisation.objects.filter(
-                        cases=child,
-                        site__site_is_actively_involved_in_epilepsy_care=True,
-                        site__site_is_primary_centre_of_epilepsy_care=True,
-                    )
-                else:
-                    # filter for object where trust (not just organisation) where case is registered is the same as that of user
-                    organisation = Organisation.objects.filter(
-                        cases=child,
-                        site__site_is_actively_involved_in_epilepsy_care=True,
-                        site__site_is_primary_centre_of_epilepsy_care=True,
-                        trust=request.user.organisation_employer.trust,
-                    )
+                child_access = resolve_child_access(request, kwargs)
 
-                if organisation.exists() or user.is_rcpch_audit_team_member:
+                if user.is_rcpch_audit_team_member or (
+                    child_access is not None
+                    and child_access.is_within_scope(access_scope(request))
+                ):
                     return view(request, *args, **kwargs)
                 else:
                     raise PermissionDenied()
@@ -144,53 +207,15 @@ def user_may_view_this_organisation():
     # 3. Active trust level users where their trust matches the id of the organisation requested
     def decorator(view):
         def wrapper(request, *args, **kwargs):
-            user = request.user
-
             if kwargs.get("organisation_id") is not None:
-                organisation_requested = Organisation.objects.get(
-                    pk=kwargs.get("organisation_id")
-                )
-                if (user.is_active and user.email_confirmed) or user.is_superuser:
-                    if (
-                        user.is_rcpch_audit_team_member
-                        or user.is_rcpch_staff
-                        or user.is_superuser
-                    ):
-                        # RCPCH staff or E12 RCPCH staff can see all children across the UK
-                        return view(request, *args, **kwargs)
-                    else:
-                        # regular user - not a member of RCPCH
-                        if (
-                            user.organisation_employer.country.boundary_identifier
-                            == "W92000004"
-                        ):
-                            user_parent = user.organisation_employer.local_health_board
-                        else:
-                            user_parent = user.organisation_employer.trust
-
-                        if (
-                            organisation_requested.country.boundary_identifier
-                            == "W92000004"
-                        ):
-                            organisation_requested_parent = (
-                                organisation_requested.local_health_board
-                            )
-                        else:
-                            organisation_requested_parent = organisation_requested.trust
-
-                        if user_parent == organisation_requested_parent:
-                            # user's employing trust is the same as the trust of the organisation requested
-                            if kwargs.get("user_type") is not None:
-                                if kwargs.get("user_type") == "rcpch-staff":
-                                    # this route is for rcpch staff to create new rcpch staff members only
-                                    raise PermissionDenied()
-                            return view(request, *args, **kwargs)
-                        else:
-                            raise PermissionDenied()
-
-                else:
-                    # user is not active or email confirmed
+                # the organisations the user may access were looked up at login
+                scope = access_scope(request)
+                if not scope.may_access_organisation(kwargs.get("organisation_id")):
+                    raise PermissionDenied()
+                if not scope.is_national and kwargs.get("user_type") == "rcpch-staff":
+                    # this route is for rcpch staff to create new rcpch staff members only
                     raise PermissionDenied()
+                return view(request, *args, **kwargs)
             else:
                 raise ValueError("Organisation requested does not exist!")
 
@@ -234,77 +259,16 @@ def user_may_view_this_child():
             user = request.user
             if (user.is_active and user.email_confirmed) or user.is_superuser:
                 # user is registered and active or a superuser
-                if kwargs.get("registration_id") is not None:
-                    registration = Registration.objects.get(
-                        pk=kwargs.get("registration_id")
-                    )
-                    child = registration.case
-                elif kwargs.get("management_id") is not None:
-                    management = Management.objects.get(pk=kwargs.get("management_id"))
-                    child = management.registration.case
-                elif kwargs.get("investigations_id") is not None:
-                    investigations = Investigations.objects.get(
-                        pk=kwargs.get("investigations_id")
-                    )
-                    child = investigations.registration.case
-                elif kwargs.get("first_paediatric_assessment_id") is not None:
-                    first_paediatric_assessment = FirstPaediatricAssessment.objects.get(
-                        pk=kwargs.get("first_paediatric_assessment_id")
-                    )
-                    child = first_paediatric_assessment.registration.case
-                elif kwargs.get("epilepsy_context_id") is not None:
-                    epilepsy_context = EpilepsyContext.objects.get(
-                        pk=kwargs.get("epilepsy_context_id")
-                    )
-                    child = epilepsy_context.registration.case
-                elif kwargs.get("multiaxial_diagnosis_id") is not None:
-                    multiaxial_diagnosis = MultiaxialDiagnosis.objects.get(
-                        pk=kwargs.get("multiaxial_diagnosis_id")
-                    )
-                    child = multiaxial_diagnosis.registration.case
-                elif kwargs.get("episode_id") is not None:
-                    episode = Episode.objects.get(pk=kwargs.get("episode_id"))
-                    child = episode.multiaxial_diagnosis.registration.case
-                elif kwargs.get("syndrome_id") is not None:
-                    syndrome = Syndrome.objects.get(pk=kwargs.get("syndrome_id"))
-                    child = syndrome.multiaxial_diagnosis.registration.case
-                elif kwargs.get("comorbidity_id") is not None:
-                    comorbidity = Comorbidity.objects.get(
-                        pk=kwargs.get("comorbidity_id")
-                    )
-                    child = comorbidity.multiaxial_diagnosis.registration.case
-                elif kwargs.get("antiepilepsy_medicine_id") is not None:
-                    antiepilepsy_medicine = AntiEpilepsyMedicine.objects.get(
-                        pk=kwargs.get("antiepilepsy_medicine_id")
-                    )
-                    child = antiepilepsy_medicine.management.registration.case
-                elif kwargs.get("assessment_id") is not None:
-                    assessment = Assessment.objects.get(pk=kwargs.get("assessment_id"))
-                    child = assessment.registration.case
-                elif kwargs.get("case_id") is not None:
-                    case = Case.objects.get(pk=kwargs.get("case_id"))
-                    child = case
-
-                if user.is_rcpch_audit_team_member:
-                    organisation = Organisation.objects.filter(
-                        cases=child,
-                        site__site_is_actively_involved_in_epilepsy_care=True,
-                        site__site_is_primary_centre_of_epilepsy_care=True,
-                    )
-                else:
-                    # filter for object where trust (not just organisation) where case is registered is the same as that of user
-                    organisation = Organisation.objects.filter(
-                        cases=child,
-                        site__site_is_actively_involved_in_epilepsy_care=True,
-                        site__site_is_primary_centre_of_epilepsy_care=True,
-                        trust=request.user.organisation_employer.trust,
-                    )
+                child_access = resolve_child_access(request, kwargs)
 
                 if (
-                    organisation.exists()
-                    or user.is_rcpch_audit_team_member
+                    user.is_rcpch_audit_team_member
                     or user.is_rcpch_staff
                     or user.is_superuser
+                    or (
+                        child_access is not None
+                        and child_access.is_within_scope(access_scope(request))
+                    )
                 ):
                     return view(request, *args, **kwargs)
                 else:
@@ -12,7 +12,9 @@ class OrganisationalAuditSubmissionForm(forms.ModelForm):
             "created_by",
             "updated_by",
             "created_at",
-            "updated_at"
+            "updated_at",
+            "number_completed",
+            "total_questions",
         ]
 
         help_texts = {
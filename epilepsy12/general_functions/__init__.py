@@ -16,6 +16,7 @@ from .index_multiple_deprivation import *
 from .item_from_choice import *
 from .ods_update import *
 from .postcode import *
+from .postcode_gazetteer import *
 from .random_generator import *
 from .time_elapsed import stringify_time_elapsed
 from .value_from_key import *
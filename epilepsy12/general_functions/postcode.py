@@ -78,7 +78,7 @@ def coordinates_for_postcode(postcode: str) -> bool:
     # check against API
     url = f"{settings.POSTCODE_API_BASE_URL}/postcodes/{postcode}"
 
-    response = requests.get(url=url)
+    response = requests.get(url=url, timeout=10)  # times out after 10 seconds
 
     if response.status_code == 200:
         location = response.json()["data"]["attributes"]["location"]
@@ -0,0 +1,259 @@
+"""
+Looks up the location and index of multiple deprivation quintile for a postcode.
+The local gazetteer (the Postcode model, loaded with manage.py load_postcode_gazetteer) is used first, with an LRU cache
+in front of it. The postcode API and RCPCH Census Platform are only called for postcodes missing from the gazetteer, or incomplete there
+and not looked up remotely within REMOTE_LOOKUP_RETRY_INTERVAL. The result is stored, even if nothing could be found,
+so the next lookup is local.
+"""
+
+# Standard imports
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# Third party imports
+from django.apps import apps
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.utils import timezone
+
+# RCPCH imports
+from .postcode import coordinates_for_postcode
+from .index_multiple_deprivation import imd_for_postcode
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+POSTCODE_GAZETTEER_CACHE_SIZE = 10000
+
+# how long before a postcode the remote services could not complete is looked up remotely again
+REMOTE_LOOKUP_RETRY_INTERVAL = timedelta(days=1)
+
+# how many postcodes are looked up remotely at once in a batch - neither service has a bulk endpoint, so each postcode
+# costs two HTTP requests
+REMOTE_LOOKUP_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class PostcodeDetails:
+    """
+    Location and deprivation for a postcode. Any of these may be None if they could not be found.
+    Coordinates are stored as numbers so the cached value cannot be changed by a caller transforming a Point.
+    looked_up_at is when the remote services were last asked for the postcode, None if they never have been.
+    """
+
+    longitude: float | None = None
+    latitude: float | None = None
+    easting: float | None = None
+    northing: float | None = None
+    index_of_multiple_deprivation_quintile: int | None = None
+    looked_up_at: datetime | None = None
+
+    @property
+    def is_complete(self) -> bool:
+        return (
+            self.longitude is not None
+            and self.latitude is not None
+            and self.index_of_multiple_deprivation_quintile is not None
+        )
+
+    @property
+    def location_wgs84(self) -> Point | None:
+        if self.longitude is None or self.latitude is None:
+            return None
+        return Point(self.longitude, self.latitude, srid=4326)
+
+    @property
+    def location_bng(self) -> Point | None:
+        if self.easting is None or self.northing is None:
+            return None
+        return Point(self.easting, self.northing, srid=27700)
+
+
+def normalise_postcode(postcode: str) -> str:
+    """
+    Returns the postcode upper case, with spaces and dashes removed, as stored in Case and Postcode.
+    """
+    return str(postcode).replace(" ", "").replace("-", "").upper()
+
+
+def _postcode_details_from_entry(entry) -> PostcodeDetails:
+    """
+    Returns the details of a Postcode (gazetteer entry).
+    """
+    return PostcodeDetails(
+        longitude=entry.location_wgs84.x if entry.location_wgs84 else None,
+        latitude=entry.location_wgs84.y if entry.location_wgs84 else None,
+        easting=entry.location_bng.x if entry.location_bng else None,
+        northing=entry.location_bng.y if entry.location_bng else None,
+        index_of_multiple_deprivation_quintile=entry.index_of_multiple_deprivation_quintile,
+        looked_up_at=entry.looked_up_at,
+    )
+
+
+def _needs_remote_lookup(details: PostcodeDetails | None) -> bool:
+    """
+    Returns True if the postcode is missing from the gazetteer, or incomplete there and not looked up remotely
+    within REMOTE_LOOKUP_RETRY_INTERVAL.
+    """
+    if details is None:
+        return True
+    if details.is_complete:
+        return False
+    return (
+        details.looked_up_at is None
+        or details.looked_up_at < timezone.now() - REMOTE_LOOKUP_RETRY_INTERVAL
+    )
+
+
+@lru_cache(maxsize=POSTCODE_GAZETTEER_CACHE_SIZE)
+def _postcode_details_from_gazetteer(postcode: str) -> PostcodeDetails:
+    """
+    Returns the gazetteer entry for a normalised postcode.
+    Raises Postcode.DoesNotExist if it is not there - exceptions are not cached, so a later load or remote lookup is seen.
+    """
+    Postcode = apps.get_model("epilepsy12", "Postcode")
+
+    return _postcode_details_from_entry(Postcode.objects.get(postcode=postcode))
+
+
+def _postcode_details_from_remote(
+    postcode: str, known: PostcodeDetails | None = None
+) -> PostcodeDetails:
+    """
+    Fetches whatever is missing from known (all of it if None) from the postcode API and RCPCH Census Platform.
+    A remote failure is logged and leaves that value None - it must never stop data entry.
+    """
+    known = known or PostcodeDetails()
+
+    index_of_multiple_deprivation_quintile = (
+        known.index_of_multiple_deprivation_quintile
+    )
+    if index_of_multiple_deprivation_quintile is None:
+        try:
+            index_of_multiple_deprivation_quintile = imd_for_postcode(postcode)
+        except Exception as error:
+            logger.exception(
+                f"Cannot calculate deprivation score for {postcode}: {error}"
+            )
+
+    longitude, latitude = known.longitude, known.latitude
+    easting, northing = known.easting, known.northing
+    if longitude is None or latitude is None:
+        try:
+            coordinates = coordinates_for_postcode(postcode=postcode)
+            if isinstance(coordinates, tuple):
+                longitude, latitude = coordinates
+                # Transform to British National Grid (SRID 27700) - this has Eastings and Northings, rather than longitude and latitude.
+                point_bng = Point(longitude, latitude, srid=4326).transform(
+                    27700, clone=True
+                )
+                easting, northing = point_bng.x, point_bng.y
+        except Exception as error:
+            logger.exception(
+                f"Cannot get longitude and latitude for {postcode}: {error}"
+            )
+
+    return PostcodeDetails(
+        longitude=longitude,
+        latitude=latitude,
+        easting=easting,
+        northing=northing,
+        index_of_multiple_deprivation_quintile=index_of_multiple_deprivation_quintile,
+        looked_up_at=timezone.now(),
+    )
+
+
+def _store_postcode_details(postcode: str, details: PostcodeDetails):
+    """
+    Adds a remotely fetched postcode to the gazetteer. Postcodes which could not be found are stored too, with the time
+    of the lookup, so they are not looked up remotely again until the retry interval has passed.
+    """
+    Postcode = apps.get_model("epilepsy12", "Postcode")
+
+    try:
+        # savepoint, so a failure does not break the transaction of the Case being saved
+        with transaction.atomic():
+            Postcode.objects.update_or_create(
+                postcode=postcode,
+                defaults={
+                    "location_wgs84": details.location_wgs84,
+                    "location_bng": details.location_bng,
+                    "index_of_multiple_deprivation_quintile": details.index_of_multiple_deprivation_quintile,
+                    "looked_up_at": details.looked_up_at,
+                },
+            )
+    except Exception as error:
+        logger.exception(f"Cannot store {postcode} in the postcode gazetteer: {error}")
+
+
+def postcode_details(postcode: str) -> PostcodeDetails:
+    """
+    Returns the location and index of multiple deprivation quintile for a postcode.
+    Makes no HTTP requests if the postcode is in the gazetteer with both location and quintile, or was looked up
+    remotely within REMOTE_LOOKUP_RETRY_INTERVAL.
+    """
+    Postcode = apps.get_model("epilepsy12", "Postcode")
+
+    postcode = normalise_postcode(postcode)
+
+    try:
+        details = _postcode_details_from_gazetteer(postcode)
+    except Postcode.DoesNotExist:
+        details = None
+
+    if not _needs_remote_lookup(details):
+        return details
+
+    remote_details = _postcode_details_from_remote(postcode, known=details)
+    _store_postcode_details(postcode, remote_details)
+    if details is not None:
+        # the incomplete entry is cached - drop it so the stored one is read next time
+        _postcode_details_from_gazetteer.cache_clear()
+
+    return remote_details
+
+
+def postcodes_details(postcodes) -> dict[str, PostcodeDetails]:
+    """
+    Returns the location and index of multiple deprivation quintile for many postcodes, keyed by normalised postcode.
+    The gazetteer is read in a single query; only postcodes missing from it, or incomplete there and due a retry, are
+    fetched remotely, REMOTE_LOOKUP_WORKERS at a time.
+    """
+    Postcode = apps.get_model("epilepsy12", "Postcode")
+
+    postcodes = {normalise_postcode(postcode) for postcode in postcodes}
+
+    details_by_postcode = {
+        entry.postcode: _postcode_details_from_entry(entry)
+        for entry in Postcode.objects.filter(postcode__in=postcodes)
+    }
+
+    known_by_postcode = {
+        postcode: details_by_postcode.get(postcode)
+        for postcode in postcodes
+        if _needs_remote_lookup(details_by_postcode.get(postcode))
+    }
+    if not known_by_postcode:
+        return details_by_postcode
+
+    # the HTTP requests are made concurrently, and the results stored from this thread, which holds the database
+    # connection
+    with ThreadPoolExecutor(max_workers=REMOTE_LOOKUP_WORKERS) as executor:
+        remote_details = executor.map(
+            lambda postcode: _postcode_details_from_remote(
+                postcode, known=known_by_postcode[postcode]
+            ),
+            known_by_postcode,
+        )
+        for postcode, details in zip(known_by_postcode, remote_details):
+            _store_postcode_details(postcode, details)
+            details_by_postcode[postcode] = details
+
+    if any(known is not None for known in known_by_postcode.values()):
+        # an incomplete entry may be cached for single lookups - drop it so the stored one is read next time
+        _postcode_details_from_gazetteer.cache_clear()
+
+    return details_by_postcode
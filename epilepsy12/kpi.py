@@ -1,5 +1,10 @@
+# Python Imports
+from io import BytesIO
+
 # Django Imports
 from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Max
 
 # Third party imports
 import pandas as pd
@@ -7,11 +12,7 @@ import pandas as pd
 # E12 Imports
 from epilepsy12.constants import (
     LOCAL_HEALTH_BOARDS,
-    INTEGRATED_CARE_BOARDS,
     NHS_ENGLAND_REGIONS,
-    OPEN_UK_NETWORKS,
-    OPEN_UK_NETWORKS_TRUSTS,
-    INTEGRATED_CARE_BOARDS_LOCAL_AUTHORITIES,
 )
 from epilepsy12.common_view_functions.aggregate_by import (
     create_KPI_aggregation_dataframe,
@@ -33,6 +34,26 @@ from epilepsy12.models import (
     NationalKPIAggregation,
 )
 
+# sheet names of the KPI report, in the order of the dataframes returned by download_kpi_summary_as_csv
+KPI_EXPORT_SHEET_NAMES = [
+    "Country_level",
+    "HBT_level",
+    "ICB_level",
+    "NHSregion_level",
+    "Network_level",
+    "National_level",
+    "Reference",
+    "Registered vs Total - Trust",
+    "Registered vs Total - LHB",
+    "Registered vs Total - ICB",
+    "Registered vs Total - NHSregion",
+    "Registered vs Total - Network",
+    "Registered vs Total - Country",
+]
+
+# the registered vs total sheets count cases directly, so a cached report is rebuilt at least this often
+KPI_EXPORT_CACHE_TIMEOUT = 60 * 60
+
 
 def download_kpi_summary_as_csv(cohort):
     """
@@ -162,6 +183,11 @@ def download_kpi_summary_as_csv(cohort):
     national_df = create_KPI_aggregation_dataframe(national_rows, measures, title="uk")
 
     # REFERENCE - SHEET 7
+    # (the reference datasets are loaded lazily by epilepsy12.constants, so only when a report is downloaded)
+    from epilepsy12.constants import (
+        OPEN_UK_NETWORKS_TRUSTS,
+        INTEGRATED_CARE_BOARDS_LOCAL_AUTHORITIES,
+    )
 
     reference_df = create_reference_dataframe(
         trusts_participating_in_the_audit,
@@ -211,3 +237,51 @@ def download_kpi_summary_as_csv(cohort):
         openuk_network_totals_df,
         country_totals_df,
     )
+
+
+def kpi_export_published_at(cohort):
+    """
+    Returns when the KPIAggregations the KPI report for the cohort is built from were last updated, or None if there are none
+    """
+    last_updated = [
+        model_aggregation.objects.filter(cohort=cohort, open_access=False).aggregate(
+            last_updated=Max("last_updated")
+        )["last_updated"]
+        for model_aggregation in [
+            CountryKPIAggregation,
+            LocalHealthBoardKPIAggregation,
+            TrustKPIAggregation,
+            ICBKPIAggregation,
+            NHSEnglandRegionKPIAggregation,
+            OpenUKKPIAggregation,
+            NationalKPIAggregation,
+        ]
+    ]
+    return max(
+        (timestamp for timestamp in last_updated if timestamp is not None),
+        default=None,
+    )
+
+
+def kpi_export_workbook(cohort) -> bytes:
+    """
+    Returns the KPI report for the cohort as an .xlsx file.
+    The workbook is written to an in-memory buffer, and cached for the cohort until its KPIAggregations are updated.
+    """
+    published_at = kpi_export_published_at(cohort)
+    cache_key = (
+        f"kpi_export:{cohort}:{published_at.isoformat() if published_at else None}"
+    )
+
+    workbook = cache.get(cache_key)
+    if workbook is None:
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            for sheet_name, dataframe in zip(
+                KPI_EXPORT_SHEET_NAMES, download_kpi_summary_as_csv(cohort=cohort)
+            ):
+                dataframe.to_excel(writer, sheet_name=sheet_name, index=False)
+        workbook = buffer.getvalue()
+        cache.set(cache_key, workbook, timeout=KPI_EXPORT_CACHE_TIMEOUT)
+
+    return workbook
@@ -0,0 +1,278 @@
+# python
+from datetime import date, datetime, time
+import logging
+import os
+
+# django
+from django.apps import apps
+from django.contrib.gis.db.models import GeometryField
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# 3rd party
+import pandas as pd
+
+# E12
+from ...general_functions import dates_for_cohort
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+# how the history of each model with a cohort is linked to the history of the registrations in the cohort - the model it
+# belongs to and the foreign key id on its history rows. The history tables are joined, rather than the live ones, so the
+# history of deleted rows is archived too
+COHORT_LOOKUPS = {
+    "Registration": None,
+    # the registration holds the id of its case
+    "Case": ("Registration", "case_id"),
+    "Site": ("Case", "case_id"),
+    "FirstPaediatricAssessment": ("Registration", "registration_id"),
+    "EpilepsyContext": ("Registration", "registration_id"),
+    "MultiaxialDiagnosis": ("Registration", "registration_id"),
+    "Episode": ("MultiaxialDiagnosis", "multiaxial_diagnosis_id"),
+    "Syndrome": ("MultiaxialDiagnosis", "multiaxial_diagnosis_id"),
+    "Comorbidity": ("MultiaxialDiagnosis", "multiaxial_diagnosis_id"),
+    "Assessment": ("Registration", "registration_id"),
+    "Investigations": ("Registration", "registration_id"),
+    "Management": ("Registration", "registration_id"),
+    "AntiEpilepsyMedicine": ("Management", "management_id"),
+}
+
+ARCHIVE_FORMATS = {"csv": "csv.gz", "parquet": "parquet"}
+
+
+def models_with_history():
+    """
+    Returns the epilepsy12 models which keep history (HistoricalRecords)
+    """
+    return [
+        model
+        for model in apps.get_app_config("epilepsy12").get_models()
+        if hasattr(model._meta, "simple_history_manager_attribute")
+    ]
+
+
+def ids_in_cohort(model_name: str, cohort: int):
+    """
+    Returns the ids of the instances of a model, current or deleted, which belonged to the children in a cohort
+    """
+    model = apps.get_model("epilepsy12", model_name)
+    history_model = model.history.model
+    if COHORT_LOOKUPS[model_name] is None:
+        # current instances too, in case their cohort was updated without saving history
+        return history_model.objects.filter(
+            Q(cohort=cohort)
+            | Q(id__in=model.objects.filter(cohort=cohort).values("id"))
+        ).values("id")
+
+    parent_model_name, foreign_key = COHORT_LOOKUPS[model_name]
+    parent_ids = ids_in_cohort(parent_model_name, cohort)
+    if model_name == "Case":
+        return (
+            apps.get_model("epilepsy12", parent_model_name)
+            .history.model.objects.filter(id__in=parent_ids)
+            .values(foreign_key)
+        )
+    return history_model.objects.filter(**{f"{foreign_key}__in": parent_ids}).values(
+        "id"
+    )
+
+
+def history_of_cohort(model, cohort: int):
+    """
+    Returns the history rows of the instances of a model belonging to the children in a cohort. The ids are read
+    now, as the history they are found through may be archived before these rows are.
+    """
+    return model.history.model.objects.filter(
+        id__in=list(ids_in_cohort(model.__name__, cohort).distinct())
+    )
+
+
+def archive_path(output_dir: str, partition: str, rows: pd.DataFrame, file_format: str):
+    """
+    Returns the file a batch of rows is archived to. Parquet files cannot be appended to, so each batch is written to
+    its own part file in a directory for the partition, which reads back as one dataset.
+    """
+    if file_format == "parquet":
+        return os.path.join(
+            output_dir, partition, f"part-{rows['history_id'].iloc[0]}.parquet"
+        )
+    return os.path.join(output_dir, f"{partition}.{ARCHIVE_FORMATS[file_format]}")
+
+
+def write_archive(rows: pd.DataFrame, path: str, file_format: str):
+    """
+    Writes rows to an archive file. Rows archived by an earlier run are kept - csv archives are appended to and parquet
+    rows are written to a new part file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if file_format == "parquet":
+        rows.to_parquet(path, index=False, compression="gzip")
+    else:
+        # gzip files can be appended to - each run adds a gzip member
+        rows.to_csv(
+            path,
+            mode="a",
+            header=not os.path.exists(path),
+            index=False,
+            compression={"method": "gzip"},
+        )
+
+
+class Command(BaseCommand):
+    help = "Archives history rows to compressed files, one file (or parquet directory) per history table and cohort (--cohort) or month (--before), then deletes them from the history tables. Cohorts can only be archived once closed to submission."
+
+    def add_arguments(self, parser):
+        selection = parser.add_mutually_exclusive_group(required=True)
+        selection.add_argument(
+            "-ct",
+            "--cohort",
+            type=int,
+            help="Archive the history of the children in this cohort, which must be closed to submission.",
+        )
+        selection.add_argument(
+            "--before",
+            type=date.fromisoformat,
+            help="Archive the history of all models, including reference data and users, recorded before this date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "-o",
+            "--output-dir",
+            default="history_archive",
+            help="Directory the archive files are written to. Default is history_archive.",
+        )
+        parser.add_argument(
+            "-f",
+            "--format",
+            choices=list(ARCHIVE_FORMATS),
+            default="csv",
+            help="csv (gzip compressed) or parquet, which requires pyarrow. Default is csv.",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of history rows read, written and deleted together. Default is 5000.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the history rows which would be archived, without writing or deleting any.",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"]
+        if file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError("Archiving to parquet requires pyarrow.")
+
+        cohort = options["cohort"]
+        if cohort is not None:
+            submission_date = dates_for_cohort(cohort)["submission_date"]
+            if submission_date is None or submission_date >= date.today():
+                raise CommandError(
+                    f"Cohort {cohort} is not closed to submission, so its history cannot be archived."
+                )
+            histories = [
+                (model.history.model, history_of_cohort(model, cohort))
+                for model in models_with_history()
+                if model.__name__ in COHORT_LOOKUPS
+            ]
+        else:
+            before = timezone.make_aware(datetime.combine(options["before"], time.min))
+            histories = [
+                (
+                    model.history.model,
+                    model.history.model.objects.filter(history_date__lt=before),
+                )
+                for model in models_with_history()
+            ]
+
+        total = 0
+        for history_model, history_rows in histories:
+            count = history_rows.count()
+            if options["dry_run"] or count == 0:
+                self.stdout.write(f"{history_model._meta.db_table}: {count} rows.")
+                total += count
+                continue
+
+            archived = self.archive(
+                history_model,
+                history_rows,
+                output_dir=os.path.join(
+                    options["output_dir"], history_model._meta.db_table
+                ),
+                file_format=file_format,
+                cohort=cohort,
+                batch_size=max(options["batch_size"], 1),
+            )
+            self.stdout.write(
+                f"{history_model._meta.db_table}: {archived} rows archived."
+            )
+            total += archived
+
+        if options["dry_run"]:
+            self.stdout.write(f"{total} history rows would be archived.")
+        else:
+            self.stdout.write(f"{total} history rows archived.")
+
+    def archive(
+        self, history_model, history_rows, output_dir, file_format, cohort, batch_size
+    ):
+        """
+        Writes the history rows to their archive files and deletes them, a batch at a time in history_id order.
+        Each batch is deleted only once it is written, so an interrupted run loses no history.
+        """
+        field_names = [field.attname for field in history_model._meta.concrete_fields]
+        # geometries are archived as extended well-known text
+        geometry_field_names = [
+            field.attname
+            for field in history_model._meta.concrete_fields
+            if isinstance(field, GeometryField)
+        ]
+        archived = 0
+        last_history_id = 0
+
+        while True:
+            batch = pd.DataFrame.from_records(
+                history_rows.filter(history_id__gt=last_history_id)
+                .order_by("history_id")
+                .values(*field_names)[:batch_size],
+                columns=field_names,
+            )
+            if batch.empty:
+                return archived
+            for field_name in geometry_field_names:
+                batch[field_name] = batch[field_name].map(
+                    lambda geometry: geometry.ewkt if geometry is not None else None
+                )
+
+            if cohort is not None:
+                partitions = [(f"cohort_{cohort}", batch)]
+            else:
+                months = batch["history_date"].map(
+                    lambda value: value.strftime("%Y-%m")
+                )
+                partitions = list(batch.groupby(months))
+
+            for partition, rows in partitions:
+                write_archive(
+                    rows,
+                    path=archive_path(output_dir, partition, rows, file_format),
+                    file_format=file_format,
+                )
+
+            history_ids = batch["history_id"].tolist()
+            with transaction.atomic():
+                history_model.objects.filter(history_id__in=history_ids).delete()
+
+            archived += len(history_ids)
+            last_history_id = history_ids[-1]
+            logger.info(
+                f"Archived {archived} rows from {history_model._meta.db_table} to {output_dir}"
+            )
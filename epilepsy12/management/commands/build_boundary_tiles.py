@@ -0,0 +1,32 @@
+# python
+import logging
+
+# django
+from django.core.management.base import BaseCommand
+
+# E12
+from ...models import Country
+from ...common_view_functions import build_boundary_tile
+from ...common_view_functions.tiles_for_region import BOUNDARY_TILE_MODELS
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Builds the simplified GeoJSON boundary tiles used by the choropleth maps. Run after the boundaries change - tiles that have not been built are otherwise built the first time they are used."
+
+    def handle(self, *args, **options):
+        tile_names = list(BOUNDARY_TILE_MODELS)
+        tile_names += [
+            f"country-{boundary_identifier}"
+            for boundary_identifier in Country.objects.values_list(
+                "boundary_identifier", flat=True
+            )
+        ]
+
+        for tile_name in tile_names:
+            tile = build_boundary_tile(tile_name)
+            self.stdout.write(
+                f"Built {tile_name} ({len(tile.feature_properties)} boundaries, {len(tile.geojson)} bytes)."
+            )
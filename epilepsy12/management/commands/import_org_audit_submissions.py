@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from ...models import OrganisationalAuditSubmissionPeriod
 from ...organisational_audit import import_submissions_from_csv
@@ -21,6 +21,11 @@ class Command(BaseCommand):
             required=True,
             help="ID of submission period to import into",
         )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file and report any problems, without importing",
+        )
 
     def handle(self, *args, **options):
         file = options["file"]
@@ -29,5 +34,38 @@ class Command(BaseCommand):
             id=options["submission_period"]
         )
 
-        import_submissions_from_csv(submission_period, file)
-            
\ No newline at end of file
+        report = import_submissions_from_csv(
+            submission_period, file, dry_run=options["dry_run"]
+        )
+
+        self.stdout.write(f"{report['rows']} rows read from {file}.")
+
+        if report["missing_columns"]:
+            self.stdout.write(
+                f"Columns missing, imported as not selected: {', '.join(report['missing_columns'])}"
+            )
+
+        problems = []
+
+        if report["unknown_site_codes"]:
+            problems.append(
+                f"No trust or local health board with site code: {', '.join(report['unknown_site_codes'])}"
+            )
+
+        for column, site_codes in report["invalid_values"].items():
+            problems.append(f"Invalid {column} for: {', '.join(site_codes)}")
+
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(problem))
+
+        if problems:
+            raise CommandError(
+                f"{len(problems)} problems found - nothing has been imported."
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS("No problems found."))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"{report['imported']} submissions imported.")
+            )
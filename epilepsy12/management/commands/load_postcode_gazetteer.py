@@ -0,0 +1,144 @@
+# python
+import logging
+import pandas as pd
+
+# django
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+
+# E12
+from ...models import Postcode
+from ...general_functions import normalise_postcode
+from ...general_functions.postcode_gazetteer import _postcode_details_from_gazetteer
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+# ONSPD uses these coordinates for postcodes with no grid reference
+ONSPD_NO_GRID_REFERENCE_LATITUDE = 99.999999
+
+
+def imd_quintiles_by_lsoa(imd_files, lsoa_column, decile_column) -> dict:
+    """
+    Reads Index of Multiple Deprivation files (one per nation) and returns a dict of LSOA code to IMD quintile.
+    """
+    quintiles = {}
+    for imd_file in imd_files:
+        imd = pd.read_csv(imd_file, usecols=[lsoa_column, decile_column])
+        for lsoa, decile in imd.itertuples(index=False):
+            if pd.notna(decile):
+                quintiles[lsoa] = (int(decile) + 1) // 2
+    return quintiles
+
+
+class Command(BaseCommand):
+    help = "Loads the local postcode gazetteer used when saving a case from an ONS Postcode Directory (ONSPD) CSV, with deprivation quintiles from IMD CSVs. Existing postcodes are updated."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--onspd",
+            type=str,
+            required=True,
+            help="Path to the ONSPD CSV (eg ONSPD_FEB_2024_UK.csv).",
+        )
+        parser.add_argument(
+            "-i",
+            "--imd",
+            type=str,
+            action="append",
+            help="Optional parameter. Path to an IMD CSV of LSOA code and IMD decile. Repeat for each nation.",
+            default=[],
+        )
+        parser.add_argument(
+            "--lsoa-column",
+            type=str,
+            help="ONSPD column holding the LSOA code the IMD files refer to. Default is lsoa11.",
+            default="lsoa11",
+        )
+        parser.add_argument(
+            "--imd-lsoa-column",
+            type=str,
+            help="IMD column holding the LSOA code. Default is 'LSOA code (2011)'.",
+            default="LSOA code (2011)",
+        )
+        parser.add_argument(
+            "--imd-decile-column",
+            type=str,
+            help="IMD column holding the IMD decile. Default is 'Index of Multiple Deprivation (IMD) Decile'.",
+            default="Index of Multiple Deprivation (IMD) Decile",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            help="Number of postcodes read and written together. Default is 5000.",
+            default=5000,
+        )
+
+    def handle(self, *args, **options):
+        quintiles = imd_quintiles_by_lsoa(
+            imd_files=options["imd"],
+            lsoa_column=options["imd_lsoa_column"],
+            decile_column=options["imd_decile_column"],
+        )
+        self.stdout.write(f"Read IMD quintiles for {len(quintiles)} LSOAs.")
+
+        update_fields = ["location_wgs84", "location_bng", "updated_at"]
+        if quintiles:
+            # without IMD files, keep the quintiles already stored
+            update_fields.append("index_of_multiple_deprivation_quintile")
+
+        onspd_columns = [
+            "pcds",
+            "lat",
+            "long",
+            "oseast1m",
+            "osnrth1m",
+            options["lsoa_column"],
+        ]
+
+        loaded = 0
+        for chunk in pd.read_csv(
+            options["onspd"],
+            usecols=onspd_columns,
+            chunksize=max(options["batch_size"], 1),
+        ):
+            postcodes = []
+            for pcds, lat, long, easting, northing, lsoa in chunk[
+                onspd_columns
+            ].itertuples(index=False, name=None):
+                has_location = (
+                    pd.notna(lat)
+                    and lat != ONSPD_NO_GRID_REFERENCE_LATITUDE
+                    and pd.notna(easting)
+                    and pd.notna(northing)
+                )
+                postcodes.append(
+                    Postcode(
+                        postcode=normalise_postcode(pcds),
+                        location_wgs84=(
+                            Point(long, lat, srid=4326) if has_location else None
+                        ),
+                        location_bng=(
+                            Point(float(easting), float(northing), srid=27700)
+                            if has_location
+                            else None
+                        ),
+                        index_of_multiple_deprivation_quintile=quintiles.get(lsoa),
+                    )
+                )
+
+            Postcode.objects.bulk_create(
+                postcodes,
+                update_conflicts=True,
+                unique_fields=["postcode"],
+                update_fields=update_fields,
+            )
+            loaded += len(postcodes)
+            self.stdout.write(f"Loaded {loaded} postcodes...")
+
+        # cached lookups may be out of date
+        _postcode_details_from_gazetteer.cache_clear()
+
+        self.stdout.write(f"Loaded {loaded} postcodes into the gazetteer.")
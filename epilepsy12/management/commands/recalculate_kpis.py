@@ -0,0 +1,117 @@
+# python
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# E12
+from ...models import Registration
+from ...common_view_functions import recalculate_kpis_for_registrations
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+
+def _recalculate_kpis_for_batch(registration_ids):
+    """
+    Runs in a worker process. Connections inherited from the parent are not reused - each worker opens its own.
+    """
+    try:
+        return recalculate_kpis_for_registrations(registration_ids)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Rescores the KPIs for every registered child, or for a single cohort, in batches across a pool of processes. Use after a change to the scoring rules."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-ct",
+            "--cohort",
+            nargs="?",
+            type=int,
+            help="Optional parameter. Only rescore children in this cohort. Default is all cohorts.",
+            default=None,
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            help="Number of registrations loaded, scored and written back together. Default is 500.",
+            default=500,
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            help="Number of worker processes. Default is the number of CPUs. Use 1 to run in this process.",
+            default=os.cpu_count() or 1,
+        )
+
+    def handle(self, *args, **options):
+        registrations = Registration.objects.filter(case__isnull=False)
+        if options["cohort"] is not None:
+            registrations = registrations.filter(cohort=options["cohort"])
+
+        registration_ids = list(
+            registrations.order_by("pk").values_list("pk", flat=True)
+        )
+        batch_size = max(options["batch_size"], 1)
+        batches = [
+            registration_ids[start : start + batch_size]
+            for start in range(0, len(registration_ids), batch_size)
+        ]
+        workers = max(min(options["workers"], len(batches)), 1)
+
+        self.stdout.write(
+            f"Rescoring KPIs for {len(registration_ids)} registrations in {len(batches)} batches across {workers} worker(s)..."
+        )
+
+        started = time.monotonic()
+        scored_total = 0
+        failed_total = 0
+        processed = 0
+
+        def report(scored, failed, batch):
+            nonlocal scored_total, failed_total, processed
+            scored_total += scored
+            failed_total += failed
+            processed += len(batch)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{processed}/{len(registration_ids)} registrations processed ({processed / elapsed if elapsed else 0:.0f}/s)"
+            )
+
+        if workers == 1:
+            for batch in batches:
+                scored, failed = recalculate_kpis_for_registrations(batch)
+                report(scored, failed, batch)
+        else:
+            # forked workers must not share the parent's database connection
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = {
+                    executor.submit(_recalculate_kpis_for_batch, batch): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    try:
+                        scored, failed = future.result()
+                    except Exception as error:
+                        logger.exception(f"KPI recalculation batch failed: {error}")
+                        scored, failed = 0, len(futures[future])
+                    report(scored, failed, futures[future])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{scored_total} registrations rescored, {failed_total} failed, in {elapsed:.1f}s."
+        )
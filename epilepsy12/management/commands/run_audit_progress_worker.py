@@ -0,0 +1,65 @@
+# python
+import logging
+import time
+
+# django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# E12
+from ...common_view_functions import process_due_audit_progress_updates
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recalculates AuditProgress and KPIs for forms edited through HTMX, once editing has paused. Runs continuously, polling for pending updates, unless --once is passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--once",
+            action="store_true",
+            help="Optional parameter. Process every update currently due, then exit.",
+            default=False,
+        )
+        parser.add_argument(
+            "-d",
+            "--delay",
+            type=float,
+            help="Seconds a form must be left unedited before it is recalculated. Default is 1.",
+            default=1,
+        )
+        parser.add_argument(
+            "-p",
+            "--poll-interval",
+            type=float,
+            help="Seconds to wait between polls when nothing is due. Default is 0.5.",
+            default=0.5,
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Audit progress worker started...")
+
+        while True:
+            close_old_connections()
+
+            try:
+                processed = process_due_audit_progress_updates(
+                    delay_seconds=options["delay"]
+                )
+            except Exception as error:
+                # never let a database blip kill the worker
+                logger.exception(f"Audit progress worker error: {error}")
+                processed = 0
+
+            if processed:
+                continue
+
+            if options["once"]:
+                break
+
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write("No audit progress updates due. Exiting.")
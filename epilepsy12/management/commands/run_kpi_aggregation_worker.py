@@ -0,0 +1,56 @@
+# python
+import logging
+import time
+
+# django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# E12
+from ...common_view_functions import process_next_kpi_aggregation_job
+
+# Logging setup
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Runs queued KPI aggregation jobs. Runs continuously, polling the queue, unless --once is passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--once",
+            action="store_true",
+            help="Optional parameter. Process every job currently in the queue, then exit.",
+            default=False,
+        )
+        parser.add_argument(
+            "-p",
+            "--poll-interval",
+            type=float,
+            help="Seconds to wait between polls of an empty queue. Default is 2.",
+            default=2,
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("KPI aggregation worker started...")
+
+        while True:
+            close_old_connections()
+
+            try:
+                processed = process_next_kpi_aggregation_job()
+            except Exception as error:
+                # never let a database blip kill the worker
+                logger.exception(f"KPI aggregation worker error: {error}")
+                processed = False
+
+            if processed:
+                continue
+
+            if options["once"]:
+                break
+
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write("KPI aggregation queue empty. Exiting.")
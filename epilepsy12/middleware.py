@@ -1,4 +1,7 @@
+from django.conf import settings
+
 from epilepsy12.models import Epilepsy12User
+from epilepsy12.models_folder.batched_historical_records import batched_history
 
 
 # Middleware to capture user information in request
@@ -12,3 +15,16 @@ class CurrentUserMiddleware:
             Epilepsy12User.updated_by = request.user
         response = self.get_response(request)
         return response
+
+
+# Middleware to write the history rows of a request together once the response is ready
+class HistoryBatchMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.HISTORY_BATCH_WRITES:
+            return self.get_response(request)
+        with batched_history():
+            response = self.get_response(request)
+        return response
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0050_alter_case_unique_together"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KPIAggregationJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cohort", models.PositiveSmallIntegerField()),
+                ("open_access", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Queued"),
+                            (2, "Running"),
+                            (3, "Complete"),
+                            (4, "Failed"),
+                        ],
+                        default=1,
+                    ),
+                ),
+                (
+                    "requested_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, null=True)),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "KPI Aggregation Job",
+                "verbose_name_plural": "KPI Aggregation Jobs",
+                "ordering": ("requested_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "cohort", "open_access"],
+                        name="epilepsy12__status_8e795d_idx",
+                    )
+                ],
+            },
+        ),
+    ]
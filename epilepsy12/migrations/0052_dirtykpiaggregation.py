@@ -0,0 +1,60 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0051_kpiaggregationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DirtyKPIAggregation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cohort", models.PositiveSmallIntegerField()),
+                (
+                    "abstraction_level",
+                    models.CharField(
+                        choices=[
+                            ("ORGANISATION", "ORGANISATION"),
+                            ("TRUST", "TRUST"),
+                            ("LOCAL_HEALTH_BOARD", "LOCAL_HEALTH_BOARD"),
+                            ("ICB", "ICB"),
+                            ("NHS_ENGLAND_REGION", "NHS_ENGLAND_REGION"),
+                            ("OPEN_UK", "OPEN_UK"),
+                            ("COUNTRY", "COUNTRY"),
+                            ("NATIONAL", "NATIONAL"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "abstraction_code",
+                    models.CharField(blank=True, default="", max_length=100),
+                ),
+                ("marked_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Dirty KPI Aggregation",
+                "verbose_name_plural": "Dirty KPI Aggregations",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("cohort", "abstraction_level", "abstraction_code"),
+                        name="unique_dirty_kpi_aggregation_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
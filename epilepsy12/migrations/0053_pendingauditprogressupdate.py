@@ -0,0 +1,74 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0052_dirtykpiaggregation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingAuditProgressUpdate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "form",
+                    models.CharField(
+                        choices=[
+                            ("registration", "Registration"),
+                            (
+                                "first_paediatric_assessment",
+                                "FirstPaediatricAssessment",
+                            ),
+                            ("epilepsy_context", "EpilepsyContext"),
+                            ("multiaxial_diagnosis", "MultiaxialDiagnosis"),
+                            ("assessment", "Assessment"),
+                            ("investigations", "Investigations"),
+                            ("management", "Management"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "requested_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "registration",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_audit_progress_updates",
+                        to="epilepsy12.registration",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pending Audit Progress Update",
+                "verbose_name_plural": "Pending Audit Progress Updates",
+                "indexes": [
+                    models.Index(
+                        fields=["requested_at"], name="epilepsy12__request_107c60_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("registration", "form"),
+                        name="unique_pending_audit_progress_update",
+                    )
+                ],
+            },
+        ),
+    ]
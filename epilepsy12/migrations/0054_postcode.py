@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:25
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0053_pendingauditprogressupdate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Postcode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("postcode", models.CharField(max_length=8, unique=True)),
+                (
+                    "location_wgs84",
+                    django.contrib.gis.db.models.fields.PointField(
+                        blank=True, null=True, srid=4326
+                    ),
+                ),
+                (
+                    "location_bng",
+                    django.contrib.gis.db.models.fields.PointField(
+                        blank=True, null=True, srid=27700
+                    ),
+                ),
+                (
+                    "index_of_multiple_deprivation_quintile",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+            ],
+            options={
+                "verbose_name": "Postcode",
+                "verbose_name_plural": "Postcodes",
+                "ordering": ("postcode",),
+            },
+        ),
+    ]
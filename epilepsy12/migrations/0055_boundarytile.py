@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0054_postcode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoundaryTile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("geojson", models.BinaryField()),
+                ("feature_properties", models.JSONField(default=list)),
+                ("etag", models.CharField(max_length=64)),
+            ],
+            options={
+                "verbose_name": "Boundary Tile",
+                "verbose_name_plural": "Boundary Tiles",
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0056_case_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(fields=["surname", "id"], name="case_surname_id"),
+        ),
+        migrations.AddIndex(
+            model_name="site",
+            index=models.Index(
+                fields=[
+                    "organisation",
+                    "site_is_primary_centre_of_epilepsy_care",
+                    "site_is_actively_involved_in_epilepsy_care",
+                ],
+                name="site_organisation_lead_idx",
+            ),
+        ),
+    ]
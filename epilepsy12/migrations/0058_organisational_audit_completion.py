@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0057_case_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicalorganisationalauditsubmission",
+            name="number_completed",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalorganisationalauditsubmission",
+            name="total_questions",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="organisationalauditsubmission",
+            name="number_completed",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="organisationalauditsubmission",
+            name="total_questions",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0058_organisational_audit_completion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pendingauditprogressupdate",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
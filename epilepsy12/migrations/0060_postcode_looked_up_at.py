@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0059_pending_audit_progress_update_claimed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postcode",
+            name="looked_up_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+QUEUED = 1
+FAILED = 4
+
+
+def fail_duplicate_queued_jobs(apps, schema_editor):
+    # before the constraint, concurrent requests could each queue a job - keep the oldest of each
+    KPIAggregationJob = apps.get_model("epilepsy12", "KPIAggregationJob")
+    kept = set()
+    for job in KPIAggregationJob.objects.filter(status=QUEUED).order_by("requested_at"):
+        if (job.cohort, job.open_access) in kept:
+            job.status = FAILED
+            job.error = "Coalesced into an earlier queued aggregation."
+            job.save(update_fields=["status", "error"])
+        else:
+            kept.add((job.cohort, job.open_access))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("epilepsy12", "0060_postcode_looked_up_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_queued_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="kpiaggregationjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", 1)),
+                fields=("cohort", "open_access"),
+                name="unique_queued_kpi_aggregation_job",
+            ),
+        ),
+    ]
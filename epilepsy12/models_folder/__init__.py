@@ -39,6 +39,14 @@ from .visitactivity import VisitActivity
 # This stores the results of aggregations of the KPI model for different levels of abstraction
 from .kpi_aggregation import *
 
+# This is the queue of KPI aggregation requests consumed by the aggregation worker
+from .kpi_aggregation_job import KPIAggregationJob
+from .dirty_kpi_aggregation import DirtyKPIAggregation
+from .pending_audit_progress_update import PendingAuditProgressUpdate
+
+# Simplified boundaries served to the choropleth maps
+from .boundary_tile import BoundaryTile
+
 # These are helper classes to support the functioning of each model. Do not need to be globally available
 from .time_and_user_abstract_base_classes import (
     TimeStampAbstractBaseClass,
@@ -70,6 +78,7 @@ from .entities.nhs_england_region import NHSEnglandRegion
 from .entities.organisation import Organisation
 from .entities.trust import Trust
 from .entities.local_health_board import LocalHealthBoard
+from .entities.postcode import Postcode
 
 from .organisational_audit import (
     OrganisationalAuditSubmissionPeriod,
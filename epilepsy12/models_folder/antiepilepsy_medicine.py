@@ -1,6 +1,6 @@
 from django.contrib.gis.db import models
 from django.forms import ValidationError
-from simple_history.models import HistoricalRecords
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from .time_and_user_abstract_base_classes import *
 
@@ -78,7 +78,7 @@ class AntiEpilepsyMedicine(
         blank=True,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -2,7 +2,7 @@ from datetime import date
 from dateutil.relativedelta import relativedelta
 
 from django.contrib.gis.db import models
-from simple_history.models import HistoricalRecords
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 
 from epilepsy12.general_functions import stringify_time_elapsed
@@ -165,7 +165,7 @@ class Assessment(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTex
         null=True,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -0,0 +1,118 @@
+# python
+from contextlib import contextmanager
+
+# django
+from django.db import connections, router
+from django.utils import timezone
+
+# 3rd party
+from simple_history.models import HistoricalRecords
+from simple_history.signals import (
+    pre_create_historical_record,
+    post_create_historical_record,
+)
+
+"""
+History records which can be written in batches.
+Inside batched_history() (opened for each request by HistoryBatchMiddleware if settings.HISTORY_BATCH_WRITES is set),
+the history rows of saves made outside a transaction are held back, and inserted with one bulk_create per history
+table when the batch closes, rather than with an INSERT after every save.
+Saves made inside a transaction (atomic blocks) still write their history immediately, in the same transaction, so
+history is never written for changes which are rolled back.
+"""
+
+
+class BatchedHistoricalRecords(HistoricalRecords):
+    def create_historical_record(self, instance, history_type, using=None):
+        batch = getattr(self.context, "history_batch", None)
+        write_db = using or router.db_for_write(instance.__class__, instance=instance)
+        if (
+            batch is None
+            or connections[write_db].in_atomic_block
+            or self.m2m_fields
+            or getattr(instance, self.m2m_fields_model_field_name, None)
+        ):
+            return super().create_historical_record(instance, history_type, using)
+
+        using = using if self.use_base_model_db else None
+        history_date = getattr(instance, "_history_date", timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, using
+        )
+        manager = getattr(instance, self.manager_name)
+
+        attrs = {}
+        for field in self.fields_included(instance):
+            attrs[field.attname] = getattr(instance, field.attname)
+
+        relation_field = getattr(manager.model, "history_relation", None)
+        if relation_field is not None:
+            attrs["history_relation"] = instance
+
+        history_instance = manager.model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+
+        pre_create_historical_record.send(
+            sender=manager.model,
+            instance=instance,
+            history_date=history_date,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            history_instance=history_instance,
+            using=using,
+        )
+
+        batch.append((instance, history_instance, using))
+
+
+def flush_history_batch(batch):
+    """
+    Inserts the history rows held in a batch, in order, with one bulk_create per history table
+    """
+    by_history_model = {}
+    for instance, history_instance, using in batch:
+        by_history_model.setdefault((history_instance.__class__, using), []).append(
+            (instance, history_instance)
+        )
+
+    for (history_model, using), rows in by_history_model.items():
+        history_model.objects.using(using).bulk_create(
+            [history_instance for _, history_instance in rows]
+        )
+        for instance, history_instance in rows:
+            post_create_historical_record.send(
+                sender=history_model,
+                instance=instance,
+                history_instance=history_instance,
+                history_date=history_instance.history_date,
+                history_user=history_instance.history_user,
+                history_change_reason=history_instance.history_change_reason,
+                using=using,
+            )
+
+
+@contextmanager
+def batched_history():
+    """
+    Holds back the history rows of saves made outside a transaction until the block exits, then writes them together.
+    Nested blocks are written when the outermost block exits.
+    """
+    context = HistoricalRecords.context
+    if getattr(context, "history_batch", None) is not None:
+        # already batching
+        yield
+        return
+
+    context.history_batch = []
+    try:
+        yield
+    finally:
+        batch = context.history_batch
+        del context.history_batch
+        flush_history_batch(batch)
@@ -0,0 +1,30 @@
+# django
+from django.contrib.gis.db import models
+
+# E12
+from .time_and_user_abstract_base_classes import TimeStampAbstractBaseClass
+
+
+class BoundaryTile(TimeStampAbstractBaseClass):
+    """
+    Simplified WGS 84 GeoJSON of the boundaries for a level of abstraction, used by the choropleth maps.
+    Built from the full resolution boundaries once (manage.py build_boundary_tiles, or on first use) and stored gzipped,
+    so no geometry is serialised when a map is drawn. The browser fetches the tile itself, revalidating with the etag.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+
+    # gzipped GeoJSON FeatureCollection
+    geojson = models.BinaryField()
+
+    # properties of each feature, in the order of the features, so maps can be built without reading the geometry
+    feature_properties = models.JSONField(default=list)
+
+    etag = models.CharField(max_length=64)
+
+    class Meta:
+        verbose_name = "Boundary Tile"
+        verbose_name_plural = "Boundary Tiles"
+
+    def __str__(self) -> str:
+        return self.name
@@ -5,13 +5,12 @@ from datetime import date
 # django
 from django.contrib.gis.db import models
 from django.contrib.gis.db.models import CharField, DateField, PointField
-from django.contrib.gis.geos import Point
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.conf import settings
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # epilepsy12
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from ..constants import (
     SEX_TYPE,
@@ -23,8 +22,8 @@ from ..constants import (
     CAN_CONSENT_TO_AUDIT_PARTICIPATION,
 )
 from ..general_functions import (
-    imd_for_postcode,
-    coordinates_for_postcode,
+    normalise_postcode,
+    postcode_details,
     stringify_time_elapsed,
 )
 from .time_and_user_abstract_base_classes import *
@@ -140,7 +139,7 @@ class Case(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextMixin
         null=True,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     # relationships
     organisations = models.ManyToManyField(
@@ -186,7 +185,35 @@ class Case(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextMixin
         
         return self.registration.days_remaining_before_submission > 0
 
-    def save(self, *args, **kwargs) -> None:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored postcode, so save only looks it up again if it changes
+        if "postcode" in field_names:
+            instance._stored_postcode = values[field_names.index("postcode")]
+        return instance
+
+    def postcode_details_need_updating(self) -> bool:
+        """
+        Returns True if the postcode has changed since the case was loaded, or its location or deprivation
+        quintile could not be found last time it was saved. The postcode is then looked up in the gazetteer, which
+        only asks the remote services again once REMOTE_LOOKUP_RETRY_INTERVAL has passed since they last failed.
+        """
+        return (
+            self.postcode != getattr(self, "_stored_postcode", None)
+            or self.index_of_multiple_deprivation_quintile is None
+            or (
+                self.location_wgs84 is None
+                and not self.postcode.lower().startswith("je")
+            )
+        )
+
+    def update_postcode_details(self, details=None) -> None:
+        """
+        Normalises the postcode and sets the index of multiple deprivation quintile and location from it, if the
+        postcode has changed. Called on save. Callers creating cases with bulk_create, which does not call save,
+        look up postcodes in batch (postcodes_details) and pass in the details for each case.
+        """
         # calculate the index of multiple deprivation quintile if the postcode is present
         # Skips the calculation if the postcode is on the 'unknown' list
         if self.postcode:
@@ -195,58 +222,32 @@ class Case(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextMixin
                 not in UNKNOWN_POSTCODES_NO_SPACES
             ):
                 # capitalize all characters, remove dashes and spaces
-                self.postcode = (
-                    str(self.postcode).replace(" ", "").replace("-", "").upper()
-                )
+                self.postcode = normalise_postcode(self.postcode)
 
-                # get IMD for postcode from census platform: note, assumes postcode is valid
-                try:
-                    self.index_of_multiple_deprivation_quintile = imd_for_postcode(
-                        self.postcode
-                    )
-                except Exception as error:
-                    # Deprivation score not persisted if deprivation score server down
-                    self.index_of_multiple_deprivation_quintile = None
-                    logger.exception(
-                        f"Cannot calculate deprivation score for {self.postcode}: {error}"
+                if self.postcode_details_need_updating():
+                    # get IMD and coordinates from the local postcode gazetteer, falling back to the census platform
+                    # and postcode API: note, assumes postcode is valid.
+                    # Deprivation score and location are not persisted if they cannot be found.
+                    if details is None:
+                        details = postcode_details(self.postcode)
+
+                    self.index_of_multiple_deprivation_quintile = (
+                        details.index_of_multiple_deprivation_quintile
                     )
-                    pass
 
-                # update the longitude and latitude
-                """
-                The SRID (Spatial Reference System Identifier) 27700 refers to the British National Grid (BNG), a common system used for mapping in the UK. It uses Eastings and Northings, rather than longitude & latitude.
-                This system is different from the more common geographic coordinate systems like WGS 84 (SRID 4326), which is used by most global datasets including GPS and many web APIs.
-                Coordinates from the ONS data therefore need transforming from WGS 84 (SRID 4326) to British National Grid (SRID 27700).
-                Both are included here and stored in the model, as the shape files for the UK health boundaries are produced as BNG, rather than WGS84.
-                """
-                try:
-                    # If the postcode begins with JE, it is a Jersey postcode. Skip the coordinates lookup.
+                    # update the longitude and latitude
+                    """
+                    The SRID (Spatial Reference System Identifier) 27700 refers to the British National Grid (BNG), a common system used for mapping in the UK. It uses Eastings and Northings, rather than longitude & latitude.
+                    This system is different from the more common geographic coordinate systems like WGS 84 (SRID 4326), which is used by most global datasets including GPS and many web APIs.
+                    Both are included here and stored in the model, as the shape files for the UK health boundaries are produced as BNG, rather than WGS84.
+                    """
+                    # If the postcode begins with JE, it is a Jersey postcode. Skip the coordinates.
                     if self.postcode.lower().startswith("je"):
                         self.location_wgs84 = None
                         self.location_bng = None
-                        return super().save(*args, **kwargs)
-
-                    # Fetch the coordinates (WGS 84)
-                    lon, lat = coordinates_for_postcode(postcode=self.postcode)
-
-                    # Create a Point in WGS 84
-                    point_wgs84 = Point(lon, lat, srid=4326)
-                    # Assign the transformed point to self.location
-                    self.location_wgs84 = point_wgs84
-
-                    # Transform to British National Grid (SRID 27700) - this has Eastings and Northings, rather than longitude and latitude.
-                    point_bng = point_wgs84.transform(27700, clone=True)
-
-                    # Assign the transformed point to self.location
-                    self.location_bng = point_bng
-
-                except Exception as error:
-                    self.location_wgs84 = None
-                    self.location_bng = None
-                    logger.exception(
-                        f"Cannot get longitude and latitude for {self.postcode}: {error}"
-                    )
-                    pass
+                    else:
+                        self.location_wgs84 = details.location_wgs84
+                        self.location_bng = details.location_bng
             else:
                 # if the IMD quintile has previously been added and postcode now unknown, set
                 # index_of_multiple_deprivation_quintile back to None
@@ -254,7 +255,10 @@ class Case(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextMixin
                 self.location_wgs84 = None
                 self.location_bng = None
 
-        return super().save(*args, **kwargs)
+    def save(self, *args, **kwargs) -> None:
+        self.update_postcode_details()
+        super().save(*args, **kwargs)
+        self._stored_postcode = self.postcode
 
     def delete(self, *args, **kwargs):
         # Deleting a Case involves deleting any registrations associated that exist first
@@ -276,6 +280,29 @@ class Case(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextMixin
             CAN_CONSENT_TO_AUDIT_PARTICIPATION,
         ]
         ordering = ["surname"]
+        indexes = [
+            # trigram indexes for the case list search (search_cases), which matches with icontains - UPPER(field) LIKE
+            GinIndex(
+                OpClass(Upper("first_name"), name="gin_trgm_ops"),
+                name="case_first_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("surname"), name="gin_trgm_ops"),
+                name="case_surname_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("unique_reference_number"), name="gin_trgm_ops"),
+                name="case_urn_trgm",
+            ),
+            # for NHS numbers searched by prefix (startswith)
+            models.Index(
+                fields=["nhs_number"],
+                opclasses=["varchar_pattern_ops"],
+                name="case_nhs_number_prefix",
+            ),
+            # the case list is sorted by surname by default, and paged by keyset on (surname, id)
+            models.Index(fields=["surname", "id"], name="case_surname_id"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.surname}"
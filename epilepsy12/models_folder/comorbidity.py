@@ -1,10 +1,8 @@
 # django
 from django.contrib.gis.db import models
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # RCPCH
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from .time_and_user_abstract_base_classes import *
 
@@ -30,7 +28,7 @@ class Comorbidity(
         null=True,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -0,0 +1,39 @@
+# django
+from django.contrib.gis.db import models
+from django.utils import timezone
+
+# RCPCH imports
+from epilepsy12.constants import EnumAbstractionLevel
+
+
+class DirtyKPIAggregation(models.Model):
+    """
+    Marks a KPIAggregation bucket (one abstraction level entity in one cohort) as needing recalculation.
+    A mark is created by calculate_kpis each time a child's KPI scores are updated, for every level of abstraction
+    the child's organisation belongs to. update_dirty_kpi_agg_models rebuilds only the marked buckets and clears the marks.
+    abstraction_code is the value of the EnumAbstractionLevel lookup for the bucket (eg the trust ods_code) and is empty for the national bucket.
+    """
+
+    cohort = models.PositiveSmallIntegerField()
+
+    abstraction_level = models.CharField(
+        max_length=50,
+        choices=[(level.name, level.name) for level in EnumAbstractionLevel],
+    )
+
+    abstraction_code = models.CharField(max_length=100, blank=True, default="")
+
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cohort", "abstraction_level", "abstraction_code"],
+                name="unique_dirty_kpi_aggregation_bucket",
+            )
+        ]
+        verbose_name = "Dirty KPI Aggregation"
+        verbose_name_plural = "Dirty KPI Aggregations"
+
+    def __str__(self) -> str:
+        return f"Dirty {self.abstraction_level} KPIAggregation {self.abstraction_code} (Cohort {self.cohort})"
@@ -1,10 +1,8 @@
 # django
 from django.contrib.gis.db import models
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # RCPCH
+from ..batched_historical_records import BatchedHistoricalRecords
 from ..time_and_user_abstract_base_classes import *
 
 
@@ -18,7 +16,7 @@ class ComorbidityList(TimeStampAbstractBaseClass, UserStampAbstractBaseClass):
     term = models.CharField(default=None, null=True, blank=True)
     preferredTerm = models.CharField(default=None, null=True, blank=True)
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
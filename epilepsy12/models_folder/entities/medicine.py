@@ -1,10 +1,8 @@
 # django
 from django.contrib.gis.db import models
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from ..batched_historical_records import BatchedHistoricalRecords
 from ..help_text_mixin import HelpTextMixin
 from ..time_and_user_abstract_base_classes import *
 
@@ -28,7 +26,7 @@ class Medicine(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextM
     preferredTerm = models.CharField(default=None, null=True, blank=True)
     is_rescue = models.BooleanField(default=None, null=True, blank=True)
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
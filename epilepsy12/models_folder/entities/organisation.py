@@ -10,8 +10,8 @@ from django.contrib.gis.geos import Point
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 
-# 3rd party
-from simple_history.models import HistoricalRecords
+# rcpch
+from ..batched_historical_records import BatchedHistoricalRecords
 from ..time_and_user_abstract_base_classes import TimeStampAbstractBaseClass
 
 
@@ -92,7 +92,7 @@ class Organisation(TimeStampAbstractBaseClass):
         to="epilepsy12.Country", on_delete=models.PROTECT, null=True, blank=True
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -0,0 +1,44 @@
+from django.contrib.gis.db import models
+from ..time_and_user_abstract_base_classes import TimeStampAbstractBaseClass
+
+
+class Postcode(TimeStampAbstractBaseClass):
+    """
+    Local postcode gazetteer, loaded from ONS Postcode Directory (ONSPD) and Index of Multiple Deprivation CSV files
+    (manage.py load_postcode_gazetteer) and topped up with any postcode looked up remotely.
+    Postcodes are stored upper case without spaces, as they are in Case.
+    """
+
+    postcode = models.CharField(max_length=8, unique=True)
+
+    location_wgs84 = models.PointField(
+        srid=4326,
+        blank=True,
+        null=True,
+    )
+
+    location_bng = models.PointField(
+        srid=27700,
+        blank=True,
+        null=True,
+    )
+
+    index_of_multiple_deprivation_quintile = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+    )
+
+    # when the postcode API and census platform were last asked for anything missing here - they are not asked again
+    # until the retry interval has passed, so a postcode they cannot find does not cost two HTTP requests on every save
+    looked_up_at = models.DateTimeField(
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = "Postcode"
+        verbose_name_plural = "Postcodes"
+        ordering = ("postcode",)
+
+    def __str__(self) -> str:
+        return self.postcode
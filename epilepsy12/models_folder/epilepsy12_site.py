@@ -1,10 +1,8 @@
 # django
 from django.contrib.gis.db import models
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from .time_and_user_abstract_base_classes import *
 from ..constants import (
     CAN_ALLOCATE_EPILEPSY12_LEAD_CENTRE,
@@ -51,7 +49,7 @@ class Site(TimeStampAbstractBaseClass, UserStampAbstractBaseClass):
     )
     transfer_request_date = models.DateField(blank=True, null=True, default=None)
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     # relationships
     # Site is a link table between Case and Organisation in a many to many relationship
@@ -87,6 +85,17 @@ class Site(TimeStampAbstractBaseClass, UserStampAbstractBaseClass):
             CAN_EDIT_EPILEPSY12_LEAD_CENTRE,
             CAN_DELETE_EPILEPSY12_LEAD_CENTRE,
         ]
+        indexes = [
+            # the case list filters cases by the organisation of their lead site
+            models.Index(
+                fields=[
+                    "organisation",
+                    "site_is_primary_centre_of_epilepsy_care",
+                    "site_is_actively_involved_in_epilepsy_care",
+                ],
+                name="site_organisation_lead_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.organisation.trust.name if self.organisation.trust else self.organisation.local_health_board.name # Welsh orgs have no Trust
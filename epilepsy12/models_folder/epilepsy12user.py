@@ -11,10 +11,8 @@ from django.contrib.gis.db import models
 from django.db.models.functions import Lower
 from django.contrib.gis.db.models import UniqueConstraint
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from epilepsy12.common_view_functions.group_for_group import group_for_role
 from epilepsy12.constants.user_types import (
     ROLES,
@@ -206,7 +204,7 @@ class Epilepsy12User(AbstractUser, PermissionsMixin):
         related_name="updated_users",
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     REQUIRED_FIELDS = ["role", "first_name", "surname", "is_rcpch_audit_team_member"]
     USERNAME_FIELD = "email"
@@ -1,10 +1,8 @@
 # django
 from django.contrib.gis.db import models
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from ..constants import OPT_OUT_UNCERTAIN
 from .time_and_user_abstract_base_classes import *
@@ -97,7 +95,7 @@ class EpilepsyContext(
         choices=OPT_OUT_UNCERTAIN,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -2,10 +2,8 @@
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import ArrayField
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from ..constants import (
     DATE_ACCURACY,
@@ -277,7 +275,7 @@ class Episode(TimeStampAbstractBaseClass, UserStampAbstractBaseClass, HelpTextMi
         max_length=250, default=None, null=True, blank=True
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
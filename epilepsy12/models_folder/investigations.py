@@ -6,9 +6,9 @@ from dateutil.relativedelta import relativedelta
 
 # 3rd party
 from django.contrib.gis.db import models
-from simple_history.models import HistoricalRecords
 
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from ..general_functions import stringify_time_elapsed
 from .time_and_user_abstract_base_classes import *
@@ -96,7 +96,7 @@ class Investigations(
         blank=True,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
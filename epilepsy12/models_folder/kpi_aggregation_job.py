@@ -0,0 +1,65 @@
+# django
+from django.contrib.gis.db import models
+from django.utils import timezone
+
+
+class KPIAggregationJob(models.Model):
+    """
+    A request to rerun the KPI aggregations for a cohort.
+    The web tier creates these records and the KPI aggregation worker
+    (manage.py run_kpi_aggregation_worker) picks them up and runs update_all_kpi_agg_models.
+    Requests for the same cohort and access level that are still queued are coalesced into a single run.
+    """
+
+    QUEUED = 1
+    RUNNING = 2
+    COMPLETE = 3
+    FAILED = 4
+
+    STATUS = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (COMPLETE, "Complete"),
+        (FAILED, "Failed"),
+    )
+
+    cohort = models.PositiveSmallIntegerField()
+
+    # True if the aggregation is a publication to the public facing site
+    open_access = models.BooleanField(default=False)
+
+    status = models.PositiveSmallIntegerField(choices=STATUS, default=QUEUED)
+
+    requested_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    requested_by = models.ForeignKey(
+        "epilepsy12.Epilepsy12User",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+
+    error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # requests for the same cohort and access level are coalesced into the one queued job
+            models.UniqueConstraint(
+                fields=["cohort", "open_access"],
+                condition=models.Q(status=1),  # QUEUED
+                name="unique_queued_kpi_aggregation_job",
+            )
+        ]
+        indexes = [models.Index(fields=["status", "cohort", "open_access"])]
+        verbose_name = "KPI Aggregation Job"
+        verbose_name_plural = "KPI Aggregation Jobs"
+        ordering = ("requested_at",)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in [self.COMPLETE, self.FAILED]
+
+    def __str__(self) -> str:
+        return f"KPI aggregation for cohort {self.cohort} ({'published' if self.open_access else 'private'}) - {self.get_status_display()}"
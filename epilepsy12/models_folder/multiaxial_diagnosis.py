@@ -2,10 +2,8 @@
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import ArrayField
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from epilepsy12.constants import NEUROPSYCHIATRIC, SEVERITY
 from .help_text_mixin import HelpTextMixin
 from .time_and_user_abstract_base_classes import *
@@ -126,7 +124,7 @@ class MultiaxialDiagnosis(
         null=True,
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
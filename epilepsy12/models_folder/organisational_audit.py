@@ -1,7 +1,7 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.gis.db import models
 
-from simple_history.models import HistoricalRecords
+from .batched_historical_records import BatchedHistoricalRecords
 import multiselectfield
 
 from .entities.trust import Trust
@@ -61,10 +61,15 @@ class OrganisationalAuditSubmission(TimeStampAbstractBaseClass, UserStampAbstrac
     # or
     local_health_board = models.ForeignKey(LocalHealthBoard, null=True, on_delete=models.SET_NULL)
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     submitted = models.BooleanField(default=False)
 
+    # Kept up to date as each question is saved, so the progress of the form is not recounted on every answer.
+    # Null until first counted (eg submissions imported from the old system).
+    number_completed = models.PositiveIntegerField(null=True, blank=True)
+    total_questions = models.PositiveIntegerField(null=True, blank=True)
+
     @property
     def _history_user(self):
         return self.updated_by
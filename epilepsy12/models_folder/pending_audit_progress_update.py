@@ -0,0 +1,50 @@
+# django
+from django.contrib.gis.db import models
+from django.utils import timezone
+
+# the audit form models whose completion is tracked in AuditProgress, keyed by their underscored verbose name
+AUDIT_PROGRESS_FORMS = [
+    ("registration", "Registration"),
+    ("first_paediatric_assessment", "FirstPaediatricAssessment"),
+    ("epilepsy_context", "EpilepsyContext"),
+    ("multiaxial_diagnosis", "MultiaxialDiagnosis"),
+    ("assessment", "Assessment"),
+    ("investigations", "Investigations"),
+    ("management", "Management"),
+]
+
+
+class PendingAuditProgressUpdate(models.Model):
+    """
+    Marks an audit form of a registration as needing its AuditProgress (and KPIs) recalculated.
+    A mark is created after each HTMX field update. Repeated edits to the same form refresh requested_at rather than adding rows,
+    and the worker (manage.py run_audit_progress_worker) only picks a mark up once it has been left alone for a short delay,
+    so a clinician tabbing through a form triggers one recalculation rather than one per field.
+    """
+
+    registration = models.ForeignKey(
+        "epilepsy12.Registration",
+        on_delete=models.CASCADE,
+        related_name="pending_audit_progress_updates",
+    )
+
+    form = models.CharField(max_length=50, choices=AUDIT_PROGRESS_FORMS)
+
+    requested_at = models.DateTimeField(default=timezone.now)
+
+    # set while a worker recalculates the form - the mark is only deleted once the recalculation succeeds
+    claimed_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["registration", "form"],
+                name="unique_pending_audit_progress_update",
+            )
+        ]
+        indexes = [models.Index(fields=["requested_at"])]
+        verbose_name = "Pending Audit Progress Update"
+        verbose_name_plural = "Pending Audit Progress Updates"
+
+    def __str__(self) -> str:
+        return f"Pending {self.form} progress update for registration {self.registration_id}"
@@ -5,10 +5,8 @@ from dateutil.relativedelta import relativedelta
 # django
 from django.contrib.gis.db import models
 
-# 3rd party
-from simple_history.models import HistoricalRecords
-
 # rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 from .help_text_mixin import HelpTextMixin
 from ..constants import (
     CAN_APPROVE_ELIGIBILITY,
@@ -65,7 +63,7 @@ class Registration(
 
     cohort = models.PositiveSmallIntegerField(default=None, null=True)
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -2,8 +2,8 @@
 from django.contrib.gis.db import models
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-# 3rd party
-from simple_history.models import HistoricalRecords
+# rcpch
+from .batched_historical_records import BatchedHistoricalRecords
 
 
 class Keyword(models.Model):
@@ -17,7 +17,7 @@ class Keyword(models.Model):
         max_length=100
     )
 
-    history = HistoricalRecords()
+    history = BatchedHistoricalRecords()
 
     @property
     def _history_user(self):
@@ -1,10 +1,16 @@
+from functools import cache
 import logging
 
+import numpy as np
 import pandas as pd
 
+from django.contrib.gis.db import models
+from django.db import transaction
+from django.db.models import Value
 from django.forms.fields import TypedChoiceField
 
 from multiselectfield.forms.fields import MultiSelectFormField 
+from simple_history.utils import bulk_create_with_history
 
 from .models import (
     OrganisationalAuditSubmission,
@@ -85,52 +91,156 @@ MULTISELECT_FIELD_MAPPINGS = {
     }
 }
 
-def adapt_multiselect_field(row, choices_to_column):
-    return [key for key, value in choices_to_column.items() if row[value] == 1]
+def adapt_multiselect_columns(data, choices_to_column):
+    # One column per choice, 1 where the choice was selected - columns missing from the file count as not selected
+    selected = pd.DataFrame(
+        {
+            choice: data[column] == 1 if column in data else False
+            for choice, column in choices_to_column.items()
+        },
+        index=data.index,
+    )
 
-def import_submissions_from_csv(submission_period, file):
-    data = pd.read_csv(file)
+    # Join the selected choices of each row in one pass rather than row by row
+    joined = selected.dot(pd.Index([f"{choice}," for choice in selected.columns]))
 
-    for _, row in data.iterrows():
-        ods_code = row["SiteCode"]
+    return joined.map(lambda choices: choices.rstrip(",").split(",") if choices else [])
 
-        submission = OrganisationalAuditSubmission()
-        submission.submission_period = submission_period
 
-        try:
-            submission.trust = Trust.objects.get(ods_code=row["SiteCode"])
-        except Trust.DoesNotExist:
-            submission.local_health_board = LocalHealthBoard.objects.get(ods_code=row["SiteCode"])
-        
-        field_types = { field.name: type(field.field) for field in OrganisationalAuditSubmissionForm() }
+@cache
+def submission_form_fields():
+    # Form field types and model fields of the submission, built once rather than for every row imported
+    form_field_types = {field.name: type(field.field) for field in OrganisationalAuditSubmissionForm()}
+    model_fields = {name: OrganisationalAuditSubmission._meta.get_field(name) for name in form_field_types}
 
-        #######################
-        # Single value fields #
-        #######################
+    return form_field_types, model_fields
 
-        for column, raw_value in row.to_dict().items():
-            if column in field_types and field_types[column] is not MultiSelectFormField:
-                value = None if pd.isnull(raw_value) else raw_value
 
-                # Special case - choice fields need integer values not decimal
-                if type(value) == float and field_types[column] == TypedChoiceField:
-                    value = int(value)
+def sites_by_ods_code(ods_codes):
+    # Resolves all the site codes in one query - trusts are preferred where a code is both
+    sites = (
+        Trust.objects.filter(ods_code__in=ods_codes)
+        .annotate(site_type=Value("trust"))
+        .values_list("ods_code", "id", "site_type")
+        .order_by()
+        .union(
+            LocalHealthBoard.objects.filter(ods_code__in=ods_codes)
+            .annotate(site_type=Value("local_health_board"))
+            .values_list("ods_code", "id", "site_type")
+            .order_by()
+        )
+    )
 
-                # Special case - NA parses as NaN
-                if column == "S02TFC223" and pd.isna(raw_value):
-                    value = 'NA'
+    sites_by_code = {}
 
-                setattr(submission, column, value)
+    for ods_code, site_id, site_type in sorted(sites, key=lambda site: site[2] == "trust"):
+        sites_by_code[ods_code] = (site_type, site_id)
 
-        ######################
-        # Multiselect fields #
-        ######################      
+    return sites_by_code
 
-        for field, mapping in MULTISELECT_FIELD_MAPPINGS.items():
-            values = adapt_multiselect_field(row, mapping)
-            setattr(submission, field, values)
 
-        submission.save()
+def adapt_single_value_column(column, values, form_field_type):
+    # Special case - NA parses as NaN
+    if column == "S02TFC223":
+        values = values.fillna("NA")
+
+    # Special case - choice fields need integer values not decimal
+    if form_field_type is TypedChoiceField and pd.api.types.is_float_dtype(values):
+        values = np.trunc(values).astype("Int64")
+
+    return values.astype(object).where(values.notna(), None)
+
+
+def invalid_values(values, model_field):
+    # Rows with values which can't be saved to the field
+    present = values.notna()
+
+    if model_field.choices:
+        valid_choices = [str(choice) for choice, _ in model_field.flatchoices]
+        return present & ~values.astype(str).isin(valid_choices)
+
+    if isinstance(model_field, (models.DecimalField, models.PositiveIntegerField)):
+        numbers = pd.to_numeric(values, errors="coerce")
+        invalid = numbers.isna() | (numbers < 0)
+        if isinstance(model_field, models.PositiveIntegerField):
+            invalid |= numbers % 1 != 0
+        return present & invalid
+
+    return present & False
+
+
+def import_submissions_from_csv(submission_period, file, dry_run=False):
+    """
+    Imports the submissions in a CSV export from the old system into a submission period.
+    Columns are converted and validated a column at a time, and the submissions created together in one transaction,
+    only if every row is valid. Returns a report of the rows read, problems found and submissions imported.
+    With dry_run the file is validated and nothing is imported.
+    """
+    data = pd.read_csv(file, dtype={"SiteCode": str})
+    data["SiteCode"] = data["SiteCode"].str.strip()
+
+    form_field_types, model_fields = submission_form_fields()
+
+    multiselect_columns = [
+        column for columns in MULTISELECT_FIELD_MAPPINGS.values() for column in columns.values()
+    ]
+
+    report = {
+        "rows": len(data),
+        "unknown_site_codes": [],
+        "invalid_values": {},
+        "missing_columns": [column for column in multiselect_columns if column not in data],
+        "imported": 0,
+    }
+
+    sites_by_code = sites_by_ods_code(data["SiteCode"].dropna().unique().tolist())
+
+    known_site = data["SiteCode"].isin(sites_by_code)
+    report["unknown_site_codes"] = data.loc[~known_site, "SiteCode"].fillna("").unique().tolist()
+
+    #######################
+    # Single value fields #
+    #######################
+
+    fields = {}
+
+    for column in data.columns:
+        if column in form_field_types and form_field_types[column] is not MultiSelectFormField:
+            values = adapt_single_value_column(column, data[column], form_field_types[column])
+
+            invalid = invalid_values(values, model_fields[column])
+            if invalid.any():
+                report["invalid_values"][column] = data.loc[invalid, "SiteCode"].tolist()
+
+            fields[column] = values
+
+    ######################
+    # Multiselect fields #
+    ######################
+
+    for field, mapping in MULTISELECT_FIELD_MAPPINGS.items():
+        fields[field] = adapt_multiselect_columns(data, mapping)
+
+    if dry_run or report["unknown_site_codes"] or report["invalid_values"]:
+        return report
+
+    submissions = []
+
+    for ods_code, row in zip(data["SiteCode"], pd.DataFrame(fields).to_dict("records")):
+        site_type, site_id = sites_by_code[ods_code]
+
+        submission = OrganisationalAuditSubmission(submission_period=submission_period, **row)
+        setattr(submission, f"{site_type}_id", site_id)
+
+        submissions.append(submission)
+
+    with transaction.atomic():
+        bulk_create_with_history(submissions, OrganisationalAuditSubmission, batch_size=500)
+
+    report["imported"] = len(submissions)
+    logger.info(f"Imported {len(submissions)} organisational audit submissions into {submission_period}")
+
+    return report
 
 def export_submission_period_as_csv(submission_period):
     columns = ['SiteName', 'SiteCode']
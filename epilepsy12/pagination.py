@@ -0,0 +1,36 @@
+"""
+Pagination for the API list endpoints
+"""
+
+# Python imports
+
+# Django imports
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
+
+# 3rd party imports
+
+# E12 imports
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: each page is fetched with WHERE <ordering field> > <last value seen> LIMIT page_size,
+    so a page costs the same however deep into the audit it is, and rows are not skipped or repeated if records are
+    added between requests.
+    Ordered by the viewset's ordering (through OrderingFilter, if it uses it), or by primary key if it has none.
+    The ordering should end in pk, so rows with the same values are always returned in the same order.
+    """
+
+    ordering = "pk"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        uses_ordering_filter = any(
+            issubclass(filter_backend, OrderingFilter)
+            for filter_backend in getattr(view, "filter_backends", [])
+        )
+        if not uses_ordering_filter and getattr(view, "ordering", None):
+            return tuple(view.ordering)
+        return super().get_ordering(request, queryset, view)
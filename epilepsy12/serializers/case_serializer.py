@@ -5,6 +5,9 @@
 # DRF imports
 from rest_framework import serializers
 
+# 3rd party imports
+import nhs_number as nhs_number_package
+
 # E12 imports
 from epilepsy12.models import *
 
@@ -33,3 +36,42 @@ class CaseSerializer(serializers.ModelSerializer):
             "organisations",
         ]
         lookup_field = "nhs_number"
+
+
+class BulkCaseSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk case upload. NHS numbers already in the audit, and ODS codes, are checked for the
+    whole upload at once by the view, rather than one query per row here.
+    """
+
+    ods_code = serializers.CharField(write_only=True)
+
+    class Meta:
+        model = Case
+        fields = [
+            "nhs_number",
+            "first_name",
+            "surname",
+            "sex",
+            "date_of_birth",
+            "postcode",
+            "ethnicity",
+            "ods_code",
+        ]
+        extra_kwargs = {
+            # NHS numbers may be supplied with spaces (eg 123 456 7890), which are removed in validation
+            "nhs_number": {
+                "required": True,
+                "allow_null": False,
+                "max_length": 12,
+                "validators": [],
+            }
+        }
+
+    def validate_nhs_number(self, value):
+        formatted_nhs_number = str(value).replace(" ", "").zfill(10)
+        if not nhs_number_package.is_valid(formatted_nhs_number):
+            raise serializers.ValidationError(
+                f"{formatted_nhs_number} is not a valid NHS number"
+            )
+        return formatted_nhs_number
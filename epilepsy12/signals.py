@@ -8,13 +8,31 @@ from django.contrib.auth.signals import (
     user_login_failed,
 )
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import (
+    pre_save,
+    post_init,
+    post_save,
+    post_delete,
+    m2m_changed,
+)
+from django.utils import timezone
 
 # third party
 from two_factor.signals import user_verified
 
 # RCPCH
-from .models import VisitActivity, Epilepsy12User
+from .models import (
+    VisitActivity,
+    Epilepsy12User,
+    Case,
+    Registration,
+    Site,
+)
+from .common_view_functions import (
+    invalidate_case_count_maps,
+    invalidate_organisation_figures,
+    attach_access_scope,
+)
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -28,6 +46,11 @@ def log_user_login(sender, request, user, **kwargs):
     )
 
 
+@receiver(user_logged_in)
+def attach_user_access_scope(sender, request, user, **kwargs):
+    attach_access_scope(request, user)
+
+
 @receiver(user_login_failed)
 def log_user_login_failed(sender, request, user=None, **kwargs):
     if user is not None:
@@ -81,6 +104,29 @@ def set_created_by(sender, instance, created, **kwargs):
         logger.info(f"{instance} ({instance.email}) created by {instance.updated_by}.")
 
 
+@receiver(m2m_changed, sender=Epilepsy12User.groups.through)
+def touch_users_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Updates updated_at of users whose groups change, so their access scope is recomputed
+    """
+    if action == "pre_clear" and reverse:
+        # the users cleared from a group are not known after the clear
+        instance._cleared_user_pks = list(
+            Epilepsy12User.objects.filter(groups=instance).values_list("pk", flat=True)
+        )
+        return
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if reverse:
+        # users added to, removed from or cleared from a group
+        if action == "post_clear":
+            pk_set = getattr(instance, "_cleared_user_pks", [])
+        users = Epilepsy12User.objects.filter(pk__in=pk_set or [])
+    else:
+        users = Epilepsy12User.objects.filter(pk=instance.pk)
+    users.update(updated_at=timezone.now())
+
+
 # Two factor auth receiver
 @receiver(user_verified)
 def two_factor_auth_setup(request, user, device, **kwargs):
@@ -96,6 +142,149 @@ def two_factor_auth_setup(request, user, device, **kwargs):
         )
 
 
+# Organisation dashboard cache invalidation
+
+# the fields the cached case counts depend on, by model
+CASE_COUNT_MAP_FIELDS = {
+    Registration: ["case_id", "cohort", "completed_first_year_of_care_date"],
+    Site: [
+        "case_id",
+        "organisation_id",
+        "site_is_actively_involved_in_epilepsy_care",
+        "site_is_primary_centre_of_epilepsy_care",
+    ],
+}
+
+# the fields the cached organisation figures show, by model
+ORGANISATION_FIGURE_FIELDS = {
+    Case: [
+        "first_name",
+        "surname",
+        "date_of_birth",
+        "sex",
+        "ethnicity",
+        "index_of_multiple_deprivation_quintile",
+        "location_wgs84",
+    ],
+    Registration: ["case_id", "cohort"],
+    Site: CASE_COUNT_MAP_FIELDS[Site],
+}
+
+
+def dashboard_field_values(instance) -> dict:
+    """
+    Returns the values of the fields of an instance the dashboard caches depend on. They are noted when an instance is
+    loaded, so a save only invalidates the caches if one of them has changed.
+    """
+    fields = (
+        CASE_COUNT_MAP_FIELDS.get(type(instance), [])
+        + ORGANISATION_FIGURE_FIELDS[type(instance)]
+    )
+    # read from __dict__, so a deferred field is not loaded - it is left out and so counts as changed
+    return {
+        field: instance.__dict__[field]
+        for field in fields
+        if field in instance.__dict__
+    }
+
+
+def changed_dashboard_fields(stored: dict, current: dict, fields: list) -> bool:
+    return any(
+        field not in stored or stored[field] != current.get(field) for field in fields
+    )
+
+
+def is_lead_site(site_field_values: dict) -> bool:
+    return bool(
+        site_field_values.get("site_is_actively_involved_in_epilepsy_care")
+        and site_field_values.get("site_is_primary_centre_of_epilepsy_care")
+    )
+
+
+def lead_organisation_ids(case_ids) -> set:
+    return set(
+        Site.objects.filter(
+            case_id__in=case_ids,
+            site_is_actively_involved_in_epilepsy_care=True,
+            site_is_primary_centre_of_epilepsy_care=True,
+        ).values_list("organisation_id", flat=True)
+    )
+
+
+def cohorts_of_cases(case_ids) -> set:
+    return set(
+        Registration.objects.filter(case_id__in=case_ids).values_list(
+            "cohort", flat=True
+        )
+    )
+
+
+@receiver(post_init, sender=Case)
+@receiver(post_init, sender=Registration)
+@receiver(post_init, sender=Site)
+def note_dashboard_fields(sender, instance, **kwargs):
+    instance._stored_dashboard_fields = dashboard_field_values(instance)
+
+
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=Registration)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Case)
+@receiver(post_delete, sender=Registration)
+@receiver(post_delete, sender=Site)
+def invalidate_dashboard_on_change(sender, instance, signal, **kwargs):
+    """
+    Invalidates the case counts of the cohorts of a registration whose eligibility changes or whose lead site changes,
+    and the figures of the lead organisations of a case which changes anything they show. Other cohorts and
+    organisations, and changes to anything else, keep their caches.
+    """
+    stored = getattr(instance, "_stored_dashboard_fields", {})
+    current = dashboard_field_values(instance)
+    instance._stored_dashboard_fields = current
+    if signal is post_delete or kwargs.get("created"):
+        # everything the instance showed has changed
+        stored = {}
+
+    case_count_map_changed = changed_dashboard_fields(
+        stored, current, CASE_COUNT_MAP_FIELDS.get(sender, [])
+    )
+    organisation_figures_changed = changed_dashboard_fields(
+        stored, current, ORGANISATION_FIGURE_FIELDS[sender]
+    )
+    if sender is Site and not (is_lead_site(stored) or is_lead_site(current)):
+        return
+    if not (case_count_map_changed or organisation_figures_changed):
+        return
+
+    if sender is Case:
+        case_ids = {instance.pk}
+    else:
+        case_ids = {stored.get("case_id"), current.get("case_id")}
+
+    if sender is Registration:
+        cohorts = {stored.get("cohort"), current.get("cohort")}
+    else:
+        cohorts = cohorts_of_cases(case_ids)
+    cohorts.discard(None)
+
+    if case_count_map_changed:
+        for cohort in cohorts:
+            invalidate_case_count_maps(cohort)
+
+    if organisation_figures_changed:
+        if sender is Site:
+            organisation_ids = {
+                stored.get("organisation_id"),
+                current.get("organisation_id"),
+            }
+            organisation_ids.discard(None)
+        else:
+            organisation_ids = lead_organisation_ids(case_ids)
+        for organisation_id in organisation_ids:
+            for cohort in cohorts or {None}:
+                invalidate_organisation_figures(organisation_id, cohort)
+
+
 # helper functions
 def get_client_ip(request):
     return request.META.get("REMOTE_ADDR")
@@ -507,7 +507,11 @@ def site_contact_email():
 def lead_site_for_case(case):
     """
     Returns all active sites for a given case
+    Uses the lead sites prefetched by the case list (case_list_queryset) if they are there
     """
+    if hasattr(case, "lead_sites"):
+        return case.lead_sites[0] if case.lead_sites else None
+
     site = Site.objects.filter(
         case=case,
         site_is_actively_involved_in_epilepsy_care=True,
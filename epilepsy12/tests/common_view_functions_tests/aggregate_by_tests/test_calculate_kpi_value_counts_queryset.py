@@ -10,6 +10,7 @@ from datetime import date
 from epilepsy12.models import Organisation
 from epilepsy12.common_view_functions import (
     calculate_kpi_value_counts_queryset,
+    calculate_kpi_value_counts_for_all_abstraction_levels,
     get_filtered_cases_queryset_for,
 )
 
@@ -135,3 +136,52 @@ def test_calculate_kpi_value_counts_queryset_all_levels(
             for vc in value_counts:
                 abstraction_code = vc.pop(f"organisation__{abstraction_level.value}")
                 assert vc == expected_scores[abstraction_code]
+
+
+@pytest.mark.django_db
+def test_calculate_kpi_value_counts_for_all_abstraction_levels_matches_queryset(
+    e12_case_factory,
+):
+    """The single pass rollup returns the same value counts as calculate_kpi_value_counts_queryset at every level of abstraction."""
+
+    # Clean
+    _clean_cases_from_test_db()
+
+    # English and Welsh organisations, so some levels of abstraction have no code for some children
+    _register_kpi_scored_cases(
+        e12_case_factory,
+        ods_codes=["RGT01", "RQM01", "7A6AV", "7A3LW"],
+        num_cases=5,
+    )
+
+    filtered_cases = get_filtered_cases_queryset_for(
+        organisation=Organisation.objects.get(ods_code="RGT01"),
+        abstraction_level=EnumAbstractionLevel.NATIONAL,
+        cohort=6,
+    )
+
+    all_value_counts = calculate_kpi_value_counts_for_all_abstraction_levels(
+        filtered_cases=filtered_cases,
+        kpis=[
+            "ecg",
+            "mental_health_support",
+        ],
+    )
+
+    for abstraction_level in EnumAbstractionLevel:
+        expected_value_counts = calculate_kpi_value_counts_queryset(
+            filtered_cases=filtered_cases,
+            abstraction_level=abstraction_level,
+            kpis=[
+                "ecg",
+                "mental_health_support",
+            ],
+        )
+
+        if abstraction_level is EnumAbstractionLevel.NATIONAL:
+            assert all_value_counts[abstraction_level] == expected_value_counts
+        else:
+            abstraction_key = f"organisation__{abstraction_level.value}"
+            assert all_value_counts[abstraction_level] == [
+                vc for vc in expected_value_counts if vc[abstraction_key] is not None
+            ]
@@ -1,11 +1,14 @@
 # python imports
+from datetime import date
 import pytest
 
 # 3rd party imports
+from dateutil.relativedelta import relativedelta
 
 
 # E12 imports
 from epilepsy12.common_view_functions import (
+    cases_demographic_profile,
     cases_aggregated_by_sex,
     cases_aggregated_by_deprivation_score,
     cases_aggregated_by_ethnicity,
@@ -205,3 +208,72 @@ def test_cases_aggregated_by_ethnicity(e12_case_factory):
                 error_msg = f"Expected aggregate count for cases_aggregated_by_ethnicity not matching output: {aggregate=} should be {expected_ethnicity_data=}"
 
                 assert test_condition, error_msg
+
+
+@pytest.mark.django_db
+def test_cases_demographic_profile(e12_case_factory, django_assert_num_queries):
+    """Tests the cases_demographic_profile fn aggregates sex, ethnicity, deprivation and age range in one query."""
+
+    # removes some of the cases which are seeded earlier in the test db
+    _clean_cases_from_test_db()
+
+    # define constants
+    GOSH = Organisation.objects.get(
+        ods_code="RP401",
+        trust__ods_code="RP4",
+    )
+
+    e12_case_factory.create_batch(
+        size=3,
+        sex=SEX_TYPE[1][0],
+        ethnicity=ETHNICITIES[0][0],
+        index_of_multiple_deprivation_quintile=1,
+        date_of_birth=date.today() - relativedelta(years=3),
+        registration=None,  # ensure related audit factories not generated
+        organisations__organisation=GOSH,
+    )
+    e12_case_factory.create_batch(
+        size=2,
+        sex=SEX_TYPE[2][0],
+        ethnicity=ETHNICITIES[1][0],
+        index_of_multiple_deprivation_quintile=None,
+        date_of_birth=date.today() - relativedelta(years=12),
+        registration=None,  # ensure related audit factories not generated
+        organisations__organisation=GOSH,
+    )
+
+    with django_assert_num_queries(1):
+        demographic_profile = cases_demographic_profile(selected_organisation=GOSH)
+
+    assert demographic_profile["sex"] == [
+        {"sex_display": SEX_TYPE[2][1], "sexes": 2},
+        {"sex_display": SEX_TYPE[1][1], "sexes": 3},
+    ]
+    assert demographic_profile["ethnicity"] == [
+        {"ethnicity_display": ETHNICITIES[1][1], "ethnicities": 2},
+        {"ethnicity_display": ETHNICITIES[0][1], "ethnicities": 3},
+    ]
+    assert demographic_profile["deprivation"] == [
+        {
+            "index_of_multiple_deprivation_quintile_display": 1,
+            "cases_aggregated_by_deprivation": 3,
+            "index_of_multiple_deprivation_quintile_display_str": "1st quintile",
+        },
+        {
+            "index_of_multiple_deprivation_quintile_display": 6,
+            "cases_aggregated_by_deprivation": 2,
+            "index_of_multiple_deprivation_quintile_display_str": "Not known",
+        },
+    ]
+    assert demographic_profile["age_range"] == [
+        {
+            "age_range": "eleven_to_eighteen_years",
+            "count": 2,
+            "age_category_label": "11 to 18 years",
+        },
+        {
+            "age_range": "one_to_five_years",
+            "count": 3,
+            "age_category_label": "1 to 5 years",
+        },
+    ]
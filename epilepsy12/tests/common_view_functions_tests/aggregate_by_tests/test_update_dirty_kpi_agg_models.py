@@ -0,0 +1,75 @@
+# python imports
+import pytest
+from datetime import date
+
+# 3rd party imports
+
+# E12 imports
+from epilepsy12.common_view_functions import update_dirty_kpi_agg_models
+from epilepsy12.models import (
+    DirtyKPIAggregation,
+    Trust,
+    TrustKPIAggregation,
+)
+from epilepsy12.constants import EnumAbstractionLevel
+from .helpers import _clean_cases_from_test_db, _register_kpi_scored_cases
+
+
+@pytest.mark.django_db
+def test_calculate_kpis_marks_kpi_aggregations_dirty(e12_case_factory):
+    """Scoring a child's KPIs marks every bucket their organisation contributes to."""
+
+    _clean_cases_from_test_db()
+    DirtyKPIAggregation.objects.all().delete()
+
+    _register_kpi_scored_cases(e12_case_factory, ods_codes=["RGT01"], num_cases=1)
+
+    dirty_buckets = set(
+        DirtyKPIAggregation.objects.filter(cohort=6).values_list(
+            "abstraction_level", "abstraction_code"
+        )
+    )
+
+    assert (EnumAbstractionLevel.ORGANISATION.name, "RGT01") in dirty_buckets
+    assert (EnumAbstractionLevel.TRUST.name, "RGT") in dirty_buckets
+    assert (EnumAbstractionLevel.COUNTRY.name, "E92000001") in dirty_buckets
+    assert (EnumAbstractionLevel.NATIONAL.name, "") in dirty_buckets
+    # English organisations have no local health board
+    assert EnumAbstractionLevel.LOCAL_HEALTH_BOARD.name not in {
+        abstraction_level for abstraction_level, _ in dirty_buckets
+    }
+
+
+@pytest.mark.django_db
+def test_update_dirty_kpi_agg_models_only_rebuilds_dirty_buckets(e12_case_factory):
+    """Only the KPIAggregation rows of dirty buckets are rebuilt, and the marks are cleared afterwards."""
+
+    _clean_cases_from_test_db()
+    DirtyKPIAggregation.objects.all().delete()
+
+    _register_kpi_scored_cases(
+        e12_case_factory, ods_codes=["RGT01", "RQM01"], num_cases=10
+    )
+
+    # pretend only Addenbrooke's has changed since the last aggregation
+    DirtyKPIAggregation.objects.exclude(
+        abstraction_level=EnumAbstractionLevel.TRUST.name, abstraction_code="RGT"
+    ).delete()
+
+    update_dirty_kpi_agg_models(cohort=6, since=date.today())
+
+    rebuilt = TrustKPIAggregation.objects.get(
+        abstraction_relation=Trust.objects.get(ods_code="RGT"), cohort=6
+    ).get_value_counts_for_kpis(["ecg"])
+    untouched = TrustKPIAggregation.objects.get(
+        abstraction_relation=Trust.objects.get(ods_code="RQM"), cohort=6
+    ).get_value_counts_for_kpis(["ecg"])
+
+    assert rebuilt == {
+        "ecg_passed": 10,
+        "ecg_total_eligible": 20,
+        "ecg_ineligible": 10,
+        "ecg_incomplete": 10,
+    }
+    assert untouched["ecg_passed"] is None
+    assert not DirtyKPIAggregation.objects.filter(cohort=6).exists()
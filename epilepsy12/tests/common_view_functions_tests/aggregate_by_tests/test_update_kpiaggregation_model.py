@@ -14,6 +14,8 @@ from epilepsy12.common_view_functions import (
 from epilepsy12.models import (
     Organisation,
     NationalKPIAggregation,
+    Trust,
+    TrustKPIAggregation,
 )
 from epilepsy12.constants import (
     EnumAbstractionLevel,
@@ -186,3 +188,46 @@ def test_update_kpi_aggregation_model_all_levels(
             )
 
             assert output == expected_scores[abstraction_relation_code]
+
+
+@pytest.mark.django_db
+def test_update_kpi_aggregation_model_uses_fixed_number_of_queries(
+    django_assert_max_num_queries,
+):
+    """Writing KPIAggregations for many abstraction codes costs the same small number of statements as for one."""
+
+    trust_codes = list(Trust.objects.values_list("ods_code", flat=True)[:50])
+    value_counts = [
+        {
+            "organisation__trust__ods_code": trust_code,
+            "ecg_passed": 1,
+            "ecg_total_eligible": 2,
+            "ecg_ineligible": 3,
+            "ecg_incomplete": 4,
+        }
+        for trust_code in trust_codes
+    ]
+
+    # first run creates any missing records, second updates them
+    for _ in range(2):
+        # entity lookup, select existing for update, bulk update, bulk create (+ savepoint)
+        with django_assert_max_num_queries(6):
+            update_kpi_aggregation_model(
+                abstraction_level=EnumAbstractionLevel.TRUST,
+                kpi_value_counts=value_counts,
+                cohort=6,
+            )
+
+    trust_kpi_aggregation = TrustKPIAggregation.objects.get(
+        abstraction_relation__ods_code=trust_codes[0], cohort=6, open_access=False
+    )
+    assert trust_kpi_aggregation.get_value_counts_for_kpis(["ecg"]) == {
+        "ecg_passed": 1,
+        "ecg_total_eligible": 2,
+        "ecg_ineligible": 3,
+        "ecg_incomplete": 4,
+    }
+    assert (
+        trust_kpi_aggregation.abstraction_name
+        == trust_kpi_aggregation.abstraction_relation.name
+    )
@@ -0,0 +1,89 @@
+"""
+Tests for the access scope of a user
+
+- trust level users may access the organisations in their own trust only; RCPCH audit team members may access all
+- the scope is kept in the session, and recomputed once the user's groups change
+- clearing a group touches only the users who were in it
+"""
+
+# python imports
+import pytest
+
+# django imports
+from django.contrib.auth.models import Group
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory
+
+# E12 imports
+from epilepsy12.common_view_functions import access_scope, compute_access_scope
+from epilepsy12.models import Epilepsy12User, Organisation
+from epilepsy12.tests.UserDataClasses import (
+    test_user_audit_centre_clinician_data,
+    test_user_rcpch_audit_team_data,
+)
+
+
+@pytest.mark.django_db
+def test_access_scope_organisations():
+    user = Epilepsy12User.objects.get(
+        first_name=test_user_audit_centre_clinician_data.role_str
+    )
+    other_trust_organisation = (
+        Organisation.objects.exclude(trust=user.organisation_employer.trust)
+        .filter(trust__isnull=False)
+        .first()
+    )
+
+    scope = compute_access_scope(user)
+
+    assert scope.may_access_organisation(user.organisation_employer.pk)
+    assert not scope.may_access_organisation(other_trust_organisation.pk)
+
+    rcpch_audit_team_user = Epilepsy12User.objects.get(
+        first_name=test_user_rcpch_audit_team_data.role_str
+    )
+    assert compute_access_scope(rcpch_audit_team_user).may_access_organisation(
+        other_trust_organisation.pk
+    )
+
+
+@pytest.mark.django_db
+def test_access_scope_kept_in_session(django_assert_num_queries):
+    user = Epilepsy12User.objects.get(
+        first_name=test_user_audit_centre_clinician_data.role_str
+    )
+    session = SessionStore()
+
+    def request_from(user):
+        request = RequestFactory().get("/")
+        request.user = user
+        request.session = session
+        return request
+
+    scope = access_scope(request_from(user))
+
+    # a later request reads the scope from the session
+    with django_assert_num_queries(0):
+        assert access_scope(request_from(user)) == scope
+
+    # a change to the user's groups means the scope is computed again
+    group = Group.objects.create(name="test_access_scope_group")
+    user.groups.add(group)
+    user = Epilepsy12User.objects.get(pk=user.pk)
+    assert group.name in access_scope(request_from(user)).group_names
+
+
+@pytest.mark.django_db
+def test_group_clear_touches_only_its_users():
+    member, other_user = Epilepsy12User.objects.all()[:2]
+    group = Group.objects.create(name="test_access_scope_group")
+    group.user_set.add(member)
+    member_updated_at = Epilepsy12User.objects.get(pk=member.pk).updated_at
+    other_user_updated_at = Epilepsy12User.objects.get(pk=other_user.pk).updated_at
+
+    group.user_set.clear()
+
+    assert Epilepsy12User.objects.get(pk=member.pk).updated_at > member_updated_at
+    assert (
+        Epilepsy12User.objects.get(pk=other_user.pk).updated_at == other_user_updated_at
+    )
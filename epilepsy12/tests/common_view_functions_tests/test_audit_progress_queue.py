@@ -0,0 +1,124 @@
+"""
+Tests for the debounced AuditProgress recalculation queue
+
+- repeated field updates to the same form are coalesced into one pending update
+- only updates left alone for the debounce delay are claimed
+- claimed updates recalculate each form, then the KPIs once per registration
+- updates are only deleted once recalculated - a failed recalculation is retried later
+"""
+
+# python imports
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+# django imports
+from django.utils import timezone
+
+# E12 imports
+from epilepsy12.common_view_functions import (
+    queue_audit_progress_update,
+    process_due_audit_progress_updates,
+)
+from epilepsy12.models import PendingAuditProgressUpdate, Registration
+
+
+@pytest.mark.django_db
+def test_queue_audit_progress_update_coalesces_updates(
+    e12_case_factory, django_capture_on_commit_callbacks
+):
+    case = e12_case_factory()
+    registration = Registration.objects.get(case=case)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        queue_audit_progress_update(registration.management)
+        queue_audit_progress_update(registration.management)
+        queue_audit_progress_update(registration)
+
+    assert set(
+        PendingAuditProgressUpdate.objects.filter(
+            registration=registration
+        ).values_list("form", flat=True)
+    ) == {"management", "registration"}
+
+
+@pytest.mark.django_db
+def test_process_due_audit_progress_updates_waits_for_delay(e12_case_factory):
+    due_case, waiting_case = e12_case_factory.create_batch(2)
+    due_registration = Registration.objects.get(case=due_case)
+    waiting_registration = Registration.objects.get(case=waiting_case)
+
+    for form in ["management", "assessment"]:
+        PendingAuditProgressUpdate.objects.create(
+            registration=due_registration,
+            form=form,
+            requested_at=timezone.now() - timedelta(seconds=5),
+        )
+    # still being edited
+    PendingAuditProgressUpdate.objects.create(
+        registration=waiting_registration, form="management"
+    )
+
+    with patch(
+        "epilepsy12.common_view_functions.audit_progress_queue.update_audit_progress"
+    ) as mock_update_audit_progress, patch(
+        "epilepsy12.common_view_functions.audit_progress_queue.calculate_kpis"
+    ) as mock_calculate_kpis:
+        assert process_due_audit_progress_updates(delay_seconds=1) == 1
+
+    assert {call.args[0] for call in mock_update_audit_progress.call_args_list} == {
+        due_registration.management,
+        due_registration.assessment,
+    }
+    mock_calculate_kpis.assert_called_once_with(registration_instance=due_registration)
+
+    assert not PendingAuditProgressUpdate.objects.filter(
+        registration=due_registration
+    ).exists()
+    assert PendingAuditProgressUpdate.objects.filter(
+        registration=waiting_registration
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_failed_audit_progress_update_is_retried(e12_case_factory):
+    registration = Registration.objects.get(case=e12_case_factory())
+    PendingAuditProgressUpdate.objects.create(
+        registration=registration,
+        form="management",
+        requested_at=timezone.now() - timedelta(seconds=5),
+    )
+
+    with patch(
+        "epilepsy12.common_view_functions.audit_progress_queue.update_audit_progress",
+        side_effect=Exception("recalculation failed"),
+    ):
+        assert process_due_audit_progress_updates(delay_seconds=1) == 1
+
+    # the mark is kept, released to be retried after a delay
+    pending_update = PendingAuditProgressUpdate.objects.get(registration=registration)
+    assert pending_update.claimed_at is None
+    assert pending_update.requested_at > timezone.now()
+    assert process_due_audit_progress_updates(delay_seconds=1) == 0
+
+
+@pytest.mark.django_db
+def test_audit_progress_update_claimed_by_a_dead_worker_is_reclaimed(
+    e12_case_factory,
+):
+    registration = Registration.objects.get(case=e12_case_factory())
+    PendingAuditProgressUpdate.objects.create(
+        registration=registration,
+        form="management",
+        requested_at=timezone.now() - timedelta(hours=1),
+        claimed_at=timezone.now() - timedelta(hours=1),
+    )
+
+    with patch(
+        "epilepsy12.common_view_functions.audit_progress_queue.update_audit_progress"
+    ), patch("epilepsy12.common_view_functions.audit_progress_queue.calculate_kpis"):
+        assert process_due_audit_progress_updates(delay_seconds=1) == 1
+
+    assert not PendingAuditProgressUpdate.objects.filter(
+        registration=registration
+    ).exists()
@@ -0,0 +1,76 @@
+"""
+Tests for the boundary tiles served to the choropleth maps
+
+- a tile is built once and then read from BoundaryTile
+- the country tile for an organisation only has its country in it
+- the tile view serves the stored GeoJSON and answers a matching If-None-Match with 304
+"""
+
+# python imports
+import json
+import pytest
+
+# django imports
+from django.urls import reverse
+
+# E12 imports
+from epilepsy12.models import BoundaryTile, Country, Epilepsy12User
+from epilepsy12.common_view_functions import (
+    get_boundary_tile,
+    return_tile_for_region,
+)
+from epilepsy12.tests.view_tests.permissions_tests.perm_tests_utils import (
+    twofactor_signin,
+)
+from epilepsy12.tests.UserDataClasses import test_user_rcpch_audit_team_data
+
+
+@pytest.mark.django_db
+def test_boundary_tile_built_once():
+    tile = get_boundary_tile("country")
+
+    assert BoundaryTile.objects.filter(name="country").count() == 1
+    assert get_boundary_tile("country").etag == tile.etag
+
+    geojson = json.loads(return_tile_for_region("country"))
+    assert "crs" not in geojson
+    assert {
+        feature["properties"]["boundary_identifier"] for feature in geojson["features"]
+    } == set(Country.objects.values_list("boundary_identifier", flat=True))
+    assert [feature["properties"] for feature in geojson["features"]] == (
+        tile.feature_properties
+    )
+
+
+@pytest.mark.django_db
+def test_country_boundary_tile_for_organisation(e12_case_factory):
+    organisation = e12_case_factory().site.first().organisation
+
+    geojson = json.loads(return_tile_for_region("country", organisation))
+
+    assert [
+        feature["properties"]["boundary_identifier"] for feature in geojson["features"]
+    ] == [organisation.country.boundary_identifier]
+
+
+@pytest.mark.django_db
+def test_boundary_tile_view_revalidates_with_etag(
+    client, seed_groups_fixture, seed_users_fixture
+):
+    test_user = Epilepsy12User.objects.get(
+        first_name=test_user_rcpch_audit_team_data.role_str
+    )
+    client.force_login(test_user)
+    twofactor_signin(client, test_user=test_user)
+
+    url = reverse("boundary_tile", kwargs={"tile_name": "country"})
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert json.loads(response.content)["type"] == "FeatureCollection"
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+    assert response.status_code == 304
+
+    response = client.get(reverse("boundary_tile", kwargs={"tile_name": "not-a-tile"}))
+    assert response.status_code == 404
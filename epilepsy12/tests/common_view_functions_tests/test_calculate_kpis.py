@@ -3,6 +3,8 @@ Tests for the calculate_kpi function.
 
 Tests
 - [x] return None if child not registered in audit (registration.first_paediatric_assessment_date is None, or registration_eligibility_criteria_met is None or False, Site.site_is_primary_centre_of_epilepsy_care is None)
+- [x] batch recalculation scores the same as calculate_kpis
+- [x] scoring from a ScoringContext makes no queries
 
 
 Measure 8
@@ -106,7 +108,12 @@ from dateutil.relativedelta import relativedelta
 # Third party imports
 
 # RCPCH imports
-from epilepsy12.common_view_functions import calculate_kpis
+from epilepsy12.common_view_functions import (
+    calculate_kpis,
+    score_kpis,
+    recalculate_kpis_for_registrations,
+)
+from epilepsy12.common_view_functions.calculate_kpi_functions import ScoringContext
 from epilepsy12.models import (
     Registration,
     KPI,
@@ -140,3 +147,58 @@ def test_child_not_registered_in_audit_returns_none(e12_case_factory):
     registration = Registration.objects.get(case=case)
 
     assert calculate_kpis(registration) is None
+
+
+@pytest.mark.django_db
+def test_recalculate_kpis_for_registrations_matches_calculate_kpis(e12_case_factory):
+    """
+    Test that rescoring a batch of registrations stores the same KPI scores as calculate_kpis().
+    """
+
+    cases = e12_case_factory.create_batch(3)
+    registrations = Registration.objects.filter(case__in=cases)
+
+    for registration in registrations:
+        calculate_kpis(registration)
+
+    expected_kpis = {
+        registration.pk: KPI.objects.get(pk=registration.kpi.pk).get_kpis()
+        for registration in registrations
+    }
+
+    # wipe the scores so the batch has to recalculate them
+    KPI.objects.filter(registration__in=registrations).update(
+        **{kpi_name: None for kpi_name in KPI().get_kpis()}
+    )
+
+    scored, failed = recalculate_kpis_for_registrations(
+        [registration.pk for registration in registrations]
+    )
+
+    assert (scored, failed) == (3, 0)
+    for registration in registrations:
+        assert (
+            KPI.objects.get(pk=registration.kpi.pk).get_kpis()
+            == expected_kpis[registration.pk]
+        )
+
+
+@pytest.mark.django_db
+def test_score_kpis_from_scoring_context_makes_no_queries(
+    e12_case_factory, django_assert_num_queries
+):
+    """
+    Test that once a ScoringContext is loaded, every KPI is scored without touching the database.
+    """
+
+    case = e12_case_factory()
+    registration = Registration.objects.get(case=case)
+
+    scoring_context = ScoringContext.for_registration(registration)
+
+    with django_assert_num_queries(0):
+        kpis = score_kpis(scoring_context)
+
+    calculate_kpis(registration)
+
+    assert kpis == KPI.objects.get(pk=registration.kpi.pk).get_kpis()
@@ -0,0 +1,79 @@
+"""
+Tests for the case counts shown on the choropleth maps
+
+- every member of the level of abstraction is counted, with 0 where there are no cases
+- counts are cached until a registration in the cohort changes eligibility, completion or lead site
+"""
+
+# python imports
+import pytest
+
+# django imports
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# E12 imports
+from epilepsy12.constants import EnumAbstractionLevel
+from epilepsy12.models import Country, Registration
+from epilepsy12.common_view_functions import (
+    generate_case_counts_for_each_region_in_each_abstraction_level,
+)
+
+
+@pytest.mark.django_db
+def test_case_counts_for_each_country(e12_case_factory):
+    cache.clear()
+
+    case = e12_case_factory()
+    organisation = case.site.first().organisation
+    cohort = case.registration.cohort
+
+    df = generate_case_counts_for_each_region_in_each_abstraction_level(
+        abstraction_level=EnumAbstractionLevel.COUNTRY,
+        cohort=cohort,
+        organisation=organisation,
+    )
+
+    assert list(df["identifier"]) == list(
+        Country.objects.order_by("name").values_list("boundary_identifier", flat=True)
+    )
+    counts = dict(zip(df["identifier"], df["cases"]))
+    assert counts.pop(organisation.country.boundary_identifier) == 1
+    assert set(counts.values()) <= {0}
+
+    # cached until a registration changes - only the cache itself is queried
+    with CaptureQueriesContext(connection) as queries:
+        cached_df = generate_case_counts_for_each_region_in_each_abstraction_level(
+            abstraction_level=EnumAbstractionLevel.COUNTRY,
+            cohort=cohort,
+            organisation=organisation,
+        )
+    assert cached_df.equals(df)
+    assert all("epilepsy12_cache" in query["sql"] for query in queries)
+
+    # saving a registration without changing what is counted keeps the cached counts
+    registration = Registration.objects.get(case=case)
+    registration.save()
+    with CaptureQueriesContext(connection) as queries:
+        generate_case_counts_for_each_region_in_each_abstraction_level(
+            abstraction_level=EnumAbstractionLevel.COUNTRY,
+            cohort=cohort,
+            organisation=organisation,
+        )
+    assert all("epilepsy12_cache" in query["sql"] for query in queries)
+
+    # saving the new registration invalidates the cached counts
+    e12_case_factory()
+
+    df = generate_case_counts_for_each_region_in_each_abstraction_level(
+        abstraction_level=EnumAbstractionLevel.COUNTRY,
+        cohort=cohort,
+        organisation=organisation,
+    )
+    assert (
+        df.loc[
+            df["identifier"] == organisation.country.boundary_identifier, "cases"
+        ].item()
+        == 2
+    )
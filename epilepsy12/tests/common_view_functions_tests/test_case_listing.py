@@ -0,0 +1,56 @@
+"""
+Tests for the case list query
+
+- keyset pages list every case once, in the order of the sort field
+- paging back from a page returns the previous page
+- lead sites are prefetched and cases in transfer annotated
+"""
+
+# python imports
+import pytest
+
+# E12 imports
+from epilepsy12.common_view_functions import case_list_queryset, keyset_page
+from epilepsy12.models import Case
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("sort_field", ["surname", "-surname", "-nhs_number"])
+def test_keyset_pages_list_every_case_in_order(e12_case_factory, sort_field):
+    e12_case_factory.create_batch(size=5, surname="Smith")
+    e12_case_factory.create_batch(size=2, surname="Jones")
+    cases = Case.objects.all()
+
+    pages = [keyset_page(cases, sort_field=sort_field, page_size=3)]
+    while pages[-1].has_next:
+        pages.append(
+            keyset_page(
+                cases,
+                sort_field=sort_field,
+                after=pages[-1].next_cursor,
+                page_size=3,
+            )
+        )
+
+    listed_cases = [case for page in pages for case in page]
+    assert listed_cases == list(cases.order_by(sort_field, "pk"))
+    assert not pages[0].has_previous
+
+    # back from the last page
+    previous_page = keyset_page(
+        cases, sort_field=sort_field, before=pages[-1].previous_cursor, page_size=3
+    )
+    assert list(previous_page) == list(pages[-2])
+    assert previous_page.has_next
+
+
+@pytest.mark.django_db
+def test_case_list_queryset_joins_lead_site(e12_case_factory, GOSH):
+    case = e12_case_factory(organisations__organisation=GOSH)
+
+    listed_case = case_list_queryset(organisation=GOSH, view_preference=0).get(
+        pk=case.pk
+    )
+
+    assert listed_case.lead_sites[0].organisation == GOSH
+    assert listed_case.in_transfer is False
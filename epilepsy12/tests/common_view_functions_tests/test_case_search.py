@@ -0,0 +1,40 @@
+"""
+Tests for the case list search
+
+- digits are matched against the start of the NHS number, and the Epilepsy12 ID
+- other terms are matched anywhere in the first name, surname or unique reference number
+"""
+
+# python imports
+import pytest
+
+# E12 imports
+from epilepsy12.common_view_functions import search_cases
+from epilepsy12.models import Case
+
+
+@pytest.mark.django_db
+def test_search_cases_by_nhs_number_prefix(e12_case_factory):
+    case = e12_case_factory()
+    cases = Case.objects.all()
+
+    assert case in search_cases(cases, case.nhs_number[:4])
+    # spaced as printed on NHS cards
+    spaced_nhs_number = (
+        f"{case.nhs_number[:3]} {case.nhs_number[3:6]} {case.nhs_number[6:]}"
+    )
+    assert list(search_cases(cases, spaced_nhs_number)) == [case]
+    # the middle of an NHS number is not a prefix
+    assert case not in search_cases(cases, case.nhs_number[3:])
+
+    assert case in search_cases(cases, str(case.pk))
+
+
+@pytest.mark.django_db
+def test_search_cases_by_name(e12_case_factory):
+    case = e12_case_factory(first_name="Aurelia", surname="Featherstonehaugh")
+    cases = Case.objects.all()
+
+    assert case in search_cases(cases, "aurel")
+    assert case in search_cases(cases, "STONEHAUGH")
+    assert case not in search_cases(cases, "Featherstonehaugh-Smith")
@@ -0,0 +1,164 @@
+"""
+Tests for the database-backed KPI aggregation queue
+
+- enqueueing the same cohort and access level twice returns the same queued job
+- published and private aggregations are queued separately
+- only one job per cohort and access level can be queued, and claiming it lets the next request queue another
+- running a claimed job marks it complete
+- a job left running by a dead worker is marked failed, and can only be polled within its cohort
+"""
+
+# python imports
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+
+# django imports
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+# E12 imports
+from epilepsy12.common_view_functions import (
+    enqueue_kpi_aggregation,
+    fail_stale_kpi_aggregation_jobs,
+    claim_next_kpi_aggregation_job,
+    run_kpi_aggregation_job,
+    process_next_kpi_aggregation_job,
+)
+from epilepsy12.models import Epilepsy12User, KPIAggregationJob, Organisation
+from epilepsy12.tests.view_tests.permissions_tests.perm_tests_utils import (
+    twofactor_signin,
+)
+
+
+@pytest.mark.django_db
+def test_enqueue_kpi_aggregation_coalesces_queued_requests():
+    first_job = enqueue_kpi_aggregation(cohort=6)
+    second_job = enqueue_kpi_aggregation(cohort=6)
+    published_job = enqueue_kpi_aggregation(cohort=6, open_access=True)
+
+    assert first_job.pk == second_job.pk
+    assert published_job.pk != first_job.pk
+    assert KPIAggregationJob.objects.filter(cohort=6).count() == 2
+
+
+@pytest.mark.django_db
+def test_only_one_kpi_aggregation_job_queued():
+    first_job = KPIAggregationJob.objects.create(cohort=6)
+    other_cohort_job = KPIAggregationJob.objects.create(cohort=5)
+
+    # a second queued job for the cohort, as concurrent requests would have created
+    with pytest.raises(IntegrityError), transaction.atomic():
+        KPIAggregationJob.objects.create(cohort=6)
+
+    assert claim_next_kpi_aggregation_job() == [first_job.pk]
+    assert (
+        KPIAggregationJob.objects.get(pk=first_job.pk).status
+        == KPIAggregationJob.RUNNING
+    )
+    assert (
+        KPIAggregationJob.objects.get(pk=other_cohort_job.pk).status
+        == KPIAggregationJob.QUEUED
+    )
+
+    # the running job no longer coalesces requests
+    assert enqueue_kpi_aggregation(cohort=6).pk != first_job.pk
+
+
+@pytest.mark.django_db
+def test_run_kpi_aggregation_job_records_outcome():
+    job = enqueue_kpi_aggregation(cohort=6)
+
+    with patch(
+        "epilepsy12.common_view_functions.kpi_aggregation_queue.update_dirty_kpi_agg_models"
+    ) as mock_update_dirty_kpi_agg_models:
+        assert process_next_kpi_aggregation_job() is True
+        # no previous aggregation for this cohort, so everything is rebuilt
+        mock_update_dirty_kpi_agg_models.assert_called_once_with(cohort=6, since=None)
+
+    job.refresh_from_db()
+    assert job.status == KPIAggregationJob.COMPLETE
+    assert job.completed_at is not None
+
+    # queue is now empty
+    assert process_next_kpi_aggregation_job() is False
+
+
+@pytest.mark.django_db
+def test_run_kpi_aggregation_job_publishes_all_kpi_aggregations():
+    enqueue_kpi_aggregation(cohort=6, open_access=True)
+
+    with patch(
+        "epilepsy12.common_view_functions.kpi_aggregation_queue.update_all_kpi_agg_models"
+    ) as mock_update_all_kpi_agg_models:
+        assert process_next_kpi_aggregation_job() is True
+        mock_update_all_kpi_agg_models.assert_called_once_with(
+            cohort=6, open_access=True
+        )
+
+
+@pytest.mark.django_db
+def test_run_kpi_aggregation_job_records_failure():
+    job = enqueue_kpi_aggregation(cohort=6)
+    claimed_job_ids = claim_next_kpi_aggregation_job()
+
+    with patch(
+        "epilepsy12.common_view_functions.kpi_aggregation_queue.update_dirty_kpi_agg_models",
+        side_effect=ValueError("aggregation error"),
+    ):
+        assert run_kpi_aggregation_job(claimed_job_ids) is False
+
+    job.refresh_from_db()
+    assert job.status == KPIAggregationJob.FAILED
+    assert job.error == "aggregation error"
+
+
+@pytest.mark.django_db
+def test_fail_stale_kpi_aggregation_jobs():
+    stale_job = KPIAggregationJob.objects.create(
+        cohort=6,
+        status=KPIAggregationJob.RUNNING,
+        started_at=timezone.now() - timedelta(days=1),
+    )
+    running_job = KPIAggregationJob.objects.create(
+        cohort=5, status=KPIAggregationJob.RUNNING, started_at=timezone.now()
+    )
+
+    assert fail_stale_kpi_aggregation_jobs() == 1
+
+    stale_job.refresh_from_db()
+    assert stale_job.status == KPIAggregationJob.FAILED
+    assert stale_job.is_finished
+    assert (
+        KPIAggregationJob.objects.get(pk=running_job.pk).status
+        == KPIAggregationJob.RUNNING
+    )
+
+
+@pytest.mark.django_db
+def test_kpi_aggregation_job_status_only_for_jobs_in_cohort(
+    client, seed_groups_fixture, seed_users_fixture
+):
+    rcpch_user = Epilepsy12User.objects.filter(is_rcpch_audit_team_member=True).first()
+    client.force_login(rcpch_user)
+    twofactor_signin(client, rcpch_user)
+
+    organisation = Organisation.objects.get(ods_code="RP401")
+    job = enqueue_kpi_aggregation(cohort=6)
+    published_job = enqueue_kpi_aggregation(cohort=6, open_access=True)
+
+    def job_status(job_id, cohort):
+        return client.get(
+            reverse(
+                "kpi_aggregation_job_status",
+                kwargs={"organisation_id": organisation.pk, "job_id": job_id},
+            ),
+            {"cohort": cohort},
+        )
+
+    assert job_status(job.pk, 6).status_code == 200
+    assert job_status(job.pk, 5).status_code == 404
+    assert job_status(published_job.pk, 6).status_code == 404
+    assert job_status(0, 6).status_code == 404
+    assert job_status(job.pk, "six").status_code == 400
@@ -0,0 +1,69 @@
+"""
+Tests for the cached figures on the organisation dashboard
+
+- a figure is built once, then served from the cache
+- saving a case at the organisation invalidates the cached figures, saving without changing what they show does not
+"""
+
+# python imports
+import json
+import pytest
+
+# django imports
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# E12 imports
+from epilepsy12.common_view_functions import organisation_figure
+from epilepsy12.models import Site
+
+
+@pytest.mark.django_db
+def test_organisation_figure_cached_until_case_saved(e12_case_factory):
+    cache.clear()
+
+    case = e12_case_factory()
+    organisation = case.site.first().organisation
+    cohort = case.registration.cohort
+
+    figure = organisation_figure(
+        figure_type="sex_piechart", organisation=organisation, cohort=cohort
+    )
+    assert sum(json.loads(figure["figure"])["data"][0]["values"]) == 1
+
+    # only the cache itself is queried
+    with CaptureQueriesContext(connection) as queries:
+        assert (
+            organisation_figure(
+                figure_type="sex_piechart", organisation=organisation, cohort=cohort
+            )
+            == figure
+        )
+    assert all("epilepsy12_cache" in query["sql"] for query in queries)
+
+    # saving the lead site without changing it keeps the cached figures
+    Site.objects.get(case=case, site_is_primary_centre_of_epilepsy_care=True).save()
+    with CaptureQueriesContext(connection) as queries:
+        organisation_figure(
+            figure_type="sex_piechart", organisation=organisation, cohort=cohort
+        )
+    assert all("epilepsy12_cache" in query["sql"] for query in queries)
+
+    # saving the new case invalidates the cached figures
+    e12_case_factory()
+
+    figure = organisation_figure(
+        figure_type="sex_piechart", organisation=organisation, cohort=cohort
+    )
+    assert sum(json.loads(figure["figure"])["data"][0]["values"]) == 2
+
+
+@pytest.mark.django_db
+def test_organisation_figure_unknown_figure_type(e12_case_factory):
+    organisation = e12_case_factory().site.first().organisation
+
+    with pytest.raises(KeyError):
+        organisation_figure(
+            figure_type="not_a_figure", organisation=organisation, cohort=6
+        )
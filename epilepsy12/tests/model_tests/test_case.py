@@ -5,10 +5,17 @@ Tests the Case model
 # Standard imports
 import pytest
 from datetime import date
+from unittest.mock import patch
 
 # Third party imports
+from django.contrib.gis.geos import Point
 
 # RCPCH imports
+from epilepsy12.models import Case, Postcode
+from epilepsy12.general_functions.postcode_gazetteer import (
+    PostcodeDetails,
+    _postcode_details_from_gazetteer,
+)
 
 
 @pytest.mark.django_db
@@ -91,3 +98,81 @@ def test_case_overwrite_index_of_multiple_deprivation_quintile(e12_case_factory)
     e12Case.save()
     assert e12Case.postcode == "WC1X8SH"
     assert e12Case.index_of_multiple_deprivation_quintile is 4
+
+
+@pytest.mark.django_db
+def test_case_save_postcode_in_gazetteer_makes_no_remote_calls(e12_case_factory):
+    # Tests that a postcode in the local gazetteer is looked up without calling the census platform or postcode API
+    Postcode.objects.create(
+        postcode="WC1X8SH",
+        location_wgs84=Point(-0.1174, 51.5249, srid=4326),
+        location_bng=Point(530887, 182176, srid=27700),
+        index_of_multiple_deprivation_quintile=4,
+    )
+    _postcode_details_from_gazetteer.cache_clear()
+
+    e12Case = e12_case_factory(index_of_multiple_deprivation_quintile=None)
+
+    with patch(
+        "epilepsy12.general_functions.postcode_gazetteer.imd_for_postcode"
+    ) as mock_imd_for_postcode, patch(
+        "epilepsy12.general_functions.postcode_gazetteer.coordinates_for_postcode"
+    ) as mock_coordinates_for_postcode:
+        e12Case.postcode = "WC1X 8SH"
+        e12Case.save()
+
+    mock_imd_for_postcode.assert_not_called()
+    mock_coordinates_for_postcode.assert_not_called()
+    assert e12Case.index_of_multiple_deprivation_quintile == 4
+    assert e12Case.location_bng.x == 530887
+
+
+@pytest.mark.django_db
+def test_case_save_unchanged_postcode_not_looked_up_again(e12_case_factory):
+    # Tests that saving a case without changing its postcode does not look the postcode up again
+    with patch(
+        "epilepsy12.models_folder.case.postcode_details",
+        return_value=PostcodeDetails(
+            longitude=-0.1174,
+            latitude=51.5249,
+            easting=530887,
+            northing=182176,
+            index_of_multiple_deprivation_quintile=4,
+        ),
+    ) as mock_postcode_details:
+        e12Case = e12_case_factory(postcode="WC1X 8SH")
+        lookups_on_create = mock_postcode_details.call_count
+
+        e12Case = Case.objects.get(pk=e12Case.pk)
+        e12Case.first_name = "Renamed"
+        e12Case.save()
+
+    assert lookups_on_create == 1
+    assert mock_postcode_details.call_count == lookups_on_create
+    assert e12Case.index_of_multiple_deprivation_quintile == 4
+
+
+@pytest.mark.django_db
+def test_case_save_postcode_not_found_not_looked_up_again(e12_case_factory):
+    # Tests that a postcode the census platform could not find is not looked up remotely on every save
+    _postcode_details_from_gazetteer.cache_clear()
+    e12Case = e12_case_factory(index_of_multiple_deprivation_quintile=None)
+
+    with patch(
+        "epilepsy12.general_functions.postcode_gazetteer.imd_for_postcode",
+        return_value=None,
+    ) as mock_imd_for_postcode, patch(
+        "epilepsy12.general_functions.postcode_gazetteer.coordinates_for_postcode",
+        return_value=None,
+    ) as mock_coordinates_for_postcode:
+        e12Case.postcode = "SW1A 1AA"
+        e12Case.save()
+
+        e12Case = Case.objects.get(pk=e12Case.pk)
+        e12Case.first_name = "Renamed"
+        e12Case.save()
+
+    assert mock_imd_for_postcode.call_count == 1
+    assert mock_coordinates_for_postcode.call_count == 1
+    assert e12Case.index_of_multiple_deprivation_quintile is None
+    assert Postcode.objects.get(postcode="SW1A1AA").looked_up_at is not None
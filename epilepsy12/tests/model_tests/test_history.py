@@ -0,0 +1,123 @@
+"""
+Tests for the history of audit models
+
+- inside batched_history, the history rows of saves are written together when the batch closes
+- saves inside a transaction still write their history immediately
+- archive_history writes the history of a closed cohort to a compressed file and deletes it from the history tables
+- the history of rows deleted since is archived with their cohort
+- parquet archives are written a part file per batch
+"""
+
+# python imports
+import os
+from types import SimpleNamespace
+import pytest
+
+# django imports
+from django.core.management import call_command
+from django.db import transaction
+
+# 3rd party imports
+import pandas as pd
+
+# E12 imports
+from epilepsy12.models import Case, Registration, Site
+from epilepsy12.models_folder import batched_historical_records
+from epilepsy12.models_folder.batched_historical_records import batched_history
+
+
+@pytest.mark.django_db
+def test_batched_history_written_when_batch_closes(e12_case_factory, monkeypatch):
+    case = e12_case_factory()
+    # each test runs inside a transaction - save as though outside one
+    monkeypatch.setattr(
+        batched_historical_records,
+        "connections",
+        {case._state.db: SimpleNamespace(in_atomic_block=False)},
+    )
+    history_count = case.history.count()
+
+    with batched_history():
+        case.first_name = "Batched"
+        case.save()
+        case.surname = "History"
+        case.save()
+        assert case.history.count() == history_count
+
+    assert case.history.count() == history_count + 2
+    assert case.history.first().surname == "History"
+
+
+@pytest.mark.django_db
+def test_batched_history_written_immediately_in_transaction(e12_case_factory):
+    case = e12_case_factory()
+    history_count = case.history.count()
+
+    with batched_history(), transaction.atomic():
+        case.first_name = "Atomic"
+        case.save()
+        assert case.history.count() == history_count + 1
+
+
+@pytest.mark.django_db
+def test_archive_history_of_closed_cohort(e12_case_factory, tmp_path):
+    case = e12_case_factory()
+    cohort = 4
+    Registration.objects.filter(case=case).update(cohort=cohort)
+    case_history_count = case.history.count()
+
+    call_command("archive_history", cohort=cohort, output_dir=str(tmp_path))
+
+    assert not case.history.exists()
+    archive = pd.read_csv(
+        os.path.join(
+            tmp_path, Case.history.model._meta.db_table, f"cohort_{cohort}.csv.gz"
+        )
+    )
+    assert len(archive) == case_history_count
+    assert set(archive["id"]) == {case.pk}
+
+
+@pytest.mark.django_db
+def test_archive_history_of_deleted_rows(e12_case_factory, tmp_path):
+    case = e12_case_factory()
+    cohort = 4
+    Registration.objects.filter(case=case).update(cohort=cohort)
+    site_ids = list(case.site.values_list("pk", flat=True))
+    Site.objects.filter(pk__in=site_ids).delete()
+    assert Site.history.filter(id__in=site_ids).exists()
+
+    call_command("archive_history", cohort=cohort, output_dir=str(tmp_path))
+
+    assert not Site.history.filter(id__in=site_ids).exists()
+    archive = pd.read_csv(
+        os.path.join(
+            tmp_path, Site.history.model._meta.db_table, f"cohort_{cohort}.csv.gz"
+        )
+    )
+    assert set(archive["id"]) == set(site_ids)
+
+
+@pytest.mark.django_db
+def test_archive_history_to_parquet_parts(e12_case_factory, tmp_path):
+    pytest.importorskip("pyarrow")
+    case = e12_case_factory()
+    cohort = 4
+    Registration.objects.filter(case=case).update(cohort=cohort)
+    case.first_name = "Archived"
+    case.save()
+    case_history_count = case.history.count()
+
+    call_command(
+        "archive_history",
+        cohort=cohort,
+        output_dir=str(tmp_path),
+        format="parquet",
+        batch_size=1,
+    )
+
+    archive_dir = os.path.join(
+        tmp_path, Case.history.model._meta.db_table, f"cohort_{cohort}"
+    )
+    assert len(os.listdir(archive_dir)) == case_history_count
+    assert len(pd.read_parquet(archive_dir)) == case_history_count
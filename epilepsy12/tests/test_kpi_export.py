@@ -0,0 +1,49 @@
+"""
+Tests for the KPI report download
+
+- the report is an .xlsx workbook with a sheet for each dataframe
+- the report is cached until the KPIAggregations for the cohort are updated
+"""
+
+# python imports
+from io import BytesIO
+import pytest
+
+# django imports
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# 3rd party imports
+from openpyxl import load_workbook
+
+# E12 imports
+from epilepsy12.kpi import (
+    KPI_EXPORT_SHEET_NAMES,
+    kpi_export_published_at,
+    kpi_export_workbook,
+)
+from epilepsy12.models import NationalKPIAggregation
+
+
+@pytest.mark.django_db
+def test_kpi_export_workbook_cached_until_aggregations_updated():
+    cache.clear()
+    cohort = 6
+
+    workbook = kpi_export_workbook(cohort=cohort)
+    assert load_workbook(BytesIO(workbook)).sheetnames == KPI_EXPORT_SHEET_NAMES
+
+    # only the last updated dates of the aggregations are queried, besides the cache itself
+    with CaptureQueriesContext(connection) as queries:
+        assert kpi_export_workbook(cohort=cohort) == workbook
+    assert (
+        len([query for query in queries if "epilepsy12_cache" not in query["sql"]]) <= 7
+    )
+
+    # a new aggregation means the report is built again
+    NationalKPIAggregation.objects.create(cohort=cohort)
+    assert kpi_export_published_at(cohort=cohort) is not None
+    with CaptureQueriesContext(connection) as queries:
+        kpi_export_workbook(cohort=cohort)
+    assert len(queries) > 7
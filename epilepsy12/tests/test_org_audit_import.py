@@ -0,0 +1,67 @@
+"""
+Tests for the import of organisational audit submissions from the old system's CSV export
+
+- a dry run reports unknown site codes and invalid values, and imports nothing
+- a valid file is imported with trusts, local health boards and multiselect answers resolved
+"""
+
+# python imports
+from io import StringIO
+import pytest
+
+# E12 imports
+from epilepsy12.models import (
+    OrganisationalAuditSubmission,
+    OrganisationalAuditSubmissionPeriod,
+)
+from epilepsy12.organisational_audit import import_submissions_from_csv
+
+SUBMISSIONS_CSV = """SiteCode,S01WTEConsultants,S01EpilepsyClinicalLead,S02TFC223,S01ESNEDVisit,S01ESNHomeVisit
+RP4,2.5,Y,,1,2
+7A4,1,N,Y,1,1
+"""
+
+
+@pytest.mark.django_db
+def test_import_submissions_dry_run_reports_problems():
+    submission_period = OrganisationalAuditSubmissionPeriod.objects.create(year=2021)
+
+    report = import_submissions_from_csv(
+        submission_period,
+        StringIO(SUBMISSIONS_CSV + "XXX,not a number,Q,,2,2\n"),
+        dry_run=True,
+    )
+
+    assert report["rows"] == 3
+    assert report["unknown_site_codes"] == ["XXX"]
+    assert report["invalid_values"] == {
+        "S01WTEConsultants": ["XXX"],
+        "S01EpilepsyClinicalLead": ["XXX"],
+    }
+    assert report["imported"] == 0
+    assert not OrganisationalAuditSubmission.objects.filter(
+        submission_period=submission_period
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_import_submissions():
+    submission_period = OrganisationalAuditSubmissionPeriod.objects.create(year=2021)
+
+    report = import_submissions_from_csv(submission_period, StringIO(SUBMISSIONS_CSV))
+
+    assert report["imported"] == 2
+
+    trust_submission = OrganisationalAuditSubmission.objects.get(
+        submission_period=submission_period, trust__ods_code="RP4"
+    )
+    assert float(trust_submission.S01WTEConsultants) == 2.5
+    assert trust_submission.S02TFC223 == "NA"
+    assert list(trust_submission.S01ESNFunctions) == ["1"]
+    assert trust_submission.history.count() == 1
+
+    local_health_board_submission = OrganisationalAuditSubmission.objects.get(
+        submission_period=submission_period, local_health_board__ods_code="7A4"
+    )
+    assert local_health_board_submission.S01EpilepsyClinicalLead == "N"
+    assert list(local_health_board_submission.S01ESNFunctions) == ["1", "2"]
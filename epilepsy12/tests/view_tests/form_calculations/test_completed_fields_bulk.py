@@ -0,0 +1,127 @@
+"""
+Tests for `completed_fields_bulk` fn
+
+- the counts calculated in the database match `completed_fields` for each instance
+- related model counts take a fixed number of queries however many related rows there are
+- the episode scores are stored without saving each episode or adding to its history
+"""
+
+# python imports
+import pytest
+from datetime import date
+
+# django imports
+
+# E12 imports
+from epilepsy12.models import Episode, Medicine
+from epilepsy12.common_view_functions import completed_fields, completed_fields_bulk
+from epilepsy12.common_view_functions.recalculate_form_generate_response import (
+    number_of_completed_fields_in_related_models,
+    count_episode_fields,
+)
+from epilepsy12.constants import (
+    DATE_ACCURACY,
+    EPILEPSY_DIAGNOSIS_STATUS,
+    EPILEPSY_SEIZURE_TYPE,
+)
+
+
+@pytest.mark.django_db
+def test_completed_fields_bulk_matches_completed_fields(
+    e12_case_factory, e12_episode_factory, GOSH
+):
+    CASE = e12_case_factory(
+        first_name=f"temp_child_{GOSH.name}",
+        organisations__organisation=GOSH,
+    )
+    multiaxial_diagnosis = CASE.registration.multiaxialdiagnosis
+
+    e12_episode_factory(
+        multiaxial_diagnosis=multiaxial_diagnosis,
+        seizure_onset_date=date(2023, 1, 1),
+        seizure_onset_date_confidence=DATE_ACCURACY[0][0],
+        epilepsy_or_nonepilepsy_status=EPILEPSY_DIAGNOSIS_STATUS[0][0],
+        epileptic_seizure_onset_type=EPILEPSY_SEIZURE_TYPE[0][0],
+        focal_onset_left=True,
+        focal_onset_right=False,
+        focal_onset_impaired_awareness=True,  # should not be counted!
+    )
+    e12_episode_factory(
+        multiaxial_diagnosis=multiaxial_diagnosis,
+        epilepsy_or_nonepilepsy_status=EPILEPSY_DIAGNOSIS_STATUS[2][0],
+    )
+
+    episodes = Episode.objects.filter(multiaxial_diagnosis=multiaxial_diagnosis)
+
+    assert completed_fields_bulk(episodes) == {
+        episode.pk: completed_fields(episode) for episode in episodes
+    }
+
+
+@pytest.mark.django_db
+def test_related_model_fields_count_management_uses_fixed_number_of_queries(
+    e12_case_factory,
+    e12_anti_epilepsy_medicine_factory,
+    GOSH,
+    django_assert_max_num_queries,
+):
+    CASE = e12_case_factory(
+        first_name=f"temp_child_{GOSH.name}",
+        organisations__organisation=GOSH,
+    )
+    management = CASE.registration.management
+    management.has_an_aed_been_given = True
+    management.has_rescue_medication_been_prescribed = True
+    management.save()
+
+    medicine_entity = Medicine.objects.get(medicine_name="Levetiracetam")
+    for is_rescue_medicine in [False, True]:
+        for _ in range(5):
+            e12_anti_epilepsy_medicine_factory(
+                management=management,
+                is_rescue_medicine=is_rescue_medicine,
+                medicine_entity=medicine_entity,
+                antiepilepsy_medicine_start_date=date(2023, 1, 1),
+                antiepilepsy_medicine_risk_discussed=True,
+            )
+
+    # one query for antiepilepsy medicines and one for rescue medicines
+    with django_assert_max_num_queries(2):
+        return_value = number_of_completed_fields_in_related_models(management)
+
+    assert return_value == 10 * 3
+
+
+@pytest.mark.django_db
+def test_episode_scores_stored_without_history(
+    e12_case_factory, e12_episode_factory, GOSH, django_assert_max_num_queries
+):
+    CASE = e12_case_factory(
+        first_name=f"temp_child_{GOSH.name}",
+        organisations__organisation=GOSH,
+    )
+    multiaxial_diagnosis = CASE.registration.multiaxialdiagnosis
+
+    for _ in range(5):
+        e12_episode_factory(
+            multiaxial_diagnosis=multiaxial_diagnosis,
+            seizure_onset_date=date(2023, 1, 1),
+            epilepsy_or_nonepilepsy_status=EPILEPSY_DIAGNOSIS_STATUS[2][0],
+        )
+    episodes = Episode.objects.filter(multiaxial_diagnosis=multiaxial_diagnosis)
+    history_count = Episode.history.count()
+
+    # one query to read the episodes and one to write the scores
+    with django_assert_max_num_queries(2):
+        count_episode_fields(episodes)
+    with django_assert_max_num_queries(6):
+        number_of_completed_fields_in_related_models(multiaxial_diagnosis)
+
+    assert Episode.history.count() == history_count
+    for episode in episodes:
+        assert episode.expected_score == 5
+        assert episode.calculated_score == completed_fields(episode)
+
+    # nothing has changed, so nothing is written
+    with django_assert_max_num_queries(1):
+        count_episode_fields(episodes)
@@ -0,0 +1,106 @@
+"""
+Tests for saving the organisational audit form question by question
+
+- only the answers to the question posted are saved
+- the completion counts are updated by the change in that question alone
+- invalid answers are shown but not saved or counted
+- the submission is locked while the counts are updated
+"""
+
+# python imports
+import pytest
+
+# django imports
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# E12 imports
+from epilepsy12.constants import AUDIT_CENTRE_LEAD_CLINICIAN
+from epilepsy12.models import (
+    Epilepsy12User,
+    OrganisationalAuditSubmission,
+    OrganisationalAuditSubmissionPeriod,
+    Trust,
+)
+from epilepsy12.tests.view_tests.permissions_tests.perm_tests_utils import (
+    twofactor_signin,
+)
+from epilepsy12.views.organisational_audit_views import count_completed_questions
+
+
+@pytest.mark.django_db
+def test_organisational_audit_question_saves_only_that_question(
+    client, seed_groups_fixture, seed_users_fixture
+):
+    gosh_trust = Trust.objects.get(ods_code="RP4")
+    submission_period = OrganisationalAuditSubmissionPeriod.objects.create(
+        year=2021, is_open=True
+    )
+    submission = OrganisationalAuditSubmission.objects.create(
+        submission_period=submission_period,
+        trust=gosh_trust,
+        S01WTEConsultants=2,
+    )
+    number_completed, total_questions = count_completed_questions(submission)
+    submission.number_completed = number_completed
+    submission.total_questions = total_questions
+    submission.save()
+
+    gosh_user = Epilepsy12User.objects.filter(
+        role=AUDIT_CENTRE_LEAD_CLINICIAN, organisation_employer__ods_code="RP401"
+    ).first()
+    client.force_login(gosh_user)
+    twofactor_signin(client, gosh_user)
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            reverse(
+                "organisational_audit_trust_question",
+                kwargs={"id": gosh_trust.id, "question_number": "6.3"},
+            ),
+            {
+                "S06ServiceForEpilepsyBothAdultAndPaed": "Y",
+                "S06IsThisUsually": "Oth",
+                "S06PercentageOfYoungPeopleTransferred": "not a number",
+            },
+        )
+    assert response.status_code == 200
+    assert any(
+        "FOR UPDATE" in query["sql"] and "organisationalauditsubmission" in query["sql"]
+        for query in context.captured_queries
+    )
+    assert 'hx-swap-oob="true"' in response.content.decode()
+
+    submission.refresh_from_db()
+    assert submission.S06ServiceForEpilepsyBothAdultAndPaed == "Y"
+    assert submission.S06IsThisUsually == "Oth"
+    assert submission.S06PercentageOfYoungPeopleTransferred is None
+    # answers to other questions are untouched
+    assert submission.S01WTEConsultants == 2
+
+    # the kept counts match a recount of the whole form
+    assert (
+        submission.number_completed,
+        submission.total_questions,
+    ) == count_completed_questions(submission)
+    assert submission.number_completed == number_completed + 2
+
+
+@pytest.mark.django_db
+def test_organisational_audit_question_that_doesnt_exist(
+    client, seed_groups_fixture, seed_users_fixture
+):
+    rcpch_user = Epilepsy12User.objects.filter(is_rcpch_audit_team_member=True).first()
+    client.force_login(rcpch_user)
+    twofactor_signin(client, rcpch_user)
+
+    gosh_trust = Trust.objects.get(ods_code="RP4")
+
+    response = client.post(
+        reverse(
+            "organisational_audit_trust_question",
+            kwargs={"id": gosh_trust.id, "question_number": "99.9"},
+        )
+    )
+    assert response.status_code == 404
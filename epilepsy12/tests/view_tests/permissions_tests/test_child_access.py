@@ -0,0 +1,68 @@
+"""
+Tests for the child access resolved by the view decorators
+
+- the requested object, its case and its lead site are loaded in a single query, once per request
+- trust level users may only access children whose lead site is within their access scope (their own trust)
+"""
+
+# python imports
+import pytest
+
+# django imports
+from django.test import RequestFactory
+
+# E12 imports
+from epilepsy12.common_view_functions import compute_access_scope
+from epilepsy12.decorator import requested_child_access, resolve_child_access
+from epilepsy12.models import Epilepsy12User, Organisation
+from epilepsy12.tests.UserDataClasses import test_user_audit_centre_clinician_data
+
+
+@pytest.mark.django_db
+def test_child_access_loaded_once_per_request(
+    e12_case_factory, GOSH, django_assert_num_queries
+):
+    case = e12_case_factory(organisations__organisation=GOSH)
+    investigations = case.registration.investigations
+    request = RequestFactory().get("/")
+
+    with django_assert_num_queries(1):
+        child_access = resolve_child_access(
+            request, {"investigations_id": investigations.pk}
+        )
+        assert child_access.case == case
+        assert child_access.lead_organisation_id == GOSH.pk
+
+    # stacked decorators and the view reuse the objects loaded
+    with django_assert_num_queries(0):
+        assert (
+            resolve_child_access(request, {"investigations_id": investigations.pk})
+            is child_access
+        )
+        assert requested_child_access(request).requested_object == investigations
+
+
+@pytest.mark.django_db
+def test_child_access_is_within_users_scope(e12_case_factory, GOSH):
+    user = Epilepsy12User.objects.get(
+        first_name=test_user_audit_centre_clinician_data.role_str
+    )
+    case_in_trust = e12_case_factory(
+        organisations__organisation=user.organisation_employer
+    )
+    case_in_different_trust = e12_case_factory(
+        organisations__organisation=Organisation.objects.exclude(
+            trust=user.organisation_employer.trust
+        )
+        .filter(trust__isnull=False)
+        .first()
+    )
+    scope = compute_access_scope(user)
+    request = RequestFactory().get("/")
+
+    assert resolve_child_access(request, {"case_id": case_in_trust.pk}).is_within_scope(
+        scope
+    )
+    assert not resolve_child_access(
+        request, {"case_id": case_in_different_trust.pk}
+    ).is_within_scope(scope)
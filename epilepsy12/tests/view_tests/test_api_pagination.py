@@ -0,0 +1,44 @@
+"""
+Tests for the keyset pagination of the API lists
+
+- a viewset without OrderingFilter is paginated in its own ordering, with pk as the tie-breaker
+"""
+
+# python imports
+import pytest
+
+# django imports
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+# 3rd party imports
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# E12 imports
+from epilepsy12.models import Epilepsy12User
+from epilepsy12.tests.UserDataClasses import test_user_rcpch_audit_team_data
+from epilepsy12.views.api.epilepsy12user_viewset import Epilepsy12UserViewSet
+
+
+@pytest.mark.django_db
+def test_user_list_paginated_in_its_ordering():
+    rcpch_audit_team_user = Epilepsy12User.objects.get(
+        first_name=test_user_rcpch_audit_team_data.role_str
+    )
+    user_list = Epilepsy12UserViewSet.as_view({"get": "list"})
+
+    emails = []
+    next_page = "/api/v1/epilepsy12users/?page_size=2"
+    while next_page is not None:
+        request = APIRequestFactory().get(next_page)
+        force_authenticate(request, user=rcpch_audit_team_user)
+        response = user_list(request)
+        assert response.status_code == 200
+        emails += [user["email"] for user in response.data["results"]]
+        next_page = response.data["next"]
+
+    assert emails == list(
+        Epilepsy12User.objects.order_by(
+            Coalesce("surname", Value("")).desc(), "pk"
+        ).values_list("email", flat=True)
+    )
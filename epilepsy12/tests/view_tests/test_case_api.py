@@ -0,0 +1,189 @@
+"""
+Tests for the Case API
+
+- the list of cases is keyset paginated
+- the export streams every case as newline delimited JSON
+- the bulk upload creates valid cases with their sites, and reports rows which are not valid
+- the bulk upload looks each postcode up once, and warns of postcodes which could not be found
+"""
+
+# python imports
+import json
+import pytest
+from unittest.mock import patch
+
+# 3rd party imports
+import nhs_number as nhs_number_package
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# E12 imports
+from epilepsy12.models import Case, Epilepsy12User, Site
+from epilepsy12.general_functions.postcode_gazetteer import (
+    _postcode_details_from_gazetteer,
+)
+from epilepsy12.tests.UserDataClasses import test_user_rcpch_audit_team_data
+from epilepsy12.views.api.case_viewset import CaseViewSet
+
+
+@pytest.fixture
+def rcpch_audit_team_user():
+    return Epilepsy12User.objects.get(
+        first_name=test_user_rcpch_audit_team_data.role_str
+    )
+
+
+@pytest.mark.django_db
+def test_case_list_is_keyset_paginated(e12_case_factory, rcpch_audit_team_user):
+    e12_case_factory.create_batch(size=3)
+    case_list = CaseViewSet.as_view({"get": "list"})
+
+    request = APIRequestFactory().get("/api/v1/cases/", {"page_size": 2})
+    force_authenticate(request, user=rcpch_audit_team_user)
+    response = case_list(request)
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 2
+    assert "cursor=" in response.data["next"]
+
+    nhs_numbers = [case["nhs_number"] for case in response.data["results"]]
+    next_page = response.data["next"]
+    while next_page is not None:
+        request = APIRequestFactory().get(next_page)
+        force_authenticate(request, user=rcpch_audit_team_user)
+        response = case_list(request)
+        nhs_numbers += [case["nhs_number"] for case in response.data["results"]]
+        next_page = response.data["next"]
+
+    assert nhs_numbers == list(
+        Case.objects.order_by("pk").values_list("nhs_number", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_case_export_streams_ndjson(e12_case_factory, rcpch_audit_team_user):
+    e12_case_factory.create_batch(size=3)
+    case_export = CaseViewSet.as_view({"get": "export"})
+
+    request = APIRequestFactory().get("/api/v1/cases/export/")
+    force_authenticate(request, user=rcpch_audit_team_user)
+    response = case_export(request)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    exported_cases = [json.loads(line) for line in lines]
+
+    assert sorted(case["nhs_number"] for case in exported_cases) == sorted(
+        Case.objects.values_list("nhs_number", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_case_bulk_create(e12_case_factory, rcpch_audit_team_user, GOSH):
+    existing_case = e12_case_factory()
+    new_nhs_numbers = [
+        nhs_number
+        for nhs_number in nhs_number_package.generate(quantity=10)
+        if not Case.objects.filter(nhs_number=nhs_number).exists()
+    ][:2]
+
+    def case_row(nhs_number, ods_code=GOSH.ods_code):
+        return {
+            "nhs_number": nhs_number,
+            "first_name": "Bulk",
+            "surname": "Upload",
+            "date_of_birth": "2015-01-01",
+            # unknown postcode: not looked up
+            "postcode": "ZZ99 3CZ",
+            "sex": 1,
+            "ethnicity": "A",
+            "ods_code": ods_code,
+        }
+
+    rows = [
+        case_row(new_nhs_numbers[0]),
+        case_row(existing_case.nhs_number),
+        case_row(new_nhs_numbers[1], ods_code="NOT_AN_ODS_CODE"),
+        case_row("1234567890"),
+        case_row(new_nhs_numbers[0]),
+    ]
+
+    request = APIRequestFactory().post(
+        "/api/v1/cases/bulk_create_cases/", rows, format="json"
+    )
+    force_authenticate(request, user=rcpch_audit_team_user)
+    response = CaseViewSet.as_view({"post": "bulk_create_cases"})(request)
+
+    assert response.status_code == 200
+    assert response.data["created"] == 1
+    assert response.data["failed"] == 4
+    assert [result["status"] for result in response.data["results"]] == [
+        "created",
+        "error",
+        "error",
+        "error",
+        "error",
+    ]
+    assert "nhs_number" in response.data["results"][1]["errors"]
+    assert "ods_code" in response.data["results"][2]["errors"]
+    assert "nhs_number" in response.data["results"][3]["errors"]
+    assert "nhs_number" in response.data["results"][4]["errors"]
+
+    case = Case.objects.get(nhs_number=new_nhs_numbers[0])
+    assert case.history.count() == 1
+    assert (
+        Site.objects.get(
+            case=case, site_is_primary_centre_of_epilepsy_care=True
+        ).organisation
+        == GOSH
+    )
+    assert not Case.objects.filter(nhs_number=new_nhs_numbers[1]).exists()
+
+
+@pytest.mark.django_db
+def test_case_bulk_create_postcode_not_found(rcpch_audit_team_user, GOSH):
+    _postcode_details_from_gazetteer.cache_clear()
+    nhs_numbers = [
+        nhs_number
+        for nhs_number in nhs_number_package.generate(quantity=10)
+        if not Case.objects.filter(nhs_number=nhs_number).exists()
+    ][:2]
+    rows = [
+        {
+            "nhs_number": nhs_number,
+            "first_name": "Bulk",
+            "surname": "Upload",
+            "date_of_birth": "2015-01-01",
+            "postcode": "SW1A 1AA",
+            "sex": 1,
+            "ethnicity": "A",
+            "ods_code": GOSH.ods_code,
+        }
+        for nhs_number in nhs_numbers
+    ]
+
+    request = APIRequestFactory().post(
+        "/api/v1/cases/bulk_create_cases/", rows, format="json"
+    )
+    force_authenticate(request, user=rcpch_audit_team_user)
+    with patch(
+        "epilepsy12.general_functions.postcode_gazetteer.imd_for_postcode",
+        return_value=None,
+    ) as mock_imd_for_postcode, patch(
+        "epilepsy12.general_functions.postcode_gazetteer.coordinates_for_postcode",
+        return_value=(-0.1419, 51.5010),
+    ):
+        response = CaseViewSet.as_view({"post": "bulk_create_cases"})(request)
+
+    assert response.status_code == 200
+    assert response.data["created"] == 2
+    mock_imd_for_postcode.assert_called_once_with("SW1A1AA")
+    for result in response.data["results"]:
+        assert result["status"] == "created"
+        assert result["warnings"] == {
+            "postcode": [
+                "The deprivation quintile of SW1A1AA could not be found. The case has been created without this."
+            ]
+        }
+    assert Case.objects.get(nhs_number=nhs_numbers[0]).location_wgs84 is not None
@@ -316,6 +316,16 @@ organisation_patterns = [
         view=selected_organisation_summary,
         name="selected_organisation_summary",
     ),
+    path(
+        "organisation/<int:organisation_id>/figure/<str:figure_type>",
+        view=selected_organisation_figure,
+        name="selected_organisation_figure",
+    ),
+    path(
+        "organisation/boundary_tile/<str:tile_name>",
+        view=boundary_tile,
+        name="boundary_tile",
+    ),
     path(
         "organisation/<int:organisation_id>/publish",
         view=publish_kpis,
@@ -331,6 +341,11 @@ organisation_patterns = [
         view=selected_trust_kpis,
         name="selected_trust_kpis",
     ),
+    path(
+        "selected_trust/<int:organisation_id>/kpis/job/<int:job_id>",
+        view=kpi_aggregation_job_status,
+        name="kpi_aggregation_job_status",
+    ),
     path(
         "selected_trust/<int:organisation_id>/open_select",
         view=selected_trust_open_select,
@@ -1084,6 +1099,16 @@ organisational_audit_patterns = [
         view=organisational_audit_local_health_board,
         name="organisational_audit_local_health_board",
     ),
+    path(
+        "trust/<int:id>/audit/question/<str:question_number>/",
+        view=organisational_audit_trust_question,
+        name="organisational_audit_trust_question",
+    ),
+    path(
+        "local_health_board/<int:id>/audit/question/<str:question_number>/",
+        view=organisational_audit_local_health_board_question,
+        name="organisational_audit_local_health_board_question",
+    ),
     path("organisational_audit", view=organisational_audit),
 ]
 
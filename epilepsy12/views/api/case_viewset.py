@@ -2,6 +2,12 @@
 Django Rest Framework Case Viewset
 """
 # python
+import json
+
+# django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
 
 # django rest framework
 from rest_framework.response import Response
@@ -15,9 +21,10 @@ from rest_framework import serializers
 
 # third party
 from django_filters.rest_framework import DjangoFilterBackend
+from simple_history.utils import bulk_create_with_history
 
 # epilepsy12
-from epilepsy12.serializers.case_serializer import CaseSerializer
+from epilepsy12.serializers.case_serializer import CaseSerializer, BulkCaseSerializer
 from epilepsy12.serializers.first_paediatric_assessment_serializer import (
     FirstPaediatricAssessmentSerializer,
 )
@@ -36,11 +43,13 @@ from epilepsy12.models import (
     Organisation,
     Site,
     Episode,
-    MultiaxialDiagnosis,
     Comorbidity,
     Syndrome,
 )
 from epilepsy12.permissions import CanAccessOrganisation
+from epilepsy12.constants import UNKNOWN_POSTCODES_NO_SPACES
+from epilepsy12.general_functions import normalise_postcode, postcodes_details
+from epilepsy12.common_view_functions import invalidate_organisation_figures
 
 
 class CaseViewSet(
@@ -53,15 +62,41 @@ class CaseViewSet(
     API endpoint that allows users to be viewed.
     """
 
-    queryset = Case.objects.all().order_by("-surname")
+    queryset = Case.objects.prefetch_related("organisations")
     serializer_class = CaseSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
     filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
     filterset_fields = ["nhs_number", "surname"]
     search_fields = ["=nhs_number", "^surname"]
-    ordering = ["surname"]
+    # lists are keyset paginated on the ordering, which must be unique
+    ordering = ["pk"]
     lookup_field = "nhs_number"
 
+    # number of cases fetched from the database at a time by the export
+    EXPORT_CHUNK_SIZE = 500
+
+    # largest number of cases accepted in one bulk upload
+    BULK_CREATE_MAX_CASES = 1000
+
+    def get_case(self, nhs_number, error_key, *related):
+        """
+        Returns the case with the NHS number, in a single query joined to any related objects requested
+        (eg registration__management), raising a ValidationError if it does not exist
+        """
+        if nhs_number is None:
+            raise serializers.ValidationError({error_key: "No NHS number supplied."})
+
+        case = (
+            Case.objects.filter(nhs_number=nhs_number).select_related(*related).first()
+        )
+        if case is None:
+            raise serializers.ValidationError(
+                {
+                    error_key: "No Case in Epilepsy12 is associated with the NHS number supplied."
+                }
+            )
+        return case
+
     @action(
         detail=False,
         methods=["post"],
@@ -81,8 +116,8 @@ class CaseViewSet(
             "ethnicity": request.POST.get("ethnicity"),
         }
         if nhs_number:
-            if Case.objects.filter(nhs_number=nhs_number).exists():
-                case = Case.objects.filter(nhs_number=nhs_number).get()
+            case = Case.objects.filter(nhs_number=nhs_number).first()
+            if case is not None:
                 serializer = self.serializer_class()
                 raise serializer.ValidationError(
                     {"Case": f"{case} already exists. No record created."}
@@ -137,25 +172,189 @@ class CaseViewSet(
 
         return Response(serializers.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def retrieve(self, request, nhs_number=None):
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
+    )
+    def bulk_create_cases(self, request):
+        """
+        Creates many cases, for trusts submitting cases from their electronic patient records.
+        Expects a JSON list of cases with the fields of create_case_in_organisation, each allocated to the organisation
+        with its ods_code as primary centre of epilepsy care.
+        Existing NHS numbers and organisations are looked up in one query each, and postcodes in batch. The valid cases
+        and their sites are inserted in one transaction. Returns the result of each row, in the order supplied, with a
+        warning on rows whose postcode location or deprivation quintile could not be found.
+        """
+        rows = request.data
+        if not isinstance(rows, list) or len(rows) == 0:
+            raise serializers.ValidationError(
+                {"Cases": "A list of cases must be supplied. No records created."}
+            )
+        if len(rows) > self.BULK_CREATE_MAX_CASES:
+            raise serializers.ValidationError(
+                {
+                    "Cases": f"No more than {self.BULK_CREATE_MAX_CASES} cases can be created at once. No records created."
+                }
+            )
+
+        row_serializers = [BulkCaseSerializer(data=row) for row in rows]
+        valid_rows = [
+            row_serializer.validated_data
+            for row_serializer in row_serializers
+            if row_serializer.is_valid()
+        ]
+
+        existing_nhs_numbers = set(
+            Case.objects.filter(
+                nhs_number__in=[row["nhs_number"] for row in valid_rows]
+            ).values_list("nhs_number", flat=True)
+        )
+        organisations = Organisation.objects.in_bulk(
+            {row["ods_code"] for row in valid_rows}, field_name="ods_code"
+        )
+        details_by_postcode = postcodes_details(
+            row["postcode"]
+            for row in valid_rows
+            if row.get("postcode")
+            and normalise_postcode(row["postcode"]) not in UNKNOWN_POSTCODES_NO_SPACES
+        )
+
+        results = []
+        cases_to_create = []
+        sites_to_create = []
+        for row_number, row_serializer in enumerate(row_serializers):
+            if not row_serializer.is_valid():
+                results.append(
+                    {
+                        "row": row_number,
+                        "status": "error",
+                        "errors": row_serializer.errors,
+                    }
+                )
+                continue
+
+            case_params = dict(row_serializer.validated_data)
+            ods_code = case_params.pop("ods_code")
+            nhs_number = case_params["nhs_number"]
+
+            if nhs_number in existing_nhs_numbers:
+                errors = {
+                    "nhs_number": [f"{nhs_number} already exists. No record created."]
+                }
+            elif ods_code not in organisations:
+                errors = {
+                    "ods_code": [
+                        f"Organisation {ods_code} does not exist. No record created."
+                    ]
+                }
+            else:
+                errors = None
+
+            if errors is not None:
+                results.append(
+                    {
+                        "row": row_number,
+                        "status": "error",
+                        "nhs_number": nhs_number,
+                        "errors": errors,
+                    }
+                )
+                continue
+
+            # later rows with the same NHS number are rejected
+            existing_nhs_numbers.add(nhs_number)
+
+            # bulk_create does not call Case.save, so the postcode details are set here
+            case = Case(**case_params, created_by=request.user, updated_by=request.user)
+            if case.postcode:
+                case.update_postcode_details(
+                    details_by_postcode.get(normalise_postcode(case.postcode))
+                )
+            result = {"row": row_number, "status": "created", "nhs_number": nhs_number}
+            # the case is still created, with the postcode details that could be found
+            not_found = []
+            if normalise_postcode(case.postcode or "") in details_by_postcode:
+                if case.index_of_multiple_deprivation_quintile is None:
+                    not_found.append("deprivation quintile")
+                if case.location_wgs84 is None and not case.postcode.startswith("JE"):
+                    not_found.append("location")
+            if not_found:
+                result["warnings"] = {
+                    "postcode": [
+                        f"The {' and '.join(not_found)} of {case.postcode} could not be found. The case has been created without this."
+                    ]
+                }
+            cases_to_create.append(case)
+            sites_to_create.append(
+                Site(
+                    case=case,
+                    organisation=organisations[ods_code],
+                    site_is_actively_involved_in_epilepsy_care=True,
+                    site_is_primary_centre_of_epilepsy_care=True,
+                    created_by=request.user,
+                    updated_by=request.user,
+                )
+            )
+            results.append(result)
+
+        if cases_to_create:
+            with transaction.atomic():
+                bulk_create_with_history(cases_to_create, Case)
+                # each site picks up the primary key of its case, now it is saved
+                bulk_create_with_history(sites_to_create, Site)
+
+            # bulk_create does not send post_save, which invalidates the dashboard figures. Only the demographics of
+            # the lead organisations change, as the new cases are not yet registered
+            for organisation_id in {site.organisation_id for site in sites_to_create}:
+                invalidate_organisation_figures(organisation_id)
+
         return Response(
-            CaseSerializer(instance=Case.objects.get(nhs_number=nhs_number)).data,
+            {
+                "created": len(cases_to_create),
+                "failed": len(rows) - len(cases_to_create),
+                "results": results,
+            },
             status=status.HTTP_200_OK,
         )
 
-    def list(self, request, *args, **kwargs):
+    def retrieve(self, request, nhs_number=None):
+        case = self.get_case(nhs_number, "Case")
         return Response(
-            CaseSerializer(Case.objects.all(), many=True).data,
+            CaseSerializer(instance=case).data,
             status=status.HTTP_200_OK,
         )
 
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
+    )
+    def export(self, request):
+        """
+        Streams all cases matching the filters as newline delimited JSON, one case per line, for bulk consumers.
+        Cases are read from the database in chunks, so memory use does not grow with the number of cases.
+        """
+        cases = self.filter_queryset(self.get_queryset())
+
+        def case_lines():
+            for case in cases.iterator(chunk_size=self.EXPORT_CHUNK_SIZE):
+                yield json.dumps(CaseSerializer(case).data, cls=DjangoJSONEncoder)
+                yield "\n"
+
+        return StreamingHttpResponse(case_lines(), content_type="application/x-ndjson")
+
     @action(
         detail=True,
         methods=["put", "get"],
         permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
     )
     def first_paediatric_assessment(self, request, nhs_number=None):
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number,
+            "First paediatric assessment",
+            "registration__firstpaediatricassessment",
+        )
 
         if self.request.method == "PUT":
             serializer = FirstPaediatricAssessmentSerializer(
@@ -197,7 +396,9 @@ class CaseViewSet(
         permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
     )
     def epilepsy_context(self, request, nhs_number=None):
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number, "epilepsy_context", "registration__epilepsycontext"
+        )
         if self.request.method == "PUT":
             serializer = EpilepsyContextSerializer(
                 case.registration.epilepsycontext, request.data
@@ -238,7 +439,9 @@ class CaseViewSet(
         permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
     )
     def investigations(self, request, nhs_number=None):
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number, "investigations", "registration__investigations"
+        )
         if self.request.method == "PUT":
             serializer = InvestigationsSerializer(
                 case.registration.investigations, request.data
@@ -279,7 +482,7 @@ class CaseViewSet(
         permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
     )
     def management(self, request, nhs_number=None):
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(nhs_number, "Management", "registration__management")
         if self.request.method == "PUT":
             serializer = ManagementSerializer(
                 case.registration.management, request.data
@@ -318,7 +521,7 @@ class CaseViewSet(
         permission_classes=[permissions.IsAuthenticated, CanAccessOrganisation],
     )
     def assessment(self, request, nhs_number=None):
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(nhs_number, "Assessment", "registration__assessment")
         if self.request.method == "PUT":
             context = {
                 "general_paediatric_centre_ods_code": self.request.data[
@@ -371,17 +574,9 @@ class CaseViewSet(
         """
         Get or update multiaxial diagnosis instance
         """
-        if nhs_number is None:
-            raise serializers.ValidationError(
-                {"Comorbidities": "No NHS number supplied."}
-            )
-        if not Case.objects.filter(nhs_number=nhs_number).exists():
-            raise serializers.ValidationError(
-                {
-                    "Comorbidities": "No Case in Epilepsy12 is associated with the NHS number supplied."
-                }
-            )
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number, "Comorbidities", "registration__multiaxialdiagnosis"
+        )
 
         if request.method == "GET":
             return Response(
@@ -391,9 +586,7 @@ class CaseViewSet(
                 status=status.HTTP_200_OK,
             )
         elif request.method == "PUT":
-            instance = MultiaxialDiagnosis.objects.get(
-                pk=case.registration.multiaxialdiagnosis.pk
-            )
+            instance = case.registration.multiaxialdiagnosis
 
             # this is a custom field passed in as a param
             # it is validated and converted to an Comorbidity object in the serializer
@@ -417,24 +610,15 @@ class CaseViewSet(
         """
         Returns a list of comorbidities for a given Case
         """
-        if nhs_number is None:
-            raise serializers.ValidationError(
-                {"Comorbidities": "No NHS number supplied."}
-            )
-        if not Case.objects.filter(nhs_number=nhs_number).exists():
-            raise serializers.ValidationError(
-                {
-                    "Comorbidities": "No Case in Epilepsy12 is associated with the NHS number supplied."
-                }
-            )
-
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number, "Comorbidities", "registration__multiaxialdiagnosis"
+        )
 
         return Response(
             ComorbiditySerializer(
                 instance=Comorbidity.objects.filter(
                     multiaxial_diagnosis=case.registration.multiaxialdiagnosis
-                ),
+                ).select_related("comorbidityentity"),
                 many=True,
             ).data,
             status=status.HTTP_200_OK,
@@ -473,16 +657,9 @@ class CaseViewSet(
         """
         Returns a list of episodes for a given Case
         """
-        if nhs_number is None:
-            raise serializers.ValidationError({"Episodes": "No NHS number supplied."})
-        if not Case.objects.filter(nhs_number=nhs_number).exists():
-            raise serializers.ValidationError(
-                {
-                    "Episodes": "No Case in Epilepsy12 is associated with the NHS number supplied."
-                }
-            )
-
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number, "Episodes", "registration__multiaxialdiagnosis"
+        )
 
         return Response(
             EpisodeSerializer(
@@ -524,22 +701,15 @@ class CaseViewSet(
         """
         Returns a list of syndromes for a given Case
         """
-        if nhs_number is None:
-            raise serializers.ValidationError({"Syndromes": "No NHS number supplied."})
-        if not Case.objects.filter(nhs_number=nhs_number).exists():
-            raise serializers.ValidationError(
-                {
-                    "Syndromes": "No Case in Epilepsy12 is associated with the NHS number supplied."
-                }
-            )
-
-        case = Case.objects.get(nhs_number=nhs_number)
+        case = self.get_case(
+            nhs_number, "Syndromes", "registration__multiaxialdiagnosis"
+        )
 
         return Response(
             SyndromeSerializer(
                 instance=Syndrome.objects.filter(
                     multiaxial_diagnosis=case.registration.multiaxialdiagnosis
-                ),
+                ).select_related("syndrome"),
                 many=True,
             ).data,
             status=status.HTTP_200_OK,
@@ -26,7 +26,7 @@ class ComorbidityViewSet(GenericViewSet, mixins.UpdateModelMixin):
     Creation or list of comorbidities occurs through the case viewset.
     """
 
-    queryset = Comorbidity.objects.all()
+    queryset = Comorbidity.objects.select_related("comorbidityentity")
     serializer_class = ComorbiditySerializer
     permission_classes = [permissions.IsAuthenticated]
 
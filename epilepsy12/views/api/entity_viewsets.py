@@ -49,7 +49,7 @@ class OrganisationViewSet(viewsets.ModelViewSet):
     API endpoint that allows a list of organisation and community trusts to be viewed.
     """
 
-    queryset = Organisation.objects.all()
+    queryset = Organisation.objects.select_related("trust")
     serializer_class = OrganisationSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
     lookup_field = "ods_code"
@@ -58,8 +58,7 @@ class OrganisationViewSet(viewsets.ModelViewSet):
         """
         API endpoint that retrieves an organisation by ODS Code
         """
-        queryset = Organisation.objects.all()
-        organisation = get_object_or_404(queryset, ods_code=ods_code)
+        organisation = get_object_or_404(self.get_queryset(), ods_code=ods_code)
         self.check_object_permissions(self.request, organisation)
         serializer = OrganisationSerializer(organisation)
         return Response(serializer.data)
@@ -74,7 +73,7 @@ class OrganisationViewSet(viewsets.ModelViewSet):
         """
         API endpoint that allows a list of all cases associated with a given organisation (retrieved by ODS Code)
         """
-        queryset = Organisation.objects.all()
+        queryset = self.get_queryset().prefetch_related("cases__organisations")
         organisation = get_object_or_404(queryset, ods_code=ods_code)
         serializer = OrganisationCaseSerializer(organisation)
         return Response(serializer.data)
@@ -3,6 +3,10 @@ Django Rest Framework Epilepsy12User Viewset
 """
 # python
 
+# django
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
 # django rest framework
 from rest_framework import permissions, viewsets
 from rest_framework.filters import SearchFilter, OrderingFilter
@@ -20,6 +24,13 @@ class Epilepsy12UserViewSet(viewsets.ReadOnlyModelViewSet):
     API endpoint that allows users to be viewed.
     """
 
-    queryset = Epilepsy12User.objects.all().order_by("-surname")
+    # the keyset cannot hold a null surname, so a missing surname sorts as empty
+    queryset = (
+        Epilepsy12User.objects.all()
+        .annotate(surname_ordering=Coalesce("surname", Value("")))
+        .order_by("-surname")
+    )
     serializer_class = Epilepsy12UserSerializer
+    # lists are keyset paginated on the ordering, ending in pk so it is unique
+    ordering = ["-surname_ordering", "pk"]
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
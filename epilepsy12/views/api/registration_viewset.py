@@ -42,6 +42,8 @@ class RegistrationViewSet(
 
     queryset = Registration.objects.all().order_by("-first_paediatric_assessment_date")
     serializer_class = RegistrationSerializer
+    # lists are keyset paginated on the ordering, ending in pk so it is unique
+    ordering = ["-first_paediatric_assessment_date", "pk"]
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
 
     @action(
@@ -21,6 +21,6 @@ class SiteViewSet(GenericViewSet, mixins.RetrieveModelMixin, mixins.UpdateModelM
     API endpoint that allows allocated sites to be viewed.
     """
 
-    queryset = Site.objects.all()
+    queryset = Site.objects.select_related("case")
     serializer_class = SiteSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
@@ -25,7 +25,7 @@ class SyndromeViewSet(GenericViewSet, mixins.UpdateModelMixin):
     Creation or list of comorbidities occurs through the case viewset.
     """
 
-    queryset = Syndrome.objects.all()
+    queryset = Syndrome.objects.select_related("syndrome")
     serializer_class = SyndromeSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
 
@@ -50,6 +50,6 @@ class SyndromeViewSet(viewsets.ReadOnlyModelViewSet):
     API endpoint that allows all selectable syndromes to be viewed.
     """
 
-    queryset = Syndrome.objects.all()
+    queryset = Syndrome.objects.select_related("syndrome")
     serializer_class = SyndromeSerializer
     permission_classes = [permissions.IsAuthenticated, CanAccessOrganisation]
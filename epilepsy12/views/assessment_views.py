@@ -6,7 +6,11 @@ from ..common_view_functions import (
     validate_and_update_model,
     recalculate_form_generate_response,
 )
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 
 
 def update_site_model(
@@ -246,7 +250,6 @@ def consultant_paediatrician_referral_date(request, assessment_id):
     """
 
     try:
-        assessment = Assessment.objects.get(pk=assessment_id)
         error_message = None
         validate_and_update_model(
             request=request,
@@ -256,7 +259,7 @@ def consultant_paediatrician_referral_date(request, assessment_id):
             page_element="date_field",
             comparison_date_field_name="consultant_paediatrician_input_date",
             is_earliest_date=True,
-            earliest_allowable_date=assessment.registration.case.date_of_birth,
+            earliest_allowable_date=requested_child_access(request).case.date_of_birth,
         )
     except ValueError as error:
         error_message = error
@@ -1698,7 +1701,6 @@ def epilepsy_specialist_nurse_referral_date(request, assessment_id):
     """
 
     try:
-        assessment = Assessment.objects.get(pk=assessment_id)
         error_message = None
         validate_and_update_model(
             request=request,
@@ -1708,7 +1710,7 @@ def epilepsy_specialist_nurse_referral_date(request, assessment_id):
             page_element="date_field",
             comparison_date_field_name="epilepsy_specialist_nurse_input_date",
             is_earliest_date=True,
-            earliest_allowable_date=assessment.registration.case.date_of_birth,
+            earliest_allowable_date=requested_child_access(request).case.date_of_birth,
         )
     except ValueError as error:
         error_message = error
@@ -11,7 +11,6 @@ from django.urls import reverse
 from django.contrib.auth.decorators import permission_required
 from django.contrib.gis.db.models import Q
 from django.contrib import messages
-from django.core.paginator import Paginator
 
 # third party imports
 from django_htmx.http import trigger_client_event, HttpResponseClientRedirect
@@ -34,6 +33,14 @@ from ..general_functions import (
     construct_transfer_epilepsy12_site_outcome_email,
     send_email_to_recipients,
 )
+from ..common_view_functions import (
+    mark_kpi_aggregations_dirty,
+    case_list_queryset,
+    case_list_sort_flag,
+    case_list_sort_field,
+    keyset_page,
+    access_scope,
+)
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -54,12 +61,12 @@ def case_list(request, organisation_id):
 
     """
 
-    sort_flag = None
-
     filter_term = request.GET.get("filtered_case_list")
 
     # get currently selected organisation
-    organisation = Organisation.objects.get(pk=organisation_id)
+    organisation = Organisation.objects.select_related(
+        "country", "trust", "local_health_board"
+    ).get(pk=organisation_id)
 
     # get trust or health board
     if organisation.country.boundary_identifier == "W92000004":
@@ -72,240 +79,42 @@ def case_list(request, organisation_id):
         # get all organisations which are in the same parent trust
         organisation_children = Organisation.objects.filter(trust=parent_trust).all()
 
-    if filter_term:
-        # filter_term is called if filtering by search box
-        if request.user.view_preference == 0:
-            # user has requested organisation level view
-            all_cases = (
-                Case.objects.filter(
-                    Q(site__organisation=organisation)
-                    & Q(site__site_is_primary_centre_of_epilepsy_care=True)
-                    & Q(site__site_is_actively_involved_in_epilepsy_care=True)
-                    & (
-                        Q(first_name__icontains=filter_term)
-                        | Q(surname__icontains=filter_term)
-                        | Q(nhs_number__icontains=filter_term)
-                        | Q(unique_reference_number__icontains=filter_term)
-                        | Q(id__icontains=filter_term)
-                    )
-                )
-                .order_by("surname")
-                .all()
-            )
-        elif request.user.view_preference == 1:
-            # user has requested trust level view
-            if organisation.country.boundary_identifier == "W92000004":
-                # in Wales filter by health board
-                trust_filter = Q(
-                    site__organisation__local_health_board=organisation.local_health_board
-                )
-            else:
-                # England filter by Trust
-                trust_filter = Q(site__organisation__trust=organisation.trust)
-
-            all_cases = (
-                Case.objects.filter(
-                    trust_filter
-                    & Q(site__site_is_primary_centre_of_epilepsy_care=True)
-                    & Q(site__site_is_actively_involved_in_epilepsy_care=True)
-                    & (
-                        Q(first_name__icontains=filter_term)
-                        | Q(surname__icontains=filter_term)
-                        | Q(nhs_number__icontains=filter_term)
-                        | Q(unique_reference_number__icontains=filter_term)
-                        | Q(id__icontains=filter_term)
-                    )
-                )
-                .order_by("surname")
-                .all()
-            )
-        elif request.user.view_preference == 2:
-            # user has requested national level view
-            all_cases = (
-                Case.objects.filter(
-                    Q(site__site_is_primary_centre_of_epilepsy_care=True)
-                    & Q(site__site_is_actively_involved_in_epilepsy_care=True)
-                    & (
-                        Q(first_name__icontains=filter_term)
-                        | Q(surname__icontains=filter_term)
-                        | Q(nhs_number__icontains=filter_term)
-                        | Q(unique_reference_number__icontains=filter_term)
-                        | Q(id__icontains=filter_term)
-                    )
-                )
-                .order_by("surname")
-                .all()
-            )
-
-    else:
-        """
-        Cases are filtered based on user preference (request.user.view_preference), where 0 is organisation level,
-        1 is trust level and 2 is national level
-        Only RCPCH audit staff have this final option.
-        """
-
-        jersey_flag = organisation.country.boundary_identifier == "JEY"
-
-        if request.user.view_preference == 2:
-            # this is an RCPCH audit team member requesting National level
-            filtered_cases = Case.objects.all()
-        elif request.user.view_preference == 1:
-            # filters all primary Trust level centres, irrespective of if active or inactive
-            if organisation.country.boundary_identifier == "W92000004":
-                # welsh - select health boards
-                filtered_cases = Case.objects.filter(
-                    organisations__local_health_board=parent_trust,
-                    site__site_is_primary_centre_of_epilepsy_care=True,
-                    site__site_is_actively_involved_in_epilepsy_care=True,
-                )
-            else:
-                # England - select trusts
-                filtered_cases = Case.objects.filter(
-                    organisations__trust=parent_trust,
-                    site__site_is_primary_centre_of_epilepsy_care=True,
-                    site__site_is_actively_involved_in_epilepsy_care=True,
-                )
-
-        else:
-            # filters all primary centres at organisation level, irrespective of if active or inactive
-            filtered_cases = Case.objects.filter(
-                organisations__name=organisation,
-                site__site_is_primary_centre_of_epilepsy_care=True,
-                site__site_is_actively_involved_in_epilepsy_care=True,
-            )
-
-        if (
-            request.htmx.trigger_name == "sort_by_nhs_number_up"
-            or request.GET.get("sort_flag") == "sort_by_nhs_number_up"
-        ):
-            all_cases = filtered_cases.order_by("nhs_number").all()
-            if jersey_flag:
-                all_cases = filtered_cases.order_by("unique_reference_number").all()
-            sort_flag = "sort_by_nhs_number_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_nhs_number_down"
-            or request.GET.get("sort_flag") == "sort_by_nhs_number_down"
-        ):
-            all_cases = filtered_cases.order_by("-nhs_number").all()
-            if jersey_flag:
-                all_cases = filtered_cases.order_by("-unique_reference_number").all()
-            sort_flag = "sort_by_nhs_number_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_ethnicity_up"
-            or request.GET.get("sort_flag") == "sort_by_ethnicity_up"
-        ):
-            all_cases = filtered_cases.order_by("ethnicity").all()
-            sort_flag = "sort_by_ethnicity_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_ethnicity_down"
-            or request.GET.get("sort_flag") == "sort_by_ethnicity_down"
-        ):
-            all_cases = filtered_cases.order_by("-ethnicity").all()
-            sort_flag = "sort_by_ethnicity_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_sex_up"
-            or request.GET.get("sort_flag") == "sort_by_sex_up"
-        ):
-            all_cases = filtered_cases.order_by("sex").all()
-            sort_flag = "sort_by_sex_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_sex_down"
-            or request.GET.get("sort_flag") == "sort_by_sex_down"
-        ):
-            all_cases = filtered_cases.order_by("-sex").all()
-            sort_flag = "sort_by_sex_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_name_up"
-            or request.GET.get("sort_flag") == "sort_by_name_up"
-        ):
-            all_cases = filtered_cases.order_by("surname").all()
-            sort_flag = "sort_by_name_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_name_down"
-            or request.GET.get("sort_flag") == "sort_by_name_down"
-        ):
-            all_cases = filtered_cases.order_by("-surname").all()
-            sort_flag = "sort_by_name_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_id_up"
-            or request.GET.get("sort_flag") == "sort_by_id_up"
-        ):
-            all_cases = filtered_cases.order_by("id").all()
-            sort_flag = "sort_by_id_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_id_down"
-            or request.GET.get("sort_flag") == "sort_by_id_down"
-        ):
-            all_cases = filtered_cases.order_by("-id").all()
-            sort_flag = "sort_by_id_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_deadline_up"
-            or request.GET.get("sort_flag") == "sort_by_deadline_up"
-        ):
-            all_cases = filtered_cases.order_by(
-                "registration__audit_submission_date"
-            ).all()
-            sort_flag = "sort_by_deadline_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_deadline_down"
-            or request.GET.get("sort_flag") == "sort_by_deadline_down"
-        ):
-            all_cases = filtered_cases.order_by(
-                "-registration__audit_submission_date"
-            ).all()
-            sort_flag = "sort_by_deadline_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_cohort_up"
-            or request.GET.get("sort_flag") == "sort_by_cohort_up"
-        ):
-            all_cases = filtered_cases.order_by("registration__cohort").all()
-            sort_flag = "sort_by_cohort_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_cohort_down"
-            or request.GET.get("sort_flag") == "sort_by_cohort_down"
-        ):
-            all_cases = filtered_cases.order_by("-registration__cohort").all()
-            sort_flag = "sort_by_cohort_down"
-        elif (
-            request.htmx.trigger_name == "sort_by_days_remaining_up"
-            or request.GET.get("sort_flag") == "sort_by_days_remaining_up"
-        ):
-            all_cases = filtered_cases.order_by(
-                "registration__days_remaining_before_submission"
-            ).all()
-            sort_flag = "sort_by_days_remaining_before_submission_up"
-        elif (
-            request.htmx.trigger_name == "sort_by_days_remaining_before_submission_down"
-            or request.GET.get("sort_flag")
-            == "sort_by_days_remaining_before_submission_down"
-        ):
-            all_cases = filtered_cases.order_by(
-                "-registration__days_remaining_before_submission"
-            ).all()
-            sort_flag = "sort_by_days_remaining_before_submission_down"
-        else:
-            all_cases = filtered_cases.order_by("surname").all()
-
-    registered_cases = all_cases.filter(
-        ~Q(registration__isnull=True)
-        & Q(site__site_is_primary_centre_of_epilepsy_care=True)
-        & Q(site__site_is_actively_involved_in_epilepsy_care=True)
-    ).all()
-
-    cases_in_transfer = registered_cases.filter(site__active_transfer=True)
+    """
+    Cases are filtered based on user preference (request.user.view_preference), where 0 is organisation level,
+    1 is trust level and 2 is national level
+    Only RCPCH audit staff have this final option.
+    Filtered by the search box if filter_term is present, and sorted by the sort button clicked (sort_flag).
+    """
+    all_cases = case_list_queryset(
+        organisation=organisation,
+        view_preference=request.user.view_preference,
+        search_term=filter_term,
+    )
 
-    paginator = Paginator(all_cases, 50)
-    page_number = request.GET.get("page", 1)
-    case_list = paginator.page(page_number)
+    sort_flag = case_list_sort_flag(request)
 
-    case_count = all_cases.count()
-    registered_count = registered_cases.count()
+    # pages are keyset paginated - after/before are the ids of the last/first cases on the page the user came from
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+    case_list = keyset_page(
+        all_cases,
+        sort_field=case_list_sort_field(sort_flag, organisation),
+        after=int(after) if after and after.isdigit() else None,
+        before=int(before) if before and before.isdigit() else None,
+    )
 
-    if (
-        request.user.is_rcpch_audit_team_member
-        or request.user.is_rcpch_staff
-        or request.user.is_superuser
-    ):
+    if request.htmx:
+        # the case table does not show the totals
+        case_count = registered_count = None
+    else:
+        case_count = all_cases.count()
+        registered_count = all_cases.filter(
+            Q(registration__isnull=False)
+            & Q(site__site_is_primary_centre_of_epilepsy_care=True)
+            & Q(site__site_is_actively_involved_in_epilepsy_care=True)
+        ).count()
+
+    if access_scope(request).is_national:
         if organisation.country.boundary_identifier == "W92000004":
             rcpch_choices = (
                 (0, "Organisation level"),
@@ -339,7 +148,6 @@ def case_list(request, organisation_id):
         "organisation_children": organisation_children,
         "rcpch_choices": rcpch_choices,
         "organisation_id": organisation_id,
-        "cases_in_transfer": cases_in_transfer,
         "filtered_case_list": filter_term,
     }
     if request.htmx:
@@ -459,6 +267,10 @@ def transfer_response(request, organisation_id, case_id, organisation_response):
         # Reset the KPI to the original organisation
         case.registration.kpi.organisation = site.transfer_origin_organisation
         case.registration.kpi.save()
+        mark_kpi_aggregations_dirty(
+            organisation_ids=[origin_organisation.pk, target_organisation.pk],
+            cohort=case.registration.cohort,
+        )
 
         # Any additional responsibilities that were previously maintained before by the target organisation
         # transfer by the target organisation must be handed back by creating new record
@@ -508,6 +320,10 @@ def transfer_response(request, organisation_id, case_id, organisation_response):
         # update the KPI record to the new organisation
         case.registration.kpi.organisation = target_organisation
         case.registration.kpi.save()
+        mark_kpi_aggregations_dirty(
+            organisation_ids=[origin_organisation.pk, target_organisation.pk],
+            cohort=case.registration.cohort,
+        )
     else:
         raise Exception("No organisation response supplied")
 
@@ -1,7 +1,11 @@
 from django.contrib.auth.decorators import permission_required
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 from epilepsy12.constants.common import OPT_OUT_UNCERTAIN
-from ..models import EpilepsyContext, Registration, Site
+from ..models import EpilepsyContext, Registration
 from ..common_view_functions import (
     validate_and_update_model,
     recalculate_form_generate_response,
@@ -18,12 +22,8 @@ def epilepsy_context(request, case_id):
         registration=registration
     )
 
-    site = Site.objects.filter(
-        site_is_actively_involved_in_epilepsy_care=True,
-        site_is_primary_centre_of_epilepsy_care=True,
-        case=registration.case,
-    ).get()
-    organisation_id = site.organisation.pk
+    # the lead site was looked up by user_may_view_this_child
+    organisation_id = requested_child_access(request).lead_organisation_id
 
     context = {
         "case_id": case_id,
@@ -5,8 +5,12 @@ from ..common_view_functions import (
     validate_and_update_model,
     recalculate_form_generate_response,
 )
-from ..models import Registration, FirstPaediatricAssessment, Site
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..models import Registration, FirstPaediatricAssessment
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 
 
 @login_and_otp_required()
@@ -28,12 +32,8 @@ def first_paediatric_assessment(request, case_id) -> HttpResponse:
             registration=registration
         ).get()
 
-    site = Site.objects.filter(
-        site_is_actively_involved_in_epilepsy_care=True,
-        site_is_primary_centre_of_epilepsy_care=True,
-        case=registration.case,
-    ).get()
-    organisation_id = site.organisation.pk
+    # the lead site was looked up by user_may_view_this_child
+    organisation_id = requested_child_access(request).lead_organisation_id
 
     context = {
         "case_id": case_id,
@@ -33,6 +33,9 @@ def registration_active(request, case_id, active_template):
     ).get()
     organisation_id = site.organisation.pk
 
+    # the steps poll this view until any queued recalculation of form progress has been applied
+    audit_progress_pending = registration.pending_audit_progress_updates.exists()
+
     # enable the steps if has just registered
     if audit_progress.registration_complete:
         if active_template == "none":
@@ -43,6 +46,7 @@ def registration_active(request, case_id, active_template):
         "active_template": active_template,
         "case_id": case_id,
         "organisation_id": organisation_id,
+        "audit_progress_pending": audit_progress_pending,
     }
 
     return render(
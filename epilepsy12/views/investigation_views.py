@@ -1,12 +1,16 @@
 from datetime import date
 from django.utils import timezone
 from django.contrib.auth.decorators import permission_required
-from epilepsy12.models import Investigations, Registration, Site
+from epilepsy12.models import Investigations, Registration
 from ..common_view_functions import (
     validate_and_update_model,
     recalculate_form_generate_response,
 )
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 
 
 @login_and_otp_required()
@@ -19,12 +23,8 @@ def investigations(request, case_id):
         registration=registration
     )
 
-    site = Site.objects.filter(
-        site_is_actively_involved_in_epilepsy_care=True,
-        site_is_primary_centre_of_epilepsy_care=True,
-        case=registration.case,
-    ).get()
-    organisation_id = site.organisation.pk
+    # the lead site was looked up by user_may_view_this_child
+    organisation_id = requested_child_access(request).lead_organisation_id
 
     if investigations.eeg_performed_date == date(year=1915, month=4, day=15):
         eeg_declined = True
@@ -125,7 +125,6 @@ def eeg_request_date(request, investigations_id):
     This updates the model and returns the same partial.
     """
     try:
-        investigations = Investigations.objects.get(pk=investigations_id)
         error_message = None
         validate_and_update_model(
             request,
@@ -135,7 +134,7 @@ def eeg_request_date(request, investigations_id):
             page_element="date_field",
             comparison_date_field_name="eeg_performed_date",
             is_earliest_date=True,
-            earliest_allowable_date=investigations.registration.case.date_of_birth,
+            earliest_allowable_date=requested_child_access(request).case.date_of_birth,
         )
 
     except ValueError as error:
@@ -409,7 +408,6 @@ def mri_brain_requested_date(request, investigations_id):
     """
 
     try:
-        investigations = Investigations.objects.get(pk=investigations_id)
         error_message = None
         validate_and_update_model(
             request,
@@ -419,7 +417,7 @@ def mri_brain_requested_date(request, investigations_id):
             page_element="date_field",
             comparison_date_field_name="mri_brain_reported_date",
             is_earliest_date=True,
-            earliest_allowable_date=investigations.registration.case.date_of_birth,
+            earliest_allowable_date=requested_child_access(request).case.date_of_birth,
         )
 
     except ValueError as errors:
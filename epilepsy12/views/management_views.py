@@ -8,7 +8,6 @@ from epilepsy12.models import (
     Registration,
     AntiEpilepsyMedicine,
     AntiEpilepsyMedicine,
-    Site,
     Medicine,
 )
 from ..common_view_functions import (
@@ -16,7 +15,11 @@ from ..common_view_functions import (
     recalculate_form_generate_response,
     get_medicine_choices,
 )
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 
 
 @login_and_otp_required()
@@ -43,12 +46,8 @@ def management(request, case_id):
         management=management, is_rescue_medicine=False
     ).order_by("-antiepilepsy_medicine_start_date")
 
-    site = Site.objects.filter(
-        site_is_actively_involved_in_epilepsy_care=True,
-        site_is_primary_centre_of_epilepsy_care=True,
-        case=registration.case,
-    ).get()
-    organisation_id = site.organisation.pk
+    # the lead site was looked up by user_may_view_this_child
+    organisation_id = requested_child_access(request).lead_organisation_id
 
     context = {
         "case_id": case_id,
@@ -32,7 +32,6 @@ from ..models import (
     Comorbidity,
     Episode,
     MultiaxialDiagnosis,
-    Site,
     Syndrome,
     SyndromeList,
     ComorbidityList,
@@ -43,7 +42,11 @@ from ..common_view_functions import (
     recalculate_form_generate_response,
     completed_fields,
 )
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 
 """
 Constants for selections
@@ -116,12 +119,8 @@ def multiaxial_diagnosis(request, case_id):
 
     epilepsy_causes = EpilepsyCause.objects.all().order_by("preferredTerm")
 
-    site = Site.objects.filter(
-        site_is_actively_involved_in_epilepsy_care=True,
-        site_is_primary_centre_of_epilepsy_care=True,
-        case=registration.case,
-    ).get()
-    organisation_id = site.organisation.pk
+    # the lead site was looked up by user_may_view_this_child
+    organisation_id = requested_child_access(request).lead_organisation_id
 
     context = {
         "case_id": registration.case_id,
@@ -373,7 +372,6 @@ def seizure_onset_date(request, episode_id):
     """
 
     try:
-        episode = Episode.objects.get(pk=episode_id)
         error_message = None
         validate_and_update_model(
             request=request,
@@ -381,7 +379,9 @@ def seizure_onset_date(request, episode_id):
             model_id=episode_id,
             field_name="seizure_onset_date",
             page_element="date_field",
-            earliest_allowable_date=episode.multiaxial_diagnosis.registration.case.date_of_birth,  # episodes may precede the first assessment date or cohort date
+            earliest_allowable_date=requested_child_access(
+                request
+            ).case.date_of_birth,  # episodes may precede the first assessment date or cohort date
         )
     except ValueError as error:
         error_message = error
@@ -1657,7 +1657,6 @@ def comorbidity_diagnosis_date(request, comorbidity_id):
     """
 
     try:
-        comorbidity = Comorbidity.objects.get(pk=comorbidity_id)
         error_message = None
         validate_and_update_model(
             request=request,
@@ -1665,7 +1664,7 @@ def comorbidity_diagnosis_date(request, comorbidity_id):
             model_id=comorbidity_id,
             field_name="comorbidity_diagnosis_date",
             page_element="date_field",
-            earliest_allowable_date=comorbidity.multiaxial_diagnosis.registration.case.date_of_birth,
+            earliest_allowable_date=requested_child_access(request).case.date_of_birth,
         )
     except ValueError as error:
         error_message = error
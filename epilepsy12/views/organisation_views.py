@@ -1,35 +1,41 @@
 # Python imports
 from datetime import date
+import gzip
 
 # third party libraries
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.contrib.auth.decorators import permission_required
-from django.http import HttpResponse
+from django.core.exceptions import BadRequest
+from django.http import HttpResponse, Http404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import quote_etag
 
 from django_htmx.http import HttpResponseClientRedirect
-import pandas as pd
 
 # E12 imports
 from ..decorator import user_may_view_this_organisation, login_and_otp_required
 from epilepsy12.constants import INDIVIDUAL_KPI_MEASURES, EnumAbstractionLevel
-from epilepsy12.models import Organisation, KPI, OrganisationKPIAggregation
+from epilepsy12.models import (
+    Organisation,
+    KPI,
+    OrganisationKPIAggregation,
+    KPIAggregationJob,
+)
 from ..common_view_functions import (
-    cases_aggregated_by_sex,
-    cases_aggregated_by_ethnicity,
-    cases_aggregated_by_deprivation_score,
-    cases_aggregated_by_age,
     all_registered_cases_for_cohort_and_abstraction_level,
     get_all_kpi_aggregation_data_for_view,
     logged_in_user_may_access_this_organisation,
-    filter_all_registered_cases_by_active_lead_site_and_cohort_and_level_of_abstraction,
-    generate_dataframe_and_aggregated_distance_data_from_cases,
-    generate_distance_from_organisation_scatterplot_figure,
-    generate_case_count_choropleth_map,
-    piechart_plot_cases_by_ethnicity,
-    piechart_plot_cases_by_index_of_multiple_deprivation,
-    piechart_plot_cases_by_sex,
-    piechart_plot_cases_by_age_range,
+    enqueue_kpi_aggregation,
+    fail_stale_kpi_aggregation_jobs,
+    get_boundary_tile,
+    ORGANISATION_FIGURES,
+    organisation_figure,
+    organisation_demographic_profile,
 )
 from epilepsy12.common_view_functions.render_charts import update_all_data_with_charts
 from ..general_functions import (
@@ -38,10 +44,27 @@ from ..general_functions import (
     value_from_key,
     cohorts_and_dates,
 )
-from ..kpi import download_kpi_summary_as_csv
-from epilepsy12.common_view_functions.aggregate_by import (
-    update_all_kpi_agg_models,
-)
+from ..kpi import kpi_export_workbook
+
+
+def requested_cohort(requested_cohort_number):
+    """
+    Returns the cohort number requested, or if none was, the cohort currently submitting (the grace cohort during
+    its grace period).
+    Raises BadRequest (400) if the cohort requested is not a number.
+    """
+    if requested_cohort_number:
+        try:
+            return int(requested_cohort_number)
+        except ValueError:
+            raise BadRequest(f"{requested_cohort_number} is not a cohort.")
+
+    cohort_data = cohorts_and_dates(first_paediatric_assessment_date=date.today())
+    return (
+        cohort_data["grace_cohort"]["cohort"]
+        if cohort_data["within_grace_period"]
+        else cohort_data["submitting_cohort"]
+    )
 
 
 def selected_organisation_summary_select(request):
@@ -81,73 +104,14 @@ def selected_organisation_summary(request, organisation_id):
 
     # Where dashboard data is filtered by cohort, which cohort?
     # Users still want to see dashboard data even when data collection is complete.
-    requested_cohort_number = request.GET.get("cohort")
-    
-    if requested_cohort_number:
-        cohort_number = int(requested_cohort_number)
-    else:
-        cohort_number = (
-            cohort_data["grace_cohort"]["cohort"]
-            if cohort_data["within_grace_period"]
-            else cohort_data["submitting_cohort"]
-        )
-
-    # thes are all registered cases for the current cohort at the selected organisation to be plotted in the map
-    cases_to_plot = filter_all_registered_cases_by_active_lead_site_and_cohort_and_level_of_abstraction(
-        organisation=selected_organisation, cohort=cohort_number
-    )
-
-    # aggregated distances (mean, median, max, min) that cases have travelled to the selected organisation
-    aggregated_distances, case_distances_dataframe = (
-        generate_dataframe_and_aggregated_distance_data_from_cases(
-            filtered_cases=cases_to_plot
-        )
-    )
-
-    # generate scatterplot of cases by distance from the selected organisation
-
-    scatterplot_of_cases_for_selected_organisation = (
-        generate_distance_from_organisation_scatterplot_figure(
-            geo_df=case_distances_dataframe, organisation=selected_organisation
-        )
-    )
+    cohort_number = requested_cohort(request.GET.get("cohort"))
 
+    # the figures are loaded separately by the template (see selected_organisation_figure)
     # differentiate between England and Wales
     if selected_organisation.country.boundary_identifier == "W92000004":  # Wales
         abstraction_level = "local_health_board"
-        # generate choropleth map of case counts for each level of abstraction
-        lhb_heatmap = generate_case_count_choropleth_map(
-            properties="ods_code",
-            abstraction_level=EnumAbstractionLevel.LOCAL_HEALTH_BOARD,
-            organisation=selected_organisation,
-            cohort=cohort_number,
-        )
     else:
-        # generate choropleth map of case counts for each level of abstraction
-        if selected_organisation.ods_code == "RGT1W":
-            # Jersey is a special case and although is mapped to England, is in the Channel Islands and has no ICB, NHS Region or LHB
-            abstraction_level = "trust"
-        else:
-            abstraction_level = "trust"
-            icb_heatmap = generate_case_count_choropleth_map(
-                properties="ods_code",
-                abstraction_level=EnumAbstractionLevel.ICB,
-                organisation=selected_organisation,
-                cohort=cohort_number,
-            )
-            nhsregion_heatmap = generate_case_count_choropleth_map(
-                properties="region_code",
-                abstraction_level=EnumAbstractionLevel.NHS_ENGLAND_REGION,
-                organisation=selected_organisation,
-                cohort=cohort_number,
-            )
-
-    country_heatmap = generate_case_count_choropleth_map(
-        properties="boundary_identifier",
-        abstraction_level=EnumAbstractionLevel.COUNTRY,
-        organisation=selected_organisation,
-        cohort=cohort_number,
-    )
+        abstraction_level = "trust"
 
     # query to return all completed E12 cases in the current cohort in this organisation
     count_of_current_cohort_registered_completed_cases_in_this_organisation = (
@@ -228,34 +192,19 @@ def selected_organisation_summary(request, organisation_id):
                 trust=selected_organisation.trust
             )
 
+    # sex, ethnicity, deprivation and age of cases, in one query shared with the pie charts
+    demographic_profile = organisation_demographic_profile(selected_organisation)
+
     context = {
         "user": request.user,
         "cohort_number": cohort_number,  # the number of the cohort that should be highlighted as imminently submitting
         "cohort_data": cohort_data,  # the cohort data object for the cohort_card
         "selected_organisation": selected_organisation,
         "organisation_list": organisation_list,
-        "cases_aggregated_by_ethnicity": cases_aggregated_by_ethnicity(
-            selected_organisation=selected_organisation
-        ),
-        "cases_aggregated_by_sex": cases_aggregated_by_sex(
-            selected_organisation=selected_organisation
-        ),
-        "cases_aggregated_by_deprivation": cases_aggregated_by_deprivation_score(
-            selected_organisation=selected_organisation
-        ),
-        "cases_aggregated_by_age_range": cases_aggregated_by_age(
-            selected_organisation=selected_organisation
-        ),
-        "index_of_multiple_deprivation_score_piechart": piechart_plot_cases_by_index_of_multiple_deprivation(
-            organisation=selected_organisation
-        ),
-        "ethnicity_piechart": piechart_plot_cases_by_ethnicity(
-            organisation=selected_organisation
-        ),
-        "sex_piechart": piechart_plot_cases_by_sex(organisation=selected_organisation),
-        "age_range_piechart": piechart_plot_cases_by_age_range(
-            organisation=selected_organisation
-        ),
+        "cases_aggregated_by_ethnicity": demographic_profile["ethnicity"],
+        "cases_aggregated_by_sex": demographic_profile["sex"],
+        "cases_aggregated_by_deprivation": demographic_profile["deprivation"],
+        "cases_aggregated_by_age_range": demographic_profile["age_range"],
         "percent_completed_organisation": total_percent_organisation,
         "percent_completed_trust": total_percent_trust,
         "count_of_all_current_cohort_registered_cases_in_this_organisation": count_of_all_current_cohort_registered_cases_in_this_organisation,
@@ -263,25 +212,7 @@ def selected_organisation_summary(request, organisation_id):
         "count_of_all_current_cohort_registered_cases_in_this_trust": count_of_all_current_cohort_registered_cases_in_this_trust,
         "count_of_current_cohort_registered_completed_cases_in_this_trust": count_of_current_cohort_registered_completed_cases_in_this_trust,
         "individual_kpi_choices": INDIVIDUAL_KPI_MEASURES,
-        "organisation_cases_map": scatterplot_of_cases_for_selected_organisation,
-        "aggregated_distances": aggregated_distances,
-        "country_heatmap": country_heatmap,
     }
-    if selected_organisation.country.boundary_identifier == "W92000004":
-        context["lhb_heatmap"] = lhb_heatmap
-        context["trust_heatmap"] = None
-        context["icb_heatmap"] = None
-        context["nhsregion_heatmap"] = None
-    else:
-        if selected_organisation.ods_code == "RGT1W":
-            # Jersey is a special case as it is in the Channel Islands and has no ICB, NHS Region or LHB
-            context["trust_heatmap"] = None
-            context["icb_heatmap"] = None
-            context["nhsregion_heatmap"] = None
-        else:
-            context["lhb_heatmap"] = None
-            context["icb_heatmap"] = icb_heatmap
-            context["nhsregion_heatmap"] = nhsregion_heatmap
 
     return render(
         request=request,
@@ -290,6 +221,67 @@ def selected_organisation_summary(request, organisation_id):
     )
 
 
+@login_and_otp_required()
+@user_may_view_this_organisation()
+def selected_organisation_figure(request, organisation_id, figure_type):
+    """
+    HTMX GET request from selected_organisation_summary.html, which loads each figure once the page has been drawn.
+    Returns the Plotly figure (cached until a case, registration or site changes) as a partial.
+    """
+    if figure_type not in ORGANISATION_FIGURES:
+        raise Http404(f"{figure_type} is not an organisation figure.")
+
+    selected_organisation = Organisation.objects.get(pk=organisation_id)
+    cohort_number = requested_cohort(request.GET.get("cohort"))
+
+    context = {
+        "figure_type": figure_type,
+        **organisation_figure(
+            figure_type=figure_type,
+            organisation=selected_organisation,
+            cohort=cohort_number,
+        ),
+    }
+
+    return render(
+        request=request,
+        template_name="epilepsy12/partials/organisation/figure.html",
+        context=context,
+    )
+
+
+@login_and_otp_required()
+def boundary_tile(request, tile_name):
+    """
+    Returns the boundaries GeoJSON for a choropleth map, gzipped if the browser accepts it.
+    The browser revalidates with the tile etag, so a tile is only downloaded again after it has been rebuilt.
+    """
+    try:
+        tile = get_boundary_tile(tile_name, with_geojson=False)
+    except ValueError:
+        raise Http404(f"{tile_name} is not a boundary tile.")
+
+    etag = quote_etag(tile.etag)
+    response = get_conditional_response(request, etag=etag)
+
+    if response is None:
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(
+                bytes(tile.geojson), content_type="application/geo+json"
+            )
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(
+                gzip.decompress(bytes(tile.geojson)),
+                content_type="application/geo+json",
+            )
+
+    response.headers["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
 @login_and_otp_required()
 @user_may_view_this_organisation()
 @permission_required("epilepsy12.can_publish_epilepsy12_data", raise_exception=True)
@@ -309,8 +301,10 @@ def publish_kpis(request, organisation_id):
         else cohort_data["submitting_cohort"]
     )
 
-    # perform aggregations and update all the KPIAggregation models only for clinicians
-    update_all_kpi_agg_models(cohort=cohort_number, open_access=True)
+    # queue the aggregations - the KPI aggregation worker creates the new published KPIAggregation records
+    enqueue_kpi_aggregation(
+        cohort=cohort_number, open_access=True, requested_by=request.user
+    )
 
     return render(
         request=request,
@@ -326,10 +320,12 @@ def selected_trust_kpis(request, organisation_id, access):
     """
     HTMX get request returning kpis.html 'Real-time Key Performance Indicator (KPI) Metrics' table.
 
-    This aggregates all KPI measures synchronously at different levels of abstraction related to the selected organisation
-    Organisation level, Trust level, ICB level, NHS Region, OPEN UK level, country level and national level.
+    For private access, this queues a rerun of the aggregations of all KPI measures at different levels of abstraction
+    (Organisation level, Trust level, ICB level, NHS Region, OPEN UK level, country level and national level)
+    for the KPI aggregation worker, unless called with enqueue=false.
 
-    It then presents each abstraction level's KPIAggregation model.
+    It then presents each abstraction level's current KPIAggregation model, and the table polls
+    kpi_aggregation_job_status until the queued aggregation is complete.
 
     It is called by htmx get request from the kpi table, either on page load, or on click of the
     refresh button in the header.
@@ -352,19 +348,20 @@ def selected_trust_kpis(request, organisation_id, access):
         else cohort_data["submitting_cohort"]
     )
 
-    if requested_cohort_number:
-        cohort_number = int(requested_cohort_number)
-    else:
-        cohort_number = submitting_cohort_number
+    cohort_number = requested_cohort(requested_cohort_number)
     
     organisation = Organisation.objects.get(pk=organisation_id)
 
-    if logged_in_user_may_access_this_organisation(request.user, organisation):
+    kpi_aggregation_job = None
+
+    if logged_in_user_may_access_this_organisation(request, organisation):
         # user is logged in and allowed to access this organisation
 
-        if access == "private":
-            # perform aggregations and update all the KPIAggregation models only for clinicians
-            update_all_kpi_agg_models(cohort=cohort_number, open_access=False)
+        if access == "private" and request.GET.get("enqueue") != "false":
+            # queue aggregations to update all the KPIAggregation models only for clinicians
+            kpi_aggregation_job = enqueue_kpi_aggregation(
+                cohort=cohort_number, open_access=False, requested_by=request.user
+            )
 
         # Gather relevant data specific for this view - still show only published data if this is public view
         all_data = get_all_kpi_aggregation_data_for_view(
@@ -411,7 +408,8 @@ def selected_trust_kpis(request, organisation_id, access):
         "last_published_date": last_published_date,
         "publish_success": False,
         "cohort_number": cohort_number,
-        "submitting_cohort_number": submitting_cohort_number
+        "submitting_cohort_number": submitting_cohort_number,
+        "kpi_aggregation_job": kpi_aggregation_job,
     }
 
     return render(
@@ -421,6 +419,37 @@ def selected_trust_kpis(request, organisation_id, access):
     )
 
 
+@login_and_otp_required()
+@user_may_view_this_organisation()
+def kpi_aggregation_job_status(request, organisation_id, job_id):
+    """
+    HTMX get request polled from kpis.html while a queued KPI aggregation is outstanding.
+    Returns the status partial - once the job is finished this reloads the kpi table without queuing a further aggregation.
+    Only the private aggregations of the cohort requested can be polled - those are the jobs queued for this organisation.
+    """
+    # a job whose worker has died is failed, so polling stops
+    fail_stale_kpi_aggregation_jobs()
+
+    kpi_aggregation_job = get_object_or_404(
+        KPIAggregationJob,
+        pk=job_id,
+        cohort=requested_cohort(request.GET.get("cohort")),
+        open_access=False,
+    )
+
+    context = {
+        "organisation": get_object_or_404(Organisation, pk=organisation_id),
+        "kpi_aggregation_job": kpi_aggregation_job,
+        "cohort_number": kpi_aggregation_job.cohort,
+    }
+
+    return render(
+        request=request,
+        template_name="epilepsy12/partials/kpis/kpi_aggregation_status.html",
+        context=context,
+    )
+
+
 def selected_trust_open_select(request, organisation_id):
     """
     POST callback on change of RCPCH organisations dropdown in open access view
@@ -487,17 +516,7 @@ def selected_trust_select_kpi(request, organisation_id):
         kpi_name = INDIVIDUAL_KPI_MEASURES[0][0]
     kpi_name_title_case = value_from_key(key=kpi_name, choices=INDIVIDUAL_KPI_MEASURES)
     
-    requested_cohort_number = request.POST.get("cohort")
-
-    if requested_cohort_number:
-        cohort_number = int(requested_cohort_number)
-    else:
-        cohort_data = cohorts_and_dates(first_paediatric_assessment_date=date.today())
-        cohort_number = (
-            cohort_data["grace_cohort"]["cohort"]
-            if cohort_data["within_grace_period"]
-            else cohort_data["submitting_cohort"]
-        )
+    cohort_number = requested_cohort(request.POST.get("cohort"))
 
     all_data = get_all_kpi_aggregation_data_for_view(
         organisation=organisation, cohort=cohort_number, open_access=False
@@ -576,56 +595,18 @@ def kpi_download(request, organisation_id):
 @login_and_otp_required()
 @permission_required("epilepsy12.can_publish_epilepsy12_data")
 def kpi_download_file(request):
-
-    (
-        country_df,
-        trust_hb_df,
-        icb_df,
-        region_df,
-        network_df,
-        national_df,
-        reference_df,
-        trust_totals_df,
-        local_health_board_totals_df,
-        icb_totals_df,
-        nhs_england_region_totals_df,
-        openuk_network_totals_df,
-        country_totals_df,
-    ) = download_kpi_summary_as_csv(cohort=6)
-
-    with pd.ExcelWriter("kpi_export.xlsx") as writer:
-        country_df.to_excel(writer, sheet_name="Country_level", index=False)
-        trust_hb_df.to_excel(writer, sheet_name="HBT_level", index=False)
-        icb_df.to_excel(writer, sheet_name="ICB_level", index=False)
-        region_df.to_excel(writer, sheet_name="NHSregion_level", index=False)
-        network_df.to_excel(writer, sheet_name="Network_level", index=False)
-        national_df.to_excel(writer, sheet_name="National_level", index=False)
-        reference_df.to_excel(writer, sheet_name="Reference", index=False)
-        trust_totals_df.to_excel(
-            writer, sheet_name="Registered vs Total - Trust", index=False
-        )
-        local_health_board_totals_df.to_excel(
-            writer, sheet_name="Registered vs Total - LHB", index=False
-        )
-        icb_totals_df.to_excel(
-            writer, sheet_name="Registered vs Total - ICB", index=False
-        )
-        nhs_england_region_totals_df.to_excel(
-            writer, sheet_name="Registered vs Total - NHSregion", index=False
-        )
-        openuk_network_totals_df.to_excel(
-            writer, sheet_name="Registered vs Total - Network", index=False
-        )
-        country_totals_df.to_excel(
-            writer, sheet_name="Registered vs Total - Country", index=False
-        )
-
-    with open("kpi_export.xlsx", "rb") as file:
-        excel_data = file.read()
+    """
+    GET: Returns the KPI report as an .xlsx file
+    Params:
+    cohort: optional, defaults to the cohort currently submitting
+    """
+    cohort_number = requested_cohort(request.GET.get("cohort"))
 
     response = HttpResponse(
-        excel_data,
+        kpi_export_workbook(cohort=cohort_number),
         content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
-    response["Content-Disposition"] = "attachment; filename=kpi_export.xlsx"
+    response["Content-Disposition"] = (
+        f"attachment; filename=kpi_export_cohort_{cohort_number}.xlsx"
+    )
     return response
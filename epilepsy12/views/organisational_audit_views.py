@@ -1,7 +1,10 @@
 from collections.abc import Iterable
+from functools import cache
 
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import render, redirect
-from django.forms import model_to_dict
+from django.forms import model_to_dict, modelform_factory
 
 from django.shortcuts import render
 
@@ -168,6 +171,48 @@ def group_form_fields(form):
     return questions_by_section, number_completed, total_questions
 
 
+@cache
+def fields_by_question():
+    # The names of the fields of each top level question, including its child questions
+    # A question is saved and rerendered as a whole, as whether its child questions show depends on its answer
+    questions_by_section, _, _ = group_form_fields(OrganisationalAuditSubmissionForm())
+
+    return {
+        question["question_number"]: [
+            item["field"].name
+            for item in [question, *question["children"]]
+            if "field" in item
+        ]
+        for questions in questions_by_section.values()
+        for question in questions
+    }
+
+
+@cache
+def question_form_class(question_number):
+    # A form with only the fields of one question, so that only its answers are validated and saved
+    return modelform_factory(
+        OrganisationalAuditSubmission,
+        form=OrganisationalAuditSubmissionForm,
+        fields=fields_by_question()[question_number],
+    )
+
+
+def get_submission_periods():
+    submission_periods = (
+        OrganisationalAuditSubmissionPeriod.objects
+        .order_by("-year")
+        .all()
+    )
+
+    if not submission_periods:
+        return None, None
+    elif len(submission_periods) == 1:
+        return submission_periods[0], None
+    else:
+        return submission_periods[0], submission_periods[1]
+
+
 def get_submission(submission_period, group, group_field):
     submission_filter = {"submission_period": submission_period}
     submission_filter[group_field] = group
@@ -195,65 +240,84 @@ def get_submission_form(submission, last_submission):
     return OrganisationalAuditSubmissionForm(data, instance=submission)
 
 
-def _organisational_audit(request, group_id, group_model, group_field):
-    submission_periods = (
-        OrganisationalAuditSubmissionPeriod.objects
-        .order_by("-year")
-        .all()
+def create_submission(submission_period, group, group_field, user, last_submission):
+    # Answers from the previous years submission are shown on the form, so keep them when the submission is first saved
+    submission_args = {
+        "submission_period": submission_period,
+        "created_by": user,
+    }
+    submission_args[group_field] = group
+
+    if last_submission:
+        for field in OrganisationalAuditSubmissionForm():
+            submission_args[field.name] = getattr(last_submission, field.name)
+
+    submission_args["submitted"] = False
+
+    return OrganisationalAuditSubmission.objects.create(**submission_args)
+
+
+def count_completed_questions(submission):
+    _, number_completed, total_questions = group_form_fields(
+        OrganisationalAuditSubmissionForm(instance=submission)
     )
 
-    if not submission_periods:
-        submission_period = None
-        last_submission_period = None
-    elif len(submission_periods) == 1:
-        submission_period = submission_periods[0]
-        last_submission_period = None
-    else:
-        submission_period = submission_periods[0]
-        last_submission_period = submission_periods[1]
+    return number_completed, total_questions
+
+
+def progress_context(number_completed, total_questions, submitted):
+    return {
+        "number_completed": number_completed,
+        "total_questions": total_questions,
+        "submitted": submitted,
+        "percentage_completed": int((number_completed / total_questions) * 100),
+    }
+
+
+def _organisational_audit(request, group_id, group_model, group_field):
+    submission_period, last_submission_period = get_submission_periods()
 
     group = group_model.objects.get(id=group_id)
 
     submission = get_submission(submission_period, group, group_field)
     last_submission = get_submission(last_submission_period, group, group_field)
 
-    context = {"group_name": group.name, "submission_period": submission_period}
+    context = {
+        "group_id": group.id,
+        "group_name": group.name,
+        "submission_period": submission_period,
+        "audit_url_name": f"organisational_audit_{group_field}",
+        "question_url_name": f"organisational_audit_{group_field}_question",
+    }
 
     if request.method == "POST":
+        # Answers are saved question by question - this submits the completed form
         if not submission:
-            submission_args = {
-                "submission_period": submission_period,
-                "created_by": request.user,
-            }
-            submission_args[group_field] = group
-
-            submission = OrganisationalAuditSubmission.objects.create(**submission_args)
-
-        form = OrganisationalAuditSubmissionForm(request.POST, instance=submission)
-
-        questions_by_section, number_completed, total_questions = group_form_fields(
-            form
+            submission = create_submission(
+                submission_period, group, group_field, request.user, last_submission
+            )
+
+        # Recount rather than trusting the kept counts, as this is what decides if the form can be submitted
+        number_completed, total_questions = count_completed_questions(submission)
+
+        submission.number_completed = number_completed
+        submission.total_questions = total_questions
+        submission.submitted = number_completed == total_questions
+        submission.save(
+            update_fields=[
+                "number_completed",
+                "total_questions",
+                "submitted",
+                "updated_at",
+            ]
         )
 
-        if number_completed != total_questions:
-            form.instance.submitted = False
-
-        context["questions_by_section"] = questions_by_section
-        context["number_completed"] = number_completed
-        context["total_questions"] = total_questions
-        context["submitted"] = submission.submitted if submission else False
-        context["percentage_completed"] = int(
-            (number_completed / total_questions) * 100
+        context.update(
+            progress_context(number_completed, total_questions, submission.submitted)
         )
-        context["form"] = form
-
-        # Validate all the data to pull through the values
-        form.is_valid()
-        # but save regardless of errors - we save as we go
-        form.instance.save()
 
         return render(
-            request, "epilepsy12/partials/organisational_audit_form.html", context
+            request, "epilepsy12/partials/organisational_audit_progress.html", context
         )
 
     form = get_submission_form(submission, last_submission)
@@ -261,15 +325,107 @@ def _organisational_audit(request, group_id, group_model, group_field):
     questions_by_section, number_completed, total_questions = group_form_fields(form)
 
     context["questions_by_section"] = questions_by_section
-    context["number_completed"] = number_completed
-    context["total_questions"] = total_questions
-    context["submitted"] = submission.submitted if submission else False
-    context["percentage_completed"] = int((number_completed / total_questions) * 100)
     context["form"] = form
+    context.update(
+        progress_context(
+            number_completed,
+            total_questions,
+            submission.submitted if submission else False,
+        )
+    )
 
     return render(request, "epilepsy12/organisational_audit.html", context)
 
 
+def _organisational_audit_question(
+    request, group_id, group_model, group_field, question_number
+):
+    # Validates and saves the answers to one question, updates the completion counts by the change in that
+    # question alone and rerenders only the question and the progress
+    if request.method != "POST" or question_number not in fields_by_question():
+        raise Http404
+
+    submission_period, last_submission_period = get_submission_periods()
+
+    group = group_model.objects.get(id=group_id)
+
+    submission = get_submission(submission_period, group, group_field)
+
+    if not submission:
+        last_submission = get_submission(last_submission_period, group, group_field)
+        submission = create_submission(
+            submission_period, group, group_field, request.user, last_submission
+        )
+
+    QuestionForm = question_form_class(question_number)
+
+    # The submission is locked from reading the answers to saving the counts, so simultaneous saves of different
+    # questions each count from the answers the other saved
+    with transaction.atomic():
+        submission = OrganisationalAuditSubmission.objects.select_for_update().get(
+            pk=submission.pk
+        )
+
+        # Counted from the saved answers, before and after, so invalid answers (shown but not saved) are not counted
+        _, completed_before, total_before = group_form_fields(
+            QuestionForm(instance=submission)
+        )
+
+        form = QuestionForm(request.POST, instance=submission)
+
+        # Validate the data to pull the valid answers through to the instance
+        form.is_valid()
+        # and save those regardless of errors elsewhere - we save as we go
+        update_fields = [
+            name for name in form.changed_data if name in form.cleaned_data
+        ]
+
+        _, completed_after, total_after = group_form_fields(
+            QuestionForm(instance=submission)
+        )
+
+        if submission.number_completed is None or submission.total_questions is None:
+            (
+                submission.number_completed,
+                submission.total_questions,
+            ) = count_completed_questions(submission)
+            update_fields += ["number_completed", "total_questions"]
+        elif completed_after != completed_before or total_after != total_before:
+            submission.number_completed += completed_after - completed_before
+            submission.total_questions += total_after - total_before
+            update_fields += ["number_completed", "total_questions"]
+
+        if (
+            submission.submitted
+            and submission.number_completed != submission.total_questions
+        ):
+            submission.submitted = False
+            update_fields.append("submitted")
+
+        if update_fields:
+            submission.save(update_fields=[*update_fields, "updated_at"])
+
+    questions_by_section, _, _ = group_form_fields(form)
+
+    context = {
+        "group_id": group.id,
+        "audit_url_name": f"organisational_audit_{group_field}",
+        "question_url_name": f"organisational_audit_{group_field}_question",
+        "parent": next(iter(questions_by_section.values()))[0],
+    }
+    context.update(
+        progress_context(
+            submission.number_completed,
+            submission.total_questions,
+            submission.submitted,
+        )
+    )
+
+    return render(
+        request, "epilepsy12/partials/organisational_audit_question_update.html", context
+    )
+
+
 @login_and_otp_required()
 @user_may_view_organisational_audit(Trust, "trust")
 def organisational_audit_trust(request, id):
@@ -282,6 +438,22 @@ def organisational_audit_local_health_board(request, id):
     return _organisational_audit(request, id, LocalHealthBoard, "local_health_board")
 
 
+@login_and_otp_required()
+@user_may_view_organisational_audit(Trust, "trust")
+def organisational_audit_trust_question(request, id, question_number):
+    return _organisational_audit_question(
+        request, id, Trust, "trust", question_number
+    )
+
+
+@login_and_otp_required()
+@user_may_view_organisational_audit(LocalHealthBoard, "local_health_board")
+def organisational_audit_local_health_board_question(request, id, question_number):
+    return _organisational_audit_question(
+        request, id, LocalHealthBoard, "local_health_board", question_number
+    )
+
+
 @login_and_otp_required()
 def organisational_audit(request):
     organisation = request.user.organisation_employer
@@ -27,6 +27,7 @@ from ..models import (
 from ..common_view_functions import (
     validate_and_update_model,
     recalculate_form_generate_response,
+    mark_kpi_aggregations_dirty,
 )
 from ..decorator import user_may_view_this_child, login_and_otp_required
 from ..general_functions import (
@@ -435,6 +436,10 @@ def update_lead_site(request, registration_id, site_id, update):
         KPI.objects.filter(registration=registration).update(
             organisation=new_organisation
         )
+        mark_kpi_aggregations_dirty(
+            organisation_ids=[origin_organisation.pk, new_organisation.pk],
+            cohort=registration.cohort,
+        )
 
         """
         Update complete
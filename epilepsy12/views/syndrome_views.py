@@ -6,7 +6,11 @@ from ..common_view_functions import (
     validate_and_update_model,
     recalculate_form_generate_response,
 )
-from ..decorator import user_may_view_this_child, login_and_otp_required
+from ..decorator import (
+    user_may_view_this_child,
+    login_and_otp_required,
+    requested_child_access,
+)
 
 
 @login_and_otp_required()
@@ -18,7 +22,6 @@ def syndrome_diagnosis_date(request, syndrome_id):
     """
 
     try:
-        syndrome = Syndrome.objects.get(pk=syndrome_id)
         error_message = None
         validate_and_update_model(
             request=request,
@@ -26,7 +29,7 @@ def syndrome_diagnosis_date(request, syndrome_id):
             model_id=syndrome_id,
             field_name="syndrome_diagnosis_date",
             page_element="date_field",
-            earliest_allowable_date=syndrome.multiaxial_diagnosis.registration.case.date_of_birth,
+            earliest_allowable_date=requested_child_access(request).case.date_of_birth,
         )
     except ValueError as error:
         error_message = error
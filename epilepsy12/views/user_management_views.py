@@ -46,7 +46,7 @@ from ..general_functions import (
     match_in_choice_key,
     send_email_to_recipients,
 )
-from ..common_view_functions import group_for_role
+from ..common_view_functions import group_for_role, access_scope
 from ..decorator import (
     user_may_view_this_organisation,
     user_can_access_user,
@@ -71,7 +71,9 @@ def epilepsy12_user_list(request, organisation_id):
     """
 
     # get currently selected organisation
-    organisation = Organisation.objects.get(pk=organisation_id)
+    organisation = Organisation.objects.select_related(
+        "country", "trust", "local_health_board"
+    ).get(pk=organisation_id)
 
     sort_flag = None
 
@@ -115,11 +117,7 @@ def epilepsy12_user_list(request, organisation_id):
         if basic_filter:
             # the basic filter filters users based on the selected organisation view
             # the filter_term_Q filters based on what the user has put in the search box
-            if (
-                request.user.is_rcpch_staff
-                or request.user.is_rcpch_audit_team_member
-                or request.user.is_superuser
-            ):
+            if access_scope(request).is_national:
                 # user is RCPCH or E12 audit staff so can see RCPCH staff also
                 # who will not be affiliated with any organisation
                 epilepsy12_user_list = (
@@ -169,11 +167,7 @@ def epilepsy12_user_list(request, organisation_id):
         else:
             raise Exception("No View Preference supplied")
 
-        if (
-            request.user.is_rcpch_staff
-            or request.user.is_rcpch_audit_team_member
-            or request.user.is_superuser
-        ):
+        if access_scope(request).is_national:
             if basic_filter:
                 # organisational or trust view
                 filtered_epilepsy12_users = (
@@ -267,11 +261,7 @@ def epilepsy12_user_list(request, organisation_id):
     else:
         parent_trust = organisation.trust
 
-    if (
-        request.user.is_rcpch_audit_team_member
-        or request.user.is_rcpch_staff
-        or request.user.is_superuser
-    ):
+    if access_scope(request).is_national:
         if organisation.country.boundary_identifier == "W92000004":
             rcpch_choices = (
                 (0, "Organisation level"),
@@ -764,7 +754,7 @@ def all_epilepsy12_users_list(request, organisation_id):
     allowed_groups = [EPILEPSY12_AUDIT_TEAM_FULL_ACCESS]
 
     if not (
-        request.user.is_superuser or request.user.groups.filter(name__in=allowed_groups)
+        request.user.is_superuser or access_scope(request).is_in_groups(allowed_groups)
     ):
         raise PermissionDenied()
 
@@ -128,12 +128,16 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
+    "epilepsy12.middleware.HistoryBatchMiddleware",
     "django_auto_logout.middleware.auto_logout",
     "epilepsy12.middleware.CurrentUserMiddleware",
     # 2fa
     "django_otp.middleware.OTPMiddleware",
 ]
 
+# Write the history rows of each request together at the end of the request, rather than after every save
+HISTORY_BATCH_WRITES = os.getenv("HISTORY_BATCH_WRITES", "False") == "True"
+
 # Django security middleware settings for HSTS support
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_HSTS_SECONDS = 3600
@@ -203,6 +207,17 @@ else:
 
 DATABASES = {"default": database_config}
 
+# Cache
+# Held in the database so it is shared by every web worker and by the background workers (KPI aggregation and audit
+# progress), which invalidate cached maps and figures when the data they show changes
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "epilepsy12_cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -313,7 +328,7 @@ AUTHENTICATION_BACKENDS = (
 
 # rest framework settings
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "epilepsy12.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",